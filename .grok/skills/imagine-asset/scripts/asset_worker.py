@@ -0,0 +1,449 @@
+#!/usr/bin/env python3
+"""Long-lived asset worker that keeps Pillow, asset-types.json and rembg sessions warm.
+
+A one-off process_asset.py or remove_background.py run pays for interpreter
+start-up, importing Pillow/NumPy, parsing asset-types.json and (with
+rembg) building an ONNX session before touching a single pixel. For one
+image that costs more than the work itself. The worker pays it once. While
+it is serving, both CLIs forward their argv to it (forward_to_worker()) and
+just relay its output. generate_hero_sprites.py sends its cut-outs to the
+worker's warm rembg session (WorkerRemover).
+
+Protocol: one JSON object per line in each direction.
+
+    {"op": "run", "tool": "process_asset", "argv": [...], "cwd": "..."}
+        -> {"event": "stdout" | "stderr", "data": "..."} ... {"event": "exit", "code": 0}
+    {"op": "remove", "model": "u2net", "label": "...", "png": "<base64>"}
+        -> {"event": "result", "png": "<base64>", "record": {...}}
+    {"op": "ping"}      -> {"event": "pong", "pid": ..., "jobs": ..., "sessions": [...]}
+    {"op": "shutdown"}  -> {"event": "bye"}
+
+Failures come back as {"event": "error", "message": "..."}. ``run`` jobs
+(process, promote, batch, remove_background) execute one at a time because
+they redirect the process-wide stdout. ``remove`` requests go straight to
+the shared remover's queue, so concurrent callers are batched together.
+
+Usage:
+    python asset_worker.py serve [--socket PATH] [--preload-rembg MODEL]
+    python asset_worker.py serve --stdio    # JSONL on stdin/stdout, no socket
+    python asset_worker.py status | stop
+
+The socket defaults to <project>/.godot/asset_worker.sock (override with
+ASSET_WORKER_SOCKET). Set ASSET_WORKER=0, or pass --no-worker, to make the
+CLIs ignore a running worker. Python on Windows may lack Unix sockets; the
+CLIs then always run locally, and --stdio still works.
+
+Only the standard library is imported at module level: the CLIs import this
+before anything heavy to decide whether to forward.
+"""
+
+from __future__ import annotations
+
+import argparse
+import base64
+import contextlib
+import importlib
+import io
+import json
+import os
+import socket
+import socketserver
+import sys
+import threading
+import time
+import traceback
+from pathlib import Path
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+DEFAULT_PROJECT_ROOT = SCRIPT_DIR.parents[3]  # scripts -> imagine-asset -> skills -> .grok -> repo
+TOOLS = ("process_asset", "remove_background")
+CONNECT_TIMEOUT = 0.5
+
+
+def socket_path() -> Path:
+    override = os.environ.get("ASSET_WORKER_SOCKET")
+    if override:
+        return Path(override)
+    return DEFAULT_PROJECT_ROOT / ".godot" / "asset_worker.sock"
+
+
+def worker_enabled(argv: list[str] | None = None) -> bool:
+    if not hasattr(socket, "AF_UNIX") or os.environ.get("ASSET_WORKER", "1") == "0":
+        return False
+    return "--no-worker" not in (argv or [])
+
+
+def connect(path: Path | None = None) -> socket.socket | None:
+    """A connection to the serving worker, or None if there is none."""
+    path = path or socket_path()
+    if not hasattr(socket, "AF_UNIX") or not path.exists():
+        return None
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.settimeout(CONNECT_TIMEOUT)
+    try:
+        sock.connect(str(path))
+    except OSError:  # stale socket file, or a worker that is shutting down
+        sock.close()
+        return None
+    sock.settimeout(None)
+    return sock
+
+
+def send(sock: socket.socket, message: dict) -> None:
+    sock.sendall((json.dumps(message) + "\n").encode("utf-8"))
+
+
+def read_events(sock: socket.socket):
+    with sock.makefile("rb") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def call(message: dict, path: Path | None = None) -> dict | None:
+    """Send one request and return its single reply (None if no worker)."""
+    sock = connect(path)
+    if sock is None:
+        return None
+    with sock:
+        send(sock, message)
+        return next(read_events(sock), None)
+
+
+def forward_to_worker(tool: str, argv: list[str]) -> int | None:
+    """Run ``tool`` with ``argv`` in the serving worker and relay its output.
+
+    Returns the tool's exit code, or None when no worker is serving (the
+    caller then runs the tool itself).
+    """
+    if not worker_enabled(argv):
+        return None
+    sock = connect()
+    if sock is None:
+        return None
+    with sock:
+        send(sock, {"op": "run", "tool": tool, "argv": argv, "cwd": os.getcwd()})
+        for event in read_events(sock):
+            kind = event.get("event")
+            if kind == "stdout":
+                sys.stdout.write(event["data"])
+            elif kind == "stderr":
+                sys.stderr.write(event["data"])
+            elif kind == "exit":
+                sys.stdout.flush()
+                return event["code"]
+            elif kind == "error":
+                print(f"asset worker: {event['message']}", file=sys.stderr)
+                return 1
+    print("asset worker: connection closed before the job finished", file=sys.stderr)
+    return 1
+
+
+class WorkerRemover:
+    """BackgroundRemover stand-in that cuts images out on the worker's warm session.
+
+    Thread-safe: every ``remove()`` is its own connection, so concurrent
+    callers land in the worker's queue together and get batched there.
+    """
+
+    def __init__(self, model: str, path: Path | None = None):
+        self.model = model
+        self.path = path or socket_path()
+        self.setup_seconds = 0.0
+        self.records: list[dict] = []
+
+    def __enter__(self) -> WorkerRemover:
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def remove(self, image, label: str | None = None):
+        from PIL import Image
+
+        buf = io.BytesIO()
+        image.save(buf, "PNG")
+        sock = connect(self.path)
+        if sock is None:
+            raise RuntimeError(f"asset worker is not serving {self.path}")
+        with sock:
+            send(
+                sock,
+                {
+                    "op": "remove",
+                    "model": self.model,
+                    "label": label,
+                    "png": base64.b64encode(buf.getvalue()).decode("ascii"),
+                },
+            )
+            for event in read_events(sock):
+                if event.get("event") == "result":
+                    self.records.append(event["record"])
+                    result = Image.open(io.BytesIO(base64.b64decode(event["png"])))
+                    result.load()
+                    return result
+                if event.get("event") == "error":
+                    raise RuntimeError(f"asset worker: {event['message']}")
+        raise RuntimeError("asset worker: connection closed before the image came back")
+
+    def close(self) -> None:
+        pass  # nothing held open between calls
+
+    def summary(self) -> dict:
+        from remove_background import summarize_records
+
+        return summarize_records(self.model, self.records, None, self.setup_seconds)
+
+
+def connect_remover(model: str) -> WorkerRemover | None:
+    """A WorkerRemover if a worker with rembg installed is serving, else None."""
+    if not worker_enabled():
+        return None
+    reply = call({"op": "ping"})
+    if not reply or not reply.get("rembg"):
+        return None
+    return WorkerRemover(model)
+
+
+class EventStream(io.TextIOBase):
+    """File-like object that turns writes into stdout/stderr events."""
+
+    def __init__(self, emit, name: str):
+        self.emit = emit
+        self.name = name
+        self.broken = False
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data: str) -> int:
+        if data and not self.broken:
+            try:
+                self.emit({"event": self.name, "data": data})
+            except OSError:
+                # The client went away. Let the job finish (it may be halfway
+                # through writing files) and drop the rest of its output.
+                self.broken = True
+        return len(data)
+
+
+def exit_status(code) -> int:
+    """Exit code for a SystemExit payload, printing string messages like Python does."""
+    if code is None:
+        return 0
+    if isinstance(code, int):
+        return code
+    print(code, file=sys.stderr)
+    return 1
+
+
+def log(message: str) -> None:
+    print(f"[asset_worker] {message}", file=sys.__stderr__, flush=True)
+
+
+class Worker:
+    """Executes requests against warm module state; shared by every connection."""
+
+    def __init__(self, preload_rembg: str | None = None):
+        self.started = time.time()
+        self.jobs = 0
+        self._run_lock = threading.Lock()
+        start = time.perf_counter()
+        process_asset = importlib.import_module("process_asset")  # Pillow, NumPy, manifest store
+        process_asset.load_type_configs()
+        if preload_rembg:
+            from remove_background import shared_remover
+
+            shared_remover(preload_rembg)
+        log(f"warm in {time.perf_counter() - start:.2f}s")
+
+    def handle(self, message: dict, emit) -> bool:
+        """Answer one request through ``emit``; False means shut down."""
+        op = message.get("op")
+        try:
+            if op == "ping":
+                emit(self.status())
+            elif op == "run":
+                self.run(message, emit)
+            elif op == "remove":
+                self.remove(message, emit)
+            elif op == "shutdown":
+                emit({"event": "bye"})
+                return False
+            else:
+                emit({"event": "error", "message": f"unknown op {op!r}"})
+        except OSError:
+            pass  # client disconnected
+        return True
+
+    def status(self) -> dict:
+        from importlib.util import find_spec
+
+        import remove_background
+
+        return {
+            "event": "pong",
+            "pid": os.getpid(),
+            "uptime_seconds": round(time.time() - self.started, 1),
+            "jobs": self.jobs,
+            "sessions": sorted(remove_background._shared_removers),
+            "rembg": find_spec("rembg") is not None,
+            "peak_rss_bytes": remove_background.peak_rss_bytes(),
+        }
+
+    def run(self, message: dict, emit) -> None:
+        tool = message.get("tool")
+        if tool not in TOOLS:
+            emit({"event": "error", "message": f"unknown tool {tool!r}"})
+            return
+        argv = [str(arg) for arg in message.get("argv", [])]
+        stdout, stderr = EventStream(emit, "stdout"), EventStream(emit, "stderr")
+        with self._run_lock:
+            self.jobs += 1
+            start = time.perf_counter()
+            saved_argv, saved_cwd = sys.argv, os.getcwd()
+            try:
+                os.chdir(message.get("cwd") or saved_cwd)
+                sys.argv = [f"{tool}.py", *argv]  # argparse takes prog from argv[0]
+                with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+                    try:
+                        result = importlib.import_module(tool).main(argv)
+                        code = result if isinstance(result, int) else 0
+                    except SystemExit as e:
+                        code = exit_status(e.code)
+                    except Exception:
+                        traceback.print_exc()
+                        code = 1
+            finally:
+                sys.argv = saved_argv
+                os.chdir(saved_cwd)
+            log(f"{tool} {' '.join(argv)} -> {code} in {time.perf_counter() - start:.2f}s")
+        emit({"event": "exit", "code": code})
+
+    def remove(self, message: dict, emit) -> None:
+        from PIL import Image
+        from remove_background import shared_remover
+
+        try:
+            remover = shared_remover(message.get("model") or "u2net")
+            image = Image.open(io.BytesIO(base64.b64decode(message["png"])))
+            future = remover.submit(image, message.get("label"))
+            result = future.result()
+        except Exception as e:  # rembg missing, bad payload, inference failure
+            emit({"event": "error", "message": f"{type(e).__name__}: {e}"})
+            return
+        buf = io.BytesIO()
+        result.save(buf, "PNG")
+        emit(
+            {
+                "event": "result",
+                "png": base64.b64encode(buf.getvalue()).decode("ascii"),
+                "record": future.record,
+            }
+        )
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self) -> None:
+        lock = threading.Lock()
+
+        def emit(event: dict) -> None:
+            data = (json.dumps(event) + "\n").encode("utf-8")
+            with lock:
+                self.wfile.write(data)
+
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            try:
+                message = json.loads(line)
+            except json.JSONDecodeError as e:
+                emit({"event": "error", "message": f"bad request: {e}"})
+                continue
+            if not self.server.worker.handle(message, emit):
+                threading.Thread(target=self.server.shutdown, daemon=True).start()
+                return
+
+
+def serve_socket(worker: Worker, path: Path) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if path.exists():
+        probe = connect(path)
+        if probe is not None:
+            probe.close()
+            raise SystemExit(f"A worker is already serving {path}")
+        path.unlink()  # left behind by a worker that did not exit cleanly
+    server = socketserver.ThreadingUnixStreamServer(str(path), _Handler)
+    server.daemon_threads = True
+    server.worker = worker
+    os.chmod(path, 0o600)  # jobs write files as this user; keep other users out
+    log(f"serving on {path} (pid {os.getpid()})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        path.unlink(missing_ok=True)
+        log("stopped")
+
+
+def serve_stdio(worker: Worker) -> None:
+    out = sys.stdout  # tools' own stdout is redirected into events
+    lock = threading.Lock()
+
+    def emit(event: dict) -> None:
+        with lock:
+            out.write(json.dumps(event) + "\n")
+            out.flush()
+
+    for line in sys.stdin:
+        if not line.strip():
+            continue
+        try:
+            message = json.loads(line)
+        except json.JSONDecodeError as e:
+            emit({"event": "error", "message": f"bad request: {e}"})
+            continue
+        if not worker.handle(message, emit):
+            break
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="Persistent asset worker for the imagine-asset CLIs"
+    )
+    parser.add_argument("command", choices=["serve", "status", "stop"])
+    parser.add_argument(
+        "--socket", default=None, help="Socket path (default .godot/asset_worker.sock)"
+    )
+    parser.add_argument("--stdio", action="store_true", help="serve: JSONL on stdin/stdout")
+    parser.add_argument(
+        "--preload-rembg",
+        metavar="MODEL",
+        default=None,
+        help="serve: build this rembg session at start-up instead of on first use",
+    )
+    args = parser.parse_args()
+    path = Path(args.socket) if args.socket else socket_path()
+
+    if args.command == "serve":
+        worker = Worker(args.preload_rembg)
+        if args.stdio:
+            serve_stdio(worker)
+        elif not hasattr(socket, "AF_UNIX"):
+            raise SystemExit("Unix sockets are not available here; use serve --stdio")
+        else:
+            serve_socket(worker, path)
+        return 0
+
+    reply = call({"op": "ping" if args.command == "status" else "shutdown"}, path)
+    if reply is None:
+        print(f"No worker serving {path}")
+        return 1
+    print(json.dumps(reply, indent=2) if args.command == "status" else "Worker stopped")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+"""Write Godot ``.import`` metadata next to pipeline-produced PNGs.
+
+Godot imports every texture it has no up-to-date ``.import`` for, both on
+editor start-up and on a headless ``--export-release``. When the pipeline
+writes a PNG it also writes ``<png>.import`` with the compression and
+mipmap settings of its asset type (the ``import`` block of
+asset-types.json, on top of Godot's texture defaults). The first import
+then uses the right settings and never has to be redone from the Import
+dock.
+
+The file is rendered exactly as Godot writes it, so Godot's own rewrite
+after importing leaves it byte-identical. The uid of an existing .import
+is kept, and a new one is derived from the res:// path so re-runs and
+other machines agree. The file is only rewritten when its content would
+change: touching an unchanged .import makes Godot re-check the texture.
+
+Godot records the md5 of the last source it imported in
+``.godot/imported/<file>-<md5 of res path>.md5``. write_import() compares
+the PNG against it and reports "current" (nothing for the next export to
+do) or "pending" (Godot will import it once). The compiled ``.ctex``
+itself is left to Godot.
+
+Only lossless (0) and lossy (1) compression are supported: VRAM modes
+need per-platform dest files that Godot works out itself.
+
+Usage:
+    python godot_import.py PATH [PATH ...] [--type ui] [--project-root DIR]
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+from pathlib import Path
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+SKILL_DIR = SCRIPT_DIR.parent
+DEFAULT_PROJECT_ROOT = SKILL_DIR.parent.parent.parent
+
+# Godot 4 texture importer options, in the order Godot writes them.
+TEXTURE_PARAMS = {
+    "compress/mode": 0,
+    "compress/high_quality": False,
+    "compress/lossy_quality": 0.7,
+    "compress/uastc_level": 0,
+    "compress/rdo_quality_loss": 0.0,
+    "compress/hdr_compression": 1,
+    "compress/normal_map": 0,
+    "compress/channel_pack": 0,
+    "mipmaps/generate": False,
+    "mipmaps/limit": -1,
+    "roughness/mode": 0,
+    "roughness/src_normal": "",
+    "process/channel_remap/red": 0,
+    "process/channel_remap/green": 1,
+    "process/channel_remap/blue": 2,
+    "process/channel_remap/alpha": 3,
+    "process/fix_alpha_border": True,
+    "process/premult_alpha": False,
+    "process/normal_map_invert_y": False,
+    "process/hdr_as_srgb": False,
+    "process/hdr_clamp_exposure": False,
+    "process/size_limit": 0,
+    "detect_3d/compress_to": 1,
+}
+SUPPORTED_COMPRESS_MODES = (0, 1)  # lossless, lossy
+UID_ALPHABET = "abcdefghijklmnopqrstuvwxyz0123456789"
+SOURCE_MD5_RE = re.compile(r'^source_md5="([0-9a-f]{32})"', re.MULTILINE)
+IMPORTER_RE = re.compile(r'^importer="([^"]*)"', re.MULTILINE)
+UID_RE = re.compile(r'^uid="(uid://[a-z0-9]+)"', re.MULTILINE)
+
+
+def load_type_config(asset_type: str) -> dict:
+    """One type from asset-types.json, for callers outside process_asset.py."""
+    with open(SKILL_DIR / "asset-types.json", encoding="utf-8") as f:
+        types = json.load(f)
+    if asset_type not in types:
+        raise SystemExit(f"Unknown type '{asset_type}'. Valid: {', '.join(types)}")
+    return types[asset_type]
+
+
+def import_params(type_cfg: dict | None = None) -> dict:
+    """Godot's defaults overridden by the type's ``import`` block."""
+    params = dict(TEXTURE_PARAMS)
+    overrides = (type_cfg or {}).get("import", {})
+    unknown = set(overrides) - set(params)
+    if unknown:
+        raise ValueError(f"Unknown texture import option(s): {', '.join(sorted(unknown))}")
+    params.update(overrides)
+    if params["compress/mode"] not in SUPPORTED_COMPRESS_MODES:
+        raise ValueError(
+            f"compress/mode {params['compress/mode']} is a VRAM mode; only 0 (lossless)"
+            " and 1 (lossy) can be pre-seeded"
+        )
+    return params
+
+
+def format_value(value) -> str:
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, str):
+        return json.dumps(value)
+    return repr(value)
+
+
+def texture_uid(res_path: str) -> str:
+    """A stable Godot-style uid (63-bit id in Godot's base-36 text form)."""
+    n = int.from_bytes(hashlib.sha256(res_path.encode("utf-8")).digest()[:8], "big")
+    n &= 0x7FFF_FFFF_FFFF_FFFF
+    text = ""
+    while True:
+        n, digit = divmod(n, len(UID_ALPHABET))
+        text = UID_ALPHABET[digit] + text
+        if not n:
+            return f"uid://{text}"
+
+
+def imported_stem(res_path: str) -> str:
+    """``res://.godot/imported/<file>-<md5>`` minus the extension."""
+    name = res_path.rsplit("/", 1)[-1]
+    return f"res://.godot/imported/{name}-{hashlib.md5(res_path.encode('utf-8')).hexdigest()}"
+
+
+def render_import(res_path: str, params: dict, uid: str) -> str:
+    ctex = f"{imported_stem(res_path)}.ctex"
+    lines = [
+        "[remap]",
+        "",
+        'importer="texture"',
+        'type="CompressedTexture2D"',
+        f'uid="{uid}"',
+        f'path="{ctex}"',
+        "metadata={",
+        '"vram_texture": false',
+        "}",
+        "",
+        "[deps]",
+        "",
+        f'source_file="{res_path}"',
+        f'dest_files=["{ctex}"]',
+        "",
+        "[params]",
+        "",
+    ]
+    lines += [f"{key}={format_value(value)}" for key, value in params.items()]
+    return "\n".join(lines) + "\n"
+
+
+def godot_res_path(project_root: Path, path: Path) -> str | None:
+    """``res://`` path of ``path``, or None if Godot never imports it.
+
+    That is anything outside the project, hidden (Godot skips names
+    starting with "." such as .godot/), or under a directory with a
+    .gdignore.
+    """
+    project_root = project_root.resolve()
+    path = path.resolve()
+    try:
+        rel = path.relative_to(project_root)
+    except ValueError:
+        return None
+    if any(part.startswith(".") for part in rel.parts):
+        return None
+    for parent in path.parents:
+        if (parent / ".gdignore").exists():
+            return None
+        if parent == project_root:
+            break
+    return "res://" + rel.as_posix()
+
+
+def file_md5(path: Path) -> str:
+    h = hashlib.md5()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def godot_source_md5(project_root: Path, res_path: str) -> str | None:
+    """md5 of the source Godot last imported for ``res_path``, if any."""
+    md5_file = project_root / f"{imported_stem(res_path)[len('res://'):]}.md5"
+    try:
+        match = SOURCE_MD5_RE.search(md5_file.read_text(encoding="utf-8"))
+    except OSError:
+        return None
+    return match.group(1) if match else None
+
+
+def write_atomic(path: Path, text: str) -> None:
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    tmp.write_text(text, encoding="utf-8", newline="\n")
+    os.replace(tmp, path)
+
+
+def write_import(project_root: Path, png_path: Path, type_cfg: dict | None = None) -> str:
+    """Write ``<png>.import`` for ``png_path`` if it would change.
+
+    Returns "ignored" (Godot never imports the file), "kept" (the .import
+    uses another importer, e.g. set from the Import dock), "written", or
+    for an already up-to-date .import "current" / "pending" depending on
+    whether Godot's last import matches the PNG on disk.
+    """
+    res_path = godot_res_path(project_root, png_path)
+    if res_path is None:
+        return "ignored"
+    import_path = png_path.with_name(png_path.name + ".import")
+    try:
+        existing = import_path.read_text(encoding="utf-8")
+    except OSError:
+        existing = None
+    importer = IMPORTER_RE.search(existing) if existing else None
+    if importer and importer.group(1) != "texture":
+        return "kept"
+    match = UID_RE.search(existing) if existing else None
+    uid = match.group(1) if match else texture_uid(res_path)
+    text = render_import(res_path, import_params(type_cfg), uid)
+    if text != existing:
+        write_atomic(import_path, text)
+        return "written"
+    if godot_source_md5(project_root.resolve(), res_path) == file_md5(png_path):
+        return "current"
+    return "pending"
+
+
+def write_imports(project_root: Path, paths: list, type_cfg: dict | None = None) -> dict:
+    """write_import() for every path; returns a count per status."""
+    counts: dict[str, int] = {}
+    for path in paths:
+        status = write_import(project_root, Path(path), type_cfg)
+        counts[status] = counts.get(status, 0) + 1
+    return counts
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Write Godot .import files for PNGs")
+    parser.add_argument("paths", nargs="+", help="PNG files or directories (searched recursively)")
+    parser.add_argument("--type", default=None, help="Asset type from asset-types.json")
+    parser.add_argument("--project-root", default=str(DEFAULT_PROJECT_ROOT))
+    args = parser.parse_args()
+
+    project_root = Path(args.project_root).resolve()
+    type_cfg = load_type_config(args.type) if args.type else None
+
+    pngs = []
+    for raw in args.paths:
+        path = Path(raw)
+        pngs += sorted(path.rglob("*.png")) if path.is_dir() else [path]
+    counts = write_imports(project_root, pngs, type_cfg)
+    print(", ".join(f"{count} {status}" for status, count in sorted(counts.items())) or "no PNGs")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
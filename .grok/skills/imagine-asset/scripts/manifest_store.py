@@ -0,0 +1,340 @@
+"""Indexed manifest store for generated assets.
+
+SQLite backs the manifest so lookups by (type, id, filename) and cache_key
+are index hits instead of list scans, appends are single-row inserts, and
+several process_asset.py runs can write at once (WAL + busy timeout).
+
+manifest.json keeps its original shape — a JSON list of entry dicts in
+insertion order — and is produced by export_json() for existing consumers.
+Exporting is explicit (a batch end, --export-manifest), not part of every
+write; export_if_stale() skips it when nothing changed. A store that
+starts empty imports any existing manifest.json.
+
+The file stays checked in, so it can also change under the store (a pull,
+a hand edit, another checkout). On open its mtime and size are compared
+with what the store last exported or imported; only if they differ is the
+file read and hashed, and if the content changed it is merged back in.
+manifest.json becomes the base. Entries the store added since its last
+export are kept after it, and exported entries updated since (tracked in
+``unexported``) replace their manifest.json counterpart.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import sqlite3
+from pathlib import Path
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    type TEXT,
+    id TEXT,
+    filename TEXT,
+    cache_key TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_type_id ON entries (type, id, seq);
+CREATE INDEX IF NOT EXISTS entries_filename ON entries (filename, seq);
+CREATE INDEX IF NOT EXISTS entries_cache_key ON entries (cache_key, seq);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS unexported (seq INTEGER PRIMARY KEY);
+"""
+
+
+def parse_manifest(data: bytes) -> list:
+    entries = json.loads(data) if data.strip() else []
+    return entries if isinstance(entries, list) else []
+
+
+def save_manifest_json(manifest_path: Path, entries: list) -> bytes:
+    """Write via a temp file + rename so readers never see a half-written manifest.
+
+    Returns the bytes written.
+    """
+    data = (json.dumps(entries, indent=2) + "\n").encode("utf-8")
+    manifest_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = manifest_path.with_name(f".{manifest_path.name}.{os.getpid()}.tmp")
+    tmp_path.write_bytes(data)
+    os.replace(tmp_path, manifest_path)
+    return data
+
+
+def file_stamp(path: Path) -> str | None:
+    """mtime_ns:size of ``path``, or None if it does not exist."""
+    try:
+        st = path.stat()
+    except FileNotFoundError:
+        return None
+    return f"{st.st_mtime_ns}:{st.st_size}"
+
+
+def entry_key(entry: dict) -> tuple:
+    """What identifies an entry across the store and manifest.json."""
+    return entry.get("type"), entry.get("id"), entry.get("filename") or entry.get("path")
+
+
+def canonical(entry: dict) -> str:
+    return json.dumps(public_entry(entry), sort_keys=True)
+
+
+def public_entry(entry: dict) -> dict:
+    """Entry without store bookkeeping (``_seq``), as written to manifest.json."""
+    return {k: v for k, v in entry.items() if k != "_seq"}
+
+
+class ManifestStore:
+    """Append-friendly manifest with O(1)-ish indexed lookups.
+
+    Entries are returned as plain dicts carrying a private ``_seq`` row id,
+    which update() uses and export_json() strips.
+    """
+
+    def __init__(self, db_path: Path, json_path: Path | None = None):
+        self.db_path = Path(db_path)
+        self.json_path = json_path
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        if json_path is not None:
+            self._sync_json(json_path)
+
+    @classmethod
+    def for_project(cls, project_root: Path) -> ManifestStore:
+        generated = project_root / "assets" / "generated"
+        return cls(generated / "manifest.sqlite", generated / "manifest.json")
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def __enter__(self) -> ManifestStore:
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def _meta(self) -> dict:
+        return dict(self.conn.execute("SELECT key, value FROM meta"))
+
+    def _set_meta(self, **values) -> None:
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+            [(key, str(value)) for key, value in values.items()],
+        )
+
+    def _max_seq(self) -> int:
+        return self.conn.execute("SELECT COALESCE(MAX(seq), 0) FROM entries").fetchone()[0]
+
+    def _json_current(self, json_path: Path, meta: dict) -> bool:
+        """True if manifest.json is what the store last imported or exported (stat only)."""
+        if "imported_json" not in meta:
+            return False
+        stamp = file_stamp(json_path)
+        return stamp is None or stamp == meta.get("json_stamp")
+
+    def _sync_json(self, json_path: Path) -> None:
+        """Import manifest.json into a new store, or merge it back in if it changed."""
+        if self._json_current(json_path, self._meta()):
+            return
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            meta = self._meta()  # another process may have synced meanwhile
+            if not self._json_current(json_path, meta):
+                stamp = file_stamp(json_path)
+                data = json_path.read_bytes() if stamp is not None else b""
+                digest = hashlib.sha256(data).hexdigest()
+                if "imported_json" not in meta:
+                    self._insert(parse_manifest(data))
+                    self._set_meta(imported_json=1, exported_seq=self._max_seq())
+                elif digest != meta.get("json_sha256"):
+                    self._merge_json(parse_manifest(data), int(meta.get("exported_seq", 0)))
+                self._set_meta(json_stamp=stamp or "", json_sha256=digest)
+            self.conn.execute("COMMIT")
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+
+    def _merge_json(self, json_entries: list, exported_seq: int) -> None:
+        """Rebuild the store as ``json_entries`` plus the changes manifest.json lacks.
+
+        Entries added after the last export are appended, unless manifest.json
+        already has them. Exported entries updated since (``unexported``)
+        replace their manifest.json counterpart, matched by entry_key(), and
+        stay unexported. Exported entries that have gone from manifest.json
+        were removed there on purpose, so they are dropped here too.
+        """
+        in_json = {canonical(e) for e in json_entries}
+        updated = {
+            entry_key(e): e
+            for e in self._rows(
+                self.conn.execute(
+                    "SELECT seq, data FROM entries WHERE seq <= ?"
+                    " AND seq IN (SELECT seq FROM unexported) ORDER BY seq",
+                    (exported_seq,),
+                )
+            )
+        }
+        added = [
+            e
+            for e in self._rows(
+                self.conn.execute(
+                    "SELECT seq, data FROM entries WHERE seq > ? ORDER BY seq", (exported_seq,)
+                )
+            )
+            if canonical(e) not in in_json
+        ]
+        merged = [updated.pop(entry_key(e), e) for e in json_entries]
+        self.conn.execute("DELETE FROM entries")
+        self.conn.execute("DELETE FROM unexported")
+        first = self._max_seq() + 1
+        self._insert(merged)
+        seqs = [
+            row[0]
+            for row in self.conn.execute(
+                "SELECT seq FROM entries WHERE seq >= ? ORDER BY seq", (first,)
+            )
+        ]
+        self.conn.executemany(
+            "INSERT INTO unexported (seq) VALUES (?)",
+            [(seq,) for seq, e in zip(seqs, merged) if "_seq" in e],
+        )
+        self._set_meta(exported_seq=self._max_seq())
+        self._insert(added)
+
+    def _insert(self, entries: list) -> None:
+        self.conn.executemany(
+            "INSERT INTO entries (type, id, filename, cache_key, data) VALUES (?, ?, ?, ?, ?)",
+            [
+                (
+                    e.get("type"),
+                    e.get("id"),
+                    e.get("filename") or Path(e.get("path", "")).name,
+                    e.get("cache_key"),
+                    json.dumps(public_entry(e)),
+                )
+                for e in entries
+            ],
+        )
+
+    @staticmethod
+    def _rows(cursor) -> list:
+        entries = []
+        for seq, data in cursor:
+            entry = json.loads(data)
+            entry["_seq"] = seq
+            entries.append(entry)
+        return entries
+
+    def append(self, entry: dict) -> None:
+        self.append_many([entry])
+
+    def append_many(self, entries: list) -> None:
+        """Insert all entries in one transaction."""
+        if not entries:
+            return
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            self._insert(entries)
+            self.conn.execute("COMMIT")
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+
+    def update(self, entry: dict, **fields) -> dict:
+        """Set ``fields`` on a stored entry (as returned by a lookup)."""
+        updated = {**public_entry(entry), **fields}
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            self.conn.execute(
+                "UPDATE entries SET data = ? WHERE seq = ?", (json.dumps(updated), entry["_seq"])
+            )
+            self.conn.execute("INSERT OR IGNORE INTO unexported (seq) VALUES (?)", (entry["_seq"],))
+            self.conn.execute("COMMIT")
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+        updated["_seq"] = entry["_seq"]
+        return updated
+
+    def find(self, asset_type: str, asset_id: str, filename: str | None = None) -> dict | None:
+        """Latest entry for type/id, restricted to ``filename`` when given."""
+        if filename is None:
+            cursor = self.conn.execute(
+                "SELECT seq, data FROM entries WHERE type = ? AND id = ? ORDER BY seq DESC LIMIT 1",
+                (asset_type, asset_id),
+            )
+        else:
+            cursor = self.conn.execute(
+                "SELECT seq, data FROM entries WHERE type = ? AND id = ? AND filename = ?"
+                " ORDER BY seq DESC LIMIT 1",
+                (asset_type, asset_id, filename),
+            )
+        rows = self._rows(cursor)
+        return rows[0] if rows else None
+
+    def with_filename(self, filename: str) -> list:
+        """Entries whose staged file is named ``filename``, oldest first."""
+        cursor = self.conn.execute(
+            "SELECT seq, data FROM entries WHERE filename = ? ORDER BY seq", (filename,)
+        )
+        return self._rows(cursor)
+
+    def with_cache_key(self, cache_key: str) -> list:
+        """Entries carrying ``cache_key``, oldest first."""
+        cursor = self.conn.execute(
+            "SELECT seq, data FROM entries WHERE cache_key = ? ORDER BY seq", (cache_key,)
+        )
+        return self._rows(cursor)
+
+    def of_types(self, asset_types: list) -> list:
+        """Entries of any of ``asset_types``, oldest first."""
+        marks = ", ".join("?" for _ in asset_types)
+        cursor = self.conn.execute(
+            f"SELECT seq, data FROM entries WHERE type IN ({marks}) ORDER BY seq", list(asset_types)
+        )
+        return self._rows(cursor)
+
+    def entries(self) -> list:
+        return self._rows(self.conn.execute("SELECT seq, data FROM entries ORDER BY seq"))
+
+    def __len__(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    def stale(self) -> bool:
+        """True if the store has changes manifest.json does not have yet."""
+        meta = self._meta()
+        if self._max_seq() > int(meta.get("exported_seq", 0)):
+            return True
+        return self.conn.execute("SELECT 1 FROM unexported LIMIT 1").fetchone() is not None
+
+    def export_if_stale(self) -> Path | None:
+        """export_json() to manifest.json unless it is already up to date."""
+        if self.json_path is None or not self.stale():
+            return None
+        return self.export_json()
+
+    def export_json(self, manifest_path: Path | None = None) -> Path:
+        """Write the classic manifest.json list (insertion order) atomically."""
+        manifest_path = manifest_path or self.json_path
+        if manifest_path is None:
+            raise ValueError("No manifest.json path to export to")
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            cursor = self.conn.execute("SELECT data FROM entries ORDER BY seq")
+            data = save_manifest_json(manifest_path, [json.loads(data) for (data,) in cursor])
+            if self.json_path is not None and Path(manifest_path) == Path(self.json_path):
+                self._set_meta(
+                    json_stamp=file_stamp(manifest_path),
+                    json_sha256=hashlib.sha256(data).hexdigest(),
+                    exported_seq=self._max_seq(),
+                )
+                self.conn.execute("DELETE FROM unexported")
+            self.conn.execute("COMMIT")
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+        return manifest_path
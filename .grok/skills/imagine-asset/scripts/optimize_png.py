@@ -0,0 +1,487 @@
+#!/usr/bin/env python3
+"""Shrink game PNGs: max-effort zlib, filter selection, optional palette, alpha bleed.
+
+Lossless by default. Each file is re-encoded several ways and the smallest
+wins; the original is only replaced when the result is smaller, decodes to
+the same RGBA pixels and keeps its color chunks (iCCP, sRGB, gAMA, cHRM,
+and a tRNS color key, which every candidate carries over):
+
+- Pillow's own encoder with ``optimize=True`` (zlib level 9)
+- custom zlib-9 encodings with explicit PNG row-filter selection. ``--effort``
+  picks how many: ``1`` per-row adaptive only, ``2`` (default) adaptive plus
+  the best whole-image filter by the same heuristic, ``3`` ranks every filter
+  (None/Sub/Up/Average/Paeth) and adaptive with a fast zlib-1 trial and
+  encodes only the best two, with a second zlib strategy (three encodes)
+
+PNGs deeper than 8 bits per channel (16-bit, and the I/F modes) are left
+alone: the custom encoder writes 8-bit only and the pixel check compares
+8-bit RGBA, so a re-encode could drop precision unnoticed.
+
+Options:
+
+- ``--alpha-bleed N`` copies edge colors N px into fully transparent pixels
+  (and zeroes the rest) so bilinear filtering does not pull in halos. Only
+  RGB under alpha 0 changes, so the image looks identical.
+- ``--quantize N`` converts to an N-color palette for flat-shaded icons,
+  accepted only if the mean per-channel error stays under
+  ``--max-error``. This is lossy.
+
+When the manifest store exists, optimized staging files (and their size
+variants) get their ``file_size_bytes`` updated and ``bytes_saved`` added.
+
+Usage:
+    python optimize_png.py [PATH ...] [--workers N] [--quantize N] [--alpha-bleed N]
+
+PATH defaults to the project's assets/ directory; directories are searched
+recursively for *.png.
+"""
+
+from __future__ import annotations
+
+import argparse
+import io
+import json
+import os
+import re
+import struct
+import sys
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from PIL import Image, PngImagePlugin
+
+try:
+    import numpy as np
+except ImportError:  # optional: only Pillow's encoder is tried, no alpha bleed
+    np = None
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+SKILL_DIR = SCRIPT_DIR.parent
+DEFAULT_PROJECT_ROOT = SKILL_DIR.parent.parent.parent  # .grok/skills/imagine-asset -> repo
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+# PNG color types for the modes the custom encoder handles
+COLOR_TYPES = {"L": 0, "RGB": 2, "LA": 4, "RGBA": 6}
+# Ancillary chunks that change how the pixels display; copied into every re-encode.
+COLOR_CHUNKS = (b"iCCP", b"sRGB", b"gAMA", b"cHRM")
+DEFAULT_EFFORT = 2
+# --effort 3: filter choices kept from the zlib-1 trial for the full zlib-9 encodes
+TRIAL_KEEP = 2
+# Modes optimize_file() can re-encode without losing precision (all 8 bits or less)
+SUPPORTED_MODES = ("1", "L", "LA", "P", "RGB", "RGBA")
+
+
+def _chunk(kind: bytes, data: bytes) -> bytes:
+    return (
+        struct.pack(">I", len(data))
+        + kind
+        + data
+        + struct.pack(">I", zlib.crc32(kind + data) & 0xFFFFFFFF)
+    )
+
+
+def png_chunks(data: bytes) -> list:
+    """[(type, payload)] for every chunk of a PNG file."""
+    chunks = []
+    pos = len(PNG_SIGNATURE)
+    while pos + 8 <= len(data):
+        length, kind = struct.unpack(">I4s", data[pos : pos + 8])
+        chunks.append((kind, data[pos + 8 : pos + 8 + length]))
+        pos += 12 + length
+    return chunks
+
+
+def color_chunks(data: bytes) -> list:
+    return [(kind, payload) for kind, payload in png_chunks(data) if kind in COLOR_CHUNKS]
+
+
+def bit_depth(data: bytes) -> int:
+    """Bits per channel from the IHDR of a PNG file."""
+    return data[24] if data[12:16] == b"IHDR" else 0
+
+
+def _trns_chunk(img: Image.Image) -> bytes:
+    """tRNS for an L/RGB color key in ``img.info``, or b""."""
+    key = img.info.get("transparency")
+    if key is None or img.mode not in ("L", "RGB"):
+        return b""
+    values = (key,) if img.mode == "L" else tuple(key)
+    return _chunk(b"tRNS", struct.pack(f">{len(values)}H", *values))
+
+
+def _filtered_variants(arr: "np.ndarray", bpp: int) -> list:
+    """All five PNG filters applied to every row. Returns [(type, filtered uint8 rows)]."""
+    x = arr.astype(np.int16)
+    left = np.zeros_like(x)
+    left[:, bpp:] = x[:, :-bpp]
+    up = np.zeros_like(x)
+    up[1:] = x[:-1]
+    up_left = np.zeros_like(x)
+    up_left[1:, bpp:] = x[:-1, :-bpp]
+
+    p = left + up - up_left
+    pa = np.abs(p - left)
+    pb = np.abs(p - up)
+    pc = np.abs(p - up_left)
+    paeth = np.where((pa <= pb) & (pa <= pc), left, np.where(pb <= pc, up, up_left))
+
+    return [
+        (0, arr),
+        (1, ((x - left) & 0xFF).astype(np.uint8)),
+        (2, ((x - up) & 0xFF).astype(np.uint8)),
+        (3, ((x - ((left + up) >> 1)) & 0xFF).astype(np.uint8)),
+        (4, ((x - paeth) & 0xFF).astype(np.uint8)),
+    ]
+
+
+def _scanlines(filtered: list, choice: "np.ndarray") -> bytes:
+    """Interleave a filter-type byte per row with that row's filtered bytes."""
+    stack = np.stack([rows for _, rows in filtered])
+    rows = stack[choice, np.arange(choice.size)]
+    return np.concatenate([choice.astype(np.uint8)[:, None], rows], axis=1).tobytes()
+
+
+def save_optimized(img: Image.Image, chunks: list = ()) -> bytes:
+    """Pillow's encoder at max effort, with ``chunks`` from color_chunks() kept.
+
+    Pillow writes iCCP (from ``img.info``) and tRNS itself; the rest go in
+    as pnginfo.
+    """
+    info = PngImagePlugin.PngInfo()
+    for kind, payload in chunks:
+        if kind != b"iCCP":
+            info.add(kind, payload)
+    out = io.BytesIO()
+    img.save(out, "PNG", optimize=True, pnginfo=info)
+    return out.getvalue()
+
+
+def encode_candidates(img: Image.Image, effort: int = DEFAULT_EFFORT, chunks: list = ()) -> list:
+    """PNG encodings of ``img`` as [(label, bytes)], all decoding to the same pixels.
+
+    ``chunks`` (see color_chunks()) are written into every encoding.
+    """
+    candidates = [("pillow-optimize", save_optimized(img, chunks))]
+    if np is None or img.mode not in COLOR_TYPES:
+        return candidates
+
+    w, h = img.size
+    bpp = len(img.getbands())
+    arr = np.asarray(img, dtype=np.uint8).reshape(h, w * bpp)
+    filtered = _filtered_variants(arr, bpp)
+    # libpng's adaptive heuristic: per row, minimum sum of absolute signed bytes
+    costs = np.stack(
+        [np.abs(rows.view(np.int8).astype(np.int32)).sum(axis=1) for _, rows in filtered]
+    )
+    choices = {"adaptive": costs.argmin(axis=0)}
+    if effort >= 3:
+        for filter_type, _ in filtered:
+            choices[f"filter{filter_type}"] = np.full(h, filter_type)
+    elif effort == 2:
+        filter_type = int(costs.sum(axis=1).argmin())
+        choices[f"filter{filter_type}"] = np.full(h, filter_type)
+    raws = {name: _scanlines(filtered, choice) for name, choice in choices.items()}
+    plan = [(name, zlib.Z_DEFAULT_STRATEGY) for name in raws]
+    if effort >= 3:
+        # A zlib-1 trial ranks the filters about as well as zlib-9 at a tenth of the
+        # cost. The best gets both strategies, the runners-up Z_FILTERED only.
+        ranked = sorted(raws, key=lambda name: len(zlib.compress(raws[name], 1)))
+        plan = [(ranked[0], zlib.Z_DEFAULT_STRATEGY)]
+        plan += [(name, zlib.Z_FILTERED) for name in ranked[:TRIAL_KEEP]]
+
+    header = (
+        PNG_SIGNATURE
+        + _chunk(b"IHDR", struct.pack(">IIBBBBB", w, h, 8, COLOR_TYPES[img.mode], 0, 0, 0))
+        + b"".join(_chunk(kind, payload) for kind, payload in chunks)
+        + _trns_chunk(img)
+    )
+    for name, strategy in plan:
+        compressor = zlib.compressobj(9, zlib.DEFLATED, 15, 9, strategy)
+        data = compressor.compress(raws[name]) + compressor.flush()
+        candidates.append(
+            (f"{name}/z{strategy}", header + _chunk(b"IDAT", data) + _chunk(b"IEND", b""))
+        )
+    return candidates
+
+
+def alpha_bleed(img: Image.Image, radius: int) -> Image.Image:
+    """Spread edge colors ``radius`` px into alpha-0 pixels; zero the RGB beyond that."""
+    arr = np.array(img.convert("RGBA"), dtype=np.uint8)
+    rgb = arr[..., :3].astype(np.float32)
+    known = arr[..., 3] > 0
+    if known.all() or not known.any():
+        return Image.fromarray(arr)
+    filled = rgb * known[..., None]
+    for _ in range(radius):
+        total = np.zeros_like(filled)
+        count = np.zeros(known.shape, dtype=np.float32)
+        for dy, dx in ((-1, 0), (1, 0), (0, -1), (0, 1), (-1, -1), (-1, 1), (1, -1), (1, 1)):
+            shifted_known = np.roll(known, (dy, dx), axis=(0, 1))
+            shifted_rgb = np.roll(filled, (dy, dx), axis=(0, 1))
+            # np.roll wraps; mask out the wrapped edge
+            if dy:
+                edge = 0 if dy > 0 else -1
+                shifted_known[edge, :] = False
+            if dx:
+                edge = 0 if dx > 0 else -1
+                shifted_known[:, edge] = False
+            total += shifted_rgb * shifted_known[..., None]
+            count += shifted_known
+        grow = ~known & (count > 0)
+        if not grow.any():
+            break
+        filled[grow] = total[grow] / count[grow][:, None]
+        known = known | grow
+    transparent = arr[..., 3] == 0
+    arr[..., :3][transparent] = np.rint(filled[transparent]).astype(np.uint8)
+    return Image.fromarray(arr)
+
+
+def quantize(img: Image.Image, colors: int, max_error: float) -> Image.Image | None:
+    """Palette version of ``img`` if its mean per-channel error is <= max_error."""
+    rgba = img.convert("RGBA")
+    pal = rgba.quantize(colors=colors, method=Image.Quantize.FASTOCTREE, dither=Image.Dither.NONE)
+    back = pal.convert("RGBA")
+    if np is not None:
+        err = np.abs(np.asarray(back, dtype=np.int16) - np.asarray(rgba, dtype=np.int16)).mean()
+    else:
+        diff = [abs(a - b) for a, b in zip(back.tobytes(), rgba.tobytes())]
+        err = sum(diff) / max(1, len(diff))
+    return pal if err <= max_error else None
+
+
+def same_pixels(a: bytes, b: bytes, visible_only: bool = False) -> bool:
+    """Whether two PNGs decode to the same RGBA pixels.
+
+    ``visible_only`` ignores RGB under alpha 0 (what alpha bleed rewrites).
+    """
+    with Image.open(io.BytesIO(a)) as img_a, Image.open(io.BytesIO(b)) as img_b:
+        if img_a.size != img_b.size:
+            return False
+        rgba_a = img_a.convert("RGBA")
+        rgba_b = img_b.convert("RGBA")
+    if not visible_only:
+        return rgba_a.tobytes() == rgba_b.tobytes()
+    if np is None:
+        return rgba_a.getchannel("A").tobytes() == rgba_b.getchannel("A").tobytes()
+    arr_a = np.asarray(rgba_a)
+    arr_b = np.asarray(rgba_b)
+    visible = arr_a[..., 3] > 0
+    return bool((arr_a[..., 3] == arr_b[..., 3]).all() and (arr_a[visible] == arr_b[visible]).all())
+
+
+def optimize_file(
+    path: Path,
+    quantize_colors: int = 0,
+    max_error: float = 3.0,
+    bleed_radius: int = 0,
+    effort: int = DEFAULT_EFFORT,
+    dry_run: bool = False,
+) -> dict:
+    """Re-encode ``path`` in place if that makes it smaller. Returns a result dict."""
+    start = time.perf_counter()
+    path = Path(path)
+    original = path.read_bytes()
+    chunks = color_chunks(original)
+    with Image.open(io.BytesIO(original)) as src:
+        img = src.copy()
+    if img.mode not in SUPPORTED_MODES or bit_depth(original) > 8:
+        return {
+            "path": str(path),
+            "original_bytes": len(original),
+            "file_size_bytes": len(original),
+            "bytes_saved": 0,
+            "method": "original",
+            "lossy": False,
+            "skipped": f"{img.mode}, {bit_depth(original)}-bit",
+            "seconds": round(time.perf_counter() - start, 4),
+        }
+    if img.mode == "P" and "transparency" in img.info:
+        img = img.convert("RGBA")
+    elif img.mode not in COLOR_TYPES and img.mode != "P":
+        img = img.convert("RGBA")
+
+    lossy = None
+    if bleed_radius and np is not None and img.mode in ("RGBA", "LA"):
+        img = alpha_bleed(img, bleed_radius)
+    candidates = encode_candidates(img, effort, chunks)
+    if quantize_colors:
+        pal = quantize(img, quantize_colors, max_error)
+        if pal is not None:
+            candidates.append((f"palette{quantize_colors}", save_optimized(pal, chunks)))
+            lossy = f"palette{quantize_colors}"
+
+    # Smallest candidate that really is lossless (bar an accepted palette).
+    method, best = "original", original
+    for label, data in sorted(candidates, key=lambda c: len(c[1])):
+        if len(data) >= len(original):
+            break
+        kept = {kind for kind, _ in color_chunks(data)} >= {kind for kind, _ in chunks}
+        if kept and (label == lossy or same_pixels(original, data, bool(bleed_radius))):
+            method, best = label, data
+            break
+    saved = len(original) - len(best)
+    if saved > 0 and not dry_run:
+        tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        tmp_path.write_bytes(best)
+        os.replace(tmp_path, path)
+    return {
+        "path": str(path),
+        "original_bytes": len(original),
+        "file_size_bytes": len(best) if saved > 0 else len(original),
+        "bytes_saved": max(saved, 0),
+        "method": method if saved > 0 else "original",
+        "lossy": saved > 0 and method == lossy,
+        "seconds": round(time.perf_counter() - start, 4),
+    }
+
+
+def _optimize_job(job: tuple) -> dict:
+    path, options = job
+    try:
+        return optimize_file(Path(path), **options)
+    except Exception as e:  # reported per file; the rest of the run continues
+        return {"path": str(path), "error": f"{type(e).__name__}: {e}", "bytes_saved": 0}
+
+
+def collect_pngs(paths: list) -> list[Path]:
+    found = []
+    for path in paths:
+        path = Path(path)
+        if path.is_dir():
+            found.extend(p for p in sorted(path.rglob("*.png")) if ".godot" not in p.parts)
+        elif path.suffix.lower() == ".png" and path.is_file():
+            found.append(path)
+    return found
+
+
+def optimize_files(paths: list, workers: int | None = None, **options) -> list:
+    """Optimize many PNGs on a process pool. Results come back in input order."""
+    jobs = [(str(p), options) for p in paths]
+    workers = max(1, min(workers or os.cpu_count() or 1, len(jobs) or 1))
+    if workers == 1:
+        return [_optimize_job(job) for job in jobs]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(_optimize_job, jobs, chunksize=4))
+
+
+def record_in_manifest(project_root: Path, results: list) -> int:
+    """Update file_size_bytes/bytes_saved for staged files the manifest knows. Returns count."""
+    db_path = project_root / "assets" / "generated" / "manifest.sqlite"
+    if not db_path.exists():
+        return 0
+    from manifest_store import ManifestStore
+
+    updated = 0
+    with ManifestStore.for_project(project_root) as store:
+        for result in results:
+            if not result.get("bytes_saved"):
+                continue
+            path = str(Path(result["path"]).resolve())
+            name = Path(path).name
+            fields = {"file_size_bytes": result["file_size_bytes"]}
+            for entry in store.with_filename(name):
+                if str(Path(entry.get("path", "")).resolve()) == path:
+                    saved = entry.get("bytes_saved", 0) + result["bytes_saved"]
+                    store.update(entry, bytes_saved=saved, **fields)
+                    updated += 1
+            primary = re.sub(r"_\d+x\d+(\.png)$", r"\1", name)
+            if primary == name:
+                continue
+            for entry in store.with_filename(primary):
+                variants = entry.get("variants", [])
+                for record in variants:
+                    if str(Path(record.get("path", "")).resolve()) == path:
+                        record["bytes_saved"] = record.get("bytes_saved", 0) + result["bytes_saved"]
+                        record.update(fields)
+                        store.update(entry, variants=variants)
+                        updated += 1
+        store.export_if_stale()
+    return updated
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Optimize PNG size for game assets")
+    parser.add_argument("paths", nargs="*", help="PNG files or directories (default: assets/)")
+    parser.add_argument("--project-root", default=str(DEFAULT_PROJECT_ROOT))
+    parser.add_argument("--workers", type=int, default=None, help="Process pool size")
+    parser.add_argument(
+        "--quantize",
+        type=int,
+        default=0,
+        metavar="N",
+        help="Try an N-color palette (lossy; for flat-shaded icons)",
+    )
+    parser.add_argument(
+        "--max-error",
+        type=float,
+        default=3.0,
+        help="Max mean per-channel error accepted from --quantize (default 3.0)",
+    )
+    parser.add_argument(
+        "--alpha-bleed",
+        type=int,
+        default=0,
+        metavar="N",
+        help="Bleed edge colors N px into transparent pixels to avoid halos",
+    )
+    parser.add_argument(
+        "--effort",
+        type=int,
+        choices=[1, 2, 3],
+        default=DEFAULT_EFFORT,
+        help="Encoder trials per file: 1 fast, 2 default, 3 most",
+    )
+    parser.add_argument("--dry-run", action="store_true", help="Report savings without writing")
+    args = parser.parse_args()
+
+    project_root = Path(args.project_root).resolve()
+    paths = collect_pngs(args.paths or [project_root / "assets"])
+    if not paths:
+        raise SystemExit("No PNG files found")
+
+    start = time.perf_counter()
+    results = optimize_files(
+        paths,
+        workers=args.workers,
+        quantize_colors=args.quantize,
+        max_error=args.max_error,
+        bleed_radius=args.alpha_bleed,
+        effort=args.effort,
+        dry_run=args.dry_run,
+    )
+    wall = time.perf_counter() - start
+    for r in results:
+        if "error" in r:
+            print(f"  {r['path']}: FAILED ({r['error']})")
+        elif "skipped" in r:
+            print(f"  {r['path']}: skipped ({r['skipped']} is kept as is)")
+        elif r["bytes_saved"]:
+            pct = 100.0 * r["bytes_saved"] / r["original_bytes"]
+            print(f"  {r['path']}: -{r['bytes_saved']} bytes ({pct:.1f}%, {r['method']})")
+    updated = 0 if args.dry_run else record_in_manifest(project_root, results)
+
+    original = sum(r.get("original_bytes", 0) for r in results)
+    saved = sum(r["bytes_saved"] for r in results)
+    summary = {
+        "files": len(results),
+        "optimized": sum(1 for r in results if r["bytes_saved"]),
+        "failed": sum(1 for r in results if "error" in r),
+        "skipped": sum(1 for r in results if "skipped" in r),
+        "original_bytes": original,
+        "bytes_saved": saved,
+        "percent_saved": round(100.0 * saved / original, 2) if original else 0.0,
+        "manifest_entries_updated": updated,
+        "wall_seconds": round(wall, 3),
+        "dry_run": args.dry_run,
+    }
+    print("=== OPTIMIZE_RESULT ===")
+    print(json.dumps(summary, indent=2))
+    if summary["failed"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
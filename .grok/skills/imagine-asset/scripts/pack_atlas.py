@@ -0,0 +1,495 @@
+#!/usr/bin/env python3
+"""Pack promoted icons into power-of-two texture atlases for Godot.
+
+Atlases are declared in ``atlases.json`` next to ``asset-types.json``: each
+one packs the promoted assets of its ``types`` (from the manifest store) plus
+any ``include`` paths/globs, minus ``exclude`` globs (e.g. the ``_WxH``
+size variants promoted next to each icon). Rectangles are placed with MaxRects
+(best-short-side-fit) into the smallest power-of-two page that holds them,
+spilling into further pages at ``max_size``.
+
+Per atlas the packer writes, under ``output_dir``:
+
+- ``<name>_<page>.png`` — the atlas pages, each with its Godot ``.import``
+  (godot_import.py) using the settings of the atlas's ``import_type`` from
+  asset-types.json (default "ui")
+- ``<name>.json`` — sidecar with page sizes and region rects per source
+- ``<name>/<region>.tres`` — one AtlasTexture per region, usable anywhere a
+  Texture2D is (TextureRect, NinePatchRect, Button icons)
+
+Repacks are incremental: unchanged sources keep their rects, a changed source
+of the same size is blitted into its old rect, and new/resized sources go into
+free space on existing pages. When that runs out the last page grows (by
+powers of two, up to ``max_size``) with its rects in place; if even that is
+not enough, the atlas is repacked from scratch rather than gaining a page
+per promotion. Only touched pages are rewritten. ``--full`` discards the
+previous layout.
+
+Usage:
+    python pack_atlas.py [--atlas NAME] [--full] [--no-import] [--project-root DIR]
+"""
+
+from __future__ import annotations
+
+import argparse
+import glob
+import hashlib
+from fnmatch import fnmatchcase
+import json
+import re
+from pathlib import Path
+
+from godot_import import load_type_config, write_import
+from manifest_store import ManifestStore, save_manifest_json
+from PIL import Image
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+SKILL_DIR = SCRIPT_DIR.parent
+DEFAULT_PROJECT_ROOT = SKILL_DIR.parent.parent.parent  # .grok/skills/imagine-asset -> repo
+SIDECAR_VERSION = 1
+
+
+def load_atlas_configs() -> dict:
+    config_path = SKILL_DIR / "atlases.json"
+    if not config_path.exists():
+        return {}
+    with open(config_path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def atlases_for_type(asset_type: str) -> list[str]:
+    return [
+        name for name, cfg in load_atlas_configs().items() if asset_type in cfg.get("types", [])
+    ]
+
+
+class MaxRectsBin:
+    """MaxRects free-space tracker for one page (Jukka Jylänki, 2010)."""
+
+    def __init__(self, width: int, height: int):
+        self.width = width
+        self.height = height
+        self.free = [(0, 0, width, height)]
+
+    def find(self, w: int, h: int) -> tuple[int, int] | None:
+        """Best-short-side-fit position for a w x h rect, or None."""
+        best = None
+        best_score = None
+        for fx, fy, fw, fh in self.free:
+            if w <= fw and h <= fh:
+                score = (min(fw - w, fh - h), max(fw - w, fh - h))
+                if best_score is None or score < best_score:
+                    best, best_score = (fx, fy), score
+        return best
+
+    def occupy(self, x: int, y: int, w: int, h: int) -> None:
+        """Remove x, y, w, h from the free list, splitting what it overlaps."""
+        split = []
+        for fx, fy, fw, fh in self.free:
+            if x >= fx + fw or x + w <= fx or y >= fy + fh or y + h <= fy:
+                split.append((fx, fy, fw, fh))
+                continue
+            if x > fx:
+                split.append((fx, fy, x - fx, fh))
+            if x + w < fx + fw:
+                split.append((x + w, fy, fx + fw - x - w, fh))
+            if y > fy:
+                split.append((fx, fy, fw, y - fy))
+            if y + h < fy + fh:
+                split.append((fx, y + h, fw, fy + fh - y - h))
+        self.free = [
+            r
+            for i, r in enumerate(split)
+            if not any(
+                i != j and _contains(o, r) and (o != r or j < i) for j, o in enumerate(split)
+            )
+        ]
+
+    def insert(self, w: int, h: int) -> tuple[int, int] | None:
+        pos = self.find(w, h)
+        if pos is not None:
+            self.occupy(pos[0], pos[1], w, h)
+        return pos
+
+
+def _contains(outer: tuple, inner: tuple) -> bool:
+    ox, oy, ow, oh = outer
+    ix, iy, iw, ih = inner
+    return ix >= ox and iy >= oy and ix + iw <= ox + ow and iy + ih <= oy + oh
+
+
+def _pot(n: int) -> int:
+    return 1 << max(0, (n - 1).bit_length())
+
+
+def _page_sizes(min_side: int, max_size: int):
+    """Candidate POT page sizes, smallest area first (square before 2:1)."""
+    side = _pot(min_side)
+    while side <= max_size:
+        yield side, side
+        if side * 2 <= max_size:
+            yield side * 2, side
+        side *= 2
+
+
+def pack_pages(sizes: dict, max_size: int, padding: int) -> tuple[list, dict]:
+    """Pack {key: (w, h)} into POT pages. Returns (page sizes, {key: (page, x, y)})."""
+    order = sorted(sizes, key=lambda k: (-max(sizes[k]), -sizes[k][0] * sizes[k][1], k))
+    for key in order:
+        w, h = sizes[key]
+        if w + padding > max_size or h + padding > max_size:
+            raise SystemExit(f"{key} ({w}x{h}) does not fit a {max_size}px atlas page")
+    pages = []
+    placed = {}
+    remaining = order
+    while remaining:
+        area = sum((sizes[k][0] + padding) * (sizes[k][1] + padding) for k in remaining)
+        min_side = max(max(max(sizes[k]) + padding for k in remaining), int(area**0.5))
+        page_w = page_h = max_size
+        page_placed = {}
+        for page_w, page_h in _page_sizes(min(min_side, max_size), max_size):
+            bin_ = MaxRectsBin(page_w, page_h)
+            page_placed = {}
+            for key in remaining:
+                pos = bin_.insert(sizes[key][0] + padding, sizes[key][1] + padding)
+                if pos is not None:
+                    page_placed[key] = pos
+            if len(page_placed) == len(remaining):
+                break
+        page = len(pages)
+        pages.append([page_w, page_h])
+        for key, (x, y) in page_placed.items():
+            placed[key] = (page, x, y)
+        remaining = [k for k in remaining if k not in page_placed]
+    return pages, placed
+
+
+def grow_page(
+    page_size: list,
+    regions: dict,
+    page: int,
+    unplaced: list,
+    sizes: dict,
+    max_size: int,
+    padding: int,
+) -> tuple[list, dict] | None:
+    """Smallest larger POT size of ``page`` that also fits every ``unplaced`` source.
+
+    The page's current regions keep their rects. Returns (new size,
+    {res: (x, y)}) or None if even ``max_size`` is not enough.
+    """
+    width, height = page_size
+    for grown in _page_sizes(max(width, height), max_size):
+        if grown[0] < width or grown[1] < height or list(grown) == [width, height]:
+            continue
+        bin_ = MaxRectsBin(*grown)
+        for region in regions.values():
+            if region["page"] == page:
+                x, y, w, h = region["rect"]
+                bin_.occupy(x, y, w + padding, h + padding)
+        positions = {}
+        for res in sorted(unplaced, key=lambda r: (-max(sizes[r]), r)):
+            pos = bin_.insert(sizes[res][0] + padding, sizes[res][1] + padding)
+            if pos is None:
+                break
+            positions[res] = pos
+        if len(positions) == len(unplaced):
+            return list(grown), positions
+    return None
+
+
+def file_digest(path: Path) -> str:
+    return hashlib.sha256(path.read_bytes()).hexdigest()
+
+
+def collect_sources(project_root: Path, cfg: dict) -> list[Path]:
+    """Promoted assets of the atlas types plus ``include`` paths/globs, de-duplicated.
+
+    Paths matching an ``exclude`` glob (relative to the project) are left out.
+    """
+    sources = {}
+    types = cfg.get("types", [])
+    if types:
+        with ManifestStore.for_project(project_root) as store:
+            for entry in store.of_types(types):
+                if entry.get("promoted") and entry.get("promoted_to"):
+                    path = project_root / entry["promoted_to"]
+                    if path.is_file():
+                        sources[path.resolve()] = None
+    for pattern in cfg.get("include", []):
+        for match in sorted(glob.glob(str(project_root / pattern))):
+            if match.lower().endswith(".png"):
+                sources[Path(match).resolve()] = None
+    output_dir = (project_root / cfg.get("output_dir", "assets/atlases")).resolve()
+    excludes = cfg.get("exclude", [])
+    root = project_root.resolve()
+    return [
+        p
+        for p in sources
+        if output_dir not in p.parents
+        and not any(fnmatchcase(p.relative_to(root).as_posix(), pat) for pat in excludes)
+    ]
+
+
+def res_path(project_root: Path, path: Path) -> str:
+    return "res://" + str(path.resolve().relative_to(project_root.resolve())).replace("\\", "/")
+
+
+def region_name(res: str) -> str:
+    """res://assets/items/sword.png -> items_sword"""
+    rel = res[len("res://") :]
+    rel = re.sub(r"^assets/", "", rel)
+    return re.sub(r"[^A-Za-z0-9_]+", "_", rel.rsplit(".", 1)[0]).strip("_")
+
+
+def atlas_texture_tres(page_res: str, rect: list) -> str:
+    x, y, w, h = rect
+    return (
+        '[gd_resource type="AtlasTexture" load_steps=2 format=3]\n\n'
+        f'[ext_resource type="Texture2D" path="{page_res}" id="1_atlas"]\n\n'
+        "[resource]\n"
+        'atlas = ExtResource("1_atlas")\n'
+        f"region = Rect2({x}, {y}, {w}, {h})\n"
+    )
+
+
+def _write_if_changed(path: Path, text: str) -> bool:
+    if path.exists() and path.read_text(encoding="utf-8") == text:
+        return False
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text, encoding="utf-8")
+    return True
+
+
+def pack_atlas(
+    project_root: Path, name: str, cfg: dict, full: bool = False, imports: bool = True
+) -> dict:
+    """Pack one atlas, incrementally unless ``full``. Returns a summary dict.
+
+    With ``imports`` every page written, and any page still missing its
+    ``.import``, gets one (write_import).
+    """
+    max_size = int(cfg.get("max_size", 2048))
+    padding = int(cfg.get("padding", 2))
+    output_dir = project_root / cfg.get("output_dir", "assets/atlases")
+    sidecar_path = output_dir / f"{name}.json"
+
+    current = {}
+    for path in collect_sources(project_root, cfg):
+        current[res_path(project_root, path)] = path
+
+    previous = {}
+    pages = []
+    if not full and sidecar_path.exists():
+        with open(sidecar_path, encoding="utf-8") as f:
+            sidecar = json.load(f)
+        if (
+            sidecar.get("version") == SIDECAR_VERSION
+            and sidecar.get("padding") == padding
+            and sidecar.get("max_size") == max_size
+        ):
+            previous = sidecar.get("regions", {})
+            pages = [list(p["size"]) for p in sidecar.get("pages", [])]
+
+    digests = {res: file_digest(path) for res, path in current.items()}
+    sizes = {}
+    regions = {}
+    dirty_pages = set()
+    changed = []
+    unplaced = []
+    for res, path in current.items():
+        old = previous.get(res)
+        if old is not None and old["sha256"] == digests[res]:
+            regions[res] = old
+            continue
+        with Image.open(path) as img:
+            sizes[res] = img.size
+        if old is not None and tuple(old["rect"][2:]) == sizes[res]:
+            regions[res] = {**old, "sha256": digests[res]}
+            dirty_pages.add(old["page"])
+            changed.append(res)
+        else:
+            unplaced.append(res)
+    removed = [res for res in previous if res not in current]
+    moved = [res for res in unplaced if res in previous]
+    for res in removed + moved:
+        dirty_pages.add(previous[res]["page"])
+    # Existing page files can be patched; pages added below are drawn fresh.
+    reusable_pages = len(pages)
+
+    # Place new/resized sources into the free space left on existing pages.
+    if unplaced and pages:
+        bins = [MaxRectsBin(w, h) for w, h in pages]
+        for region in regions.values():
+            x, y, w, h = region["rect"]
+            bins[region["page"]].occupy(x, y, w + padding, h + padding)
+        for res in sorted(unplaced, key=lambda r: (-max(sizes[r]), r)):
+            w, h = sizes[res]
+            for page, bin_ in enumerate(bins):
+                pos = bin_.insert(w + padding, h + padding)
+                if pos is not None:
+                    regions[res] = {"page": page, "rect": [pos[0], pos[1], w, h]}
+                    regions[res]["sha256"] = digests[res]
+                    dirty_pages.add(page)
+                    changed.append(res)
+                    break
+        unplaced = [res for res in unplaced if res not in regions]
+
+    # Then grow the last page; its rects are anchored top-left, so they stay put.
+    if unplaced and pages:
+        last = len(pages) - 1
+        placed = grow_page(pages[last], regions, last, unplaced, sizes, max_size, padding)
+        if placed is not None:
+            pages[last], positions = placed
+            for res, (x, y) in positions.items():
+                w, h = sizes[res]
+                regions[res] = {"page": last, "rect": [x, y, w, h], "sha256": digests[res]}
+                changed.append(res)
+            dirty_pages.add(last)
+            unplaced = []
+
+    if unplaced:
+        # Fresh layout (first pack, or no room left): pack everything at once
+        # for the tightest pages instead of adding a page per new source.
+        for res, path in current.items():
+            if res not in sizes:
+                with Image.open(path) as img:
+                    sizes[res] = img.size
+        page_sizes, placed = pack_pages(sizes, max_size, padding)
+        regions = {}
+        pages = page_sizes
+        reusable_pages = 0
+        changed = list(current)
+        dirty_pages = set()
+        for res, (page, x, y) in placed.items():
+            w, h = sizes[res]
+            regions[res] = {"page": page, "rect": [x, y, w, h], "sha256": digests[res]}
+            dirty_pages.add(page)
+
+    # Drop trailing pages left empty by removals.
+    used = {region["page"] for region in regions.values()}
+    while pages and len(pages) - 1 not in used:
+        pages.pop()
+        dirty_pages.discard(len(pages))
+
+    output_dir.mkdir(parents=True, exist_ok=True)
+    for page in sorted(dirty_pages):
+        page_path = output_dir / f"{name}_{page}.png"
+        canvas = None
+        if page < reusable_pages and page_path.exists():
+            canvas = Image.open(page_path).convert("RGBA")
+            if canvas.size != tuple(pages[page]):
+                canvas = None
+        if canvas is None:
+            canvas = Image.new("RGBA", tuple(pages[page]), (0, 0, 0, 0))
+            redraw = [r for r, reg in regions.items() if reg["page"] == page]
+        else:
+            # Patch in place: clear vacated rects, then paste changed sources.
+            for res in removed + moved:
+                x, y, w, h = previous[res]["rect"]
+                if previous[res]["page"] == page:
+                    canvas.paste((0, 0, 0, 0), (x, y, x + w, y + h))
+            redraw = [r for r in changed if regions[r]["page"] == page]
+        for res in redraw:
+            x, y = regions[res]["rect"][:2]
+            with Image.open(current[res]) as img:
+                canvas.paste(img.convert("RGBA"), (x, y))
+        canvas.save(page_path, "PNG")
+    for stale in output_dir.glob(f"{name}_*.png"):
+        match = re.fullmatch(rf"{re.escape(name)}_(\d+)\.png", stale.name)
+        if match and int(match.group(1)) >= len(pages):
+            stale.unlink()
+            stale.with_name(stale.name + ".import").unlink(missing_ok=True)
+
+    import_counts: dict[str, int] = {}
+    if imports:
+        type_cfg = load_type_config(cfg.get("import_type", "ui"))
+        for page in range(len(pages)):
+            page_path = output_dir / f"{name}_{page}.png"
+            if page in dirty_pages or not page_path.with_name(page_path.name + ".import").exists():
+                status = write_import(project_root, page_path, type_cfg)
+                import_counts[status] = import_counts.get(status, 0) + 1
+
+    tres_dir = output_dir / name
+    wanted = set()
+    for res, region in regions.items():
+        page_res = res_path(project_root, output_dir / f"{name}_{region['page']}.png")
+        region["tres"] = res_path(project_root, tres_dir / f"{region_name(res)}.tres")
+        wanted.add(region["tres"])
+        _write_if_changed(
+            tres_dir / f"{region_name(res)}.tres", atlas_texture_tres(page_res, region["rect"])
+        )
+    if tres_dir.exists():
+        for tres in tres_dir.glob("*.tres"):
+            if res_path(project_root, tres) not in wanted:
+                tres.unlink()
+
+    sidecar = {
+        "version": SIDECAR_VERSION,
+        "name": name,
+        "padding": padding,
+        "max_size": max_size,
+        "pages": [
+            {"image": res_path(project_root, output_dir / f"{name}_{i}.png"), "size": size}
+            for i, size in enumerate(pages)
+        ],
+        "regions": dict(sorted(regions.items())),
+    }
+    save_manifest_json(sidecar_path, sidecar)
+    return {
+        "atlas": name,
+        "pages": len(pages),
+        "regions": len(regions),
+        "changed": len(changed),
+        "removed": len(removed),
+        "pages_written": len(dirty_pages),
+        "imports": import_counts,
+        "sidecar": str(sidecar_path),
+    }
+
+
+def pack_atlases(
+    project_root: Path, names: list | None = None, full: bool = False, imports: bool = True
+) -> list:
+    configs = load_atlas_configs()
+    if names:
+        unknown = [n for n in names if n not in configs]
+        if unknown:
+            raise SystemExit(f"Unknown atlas {', '.join(unknown)}. Valid: {', '.join(configs)}")
+    results = []
+    for name, cfg in configs.items():
+        if names and name not in names:
+            continue
+        result = pack_atlas(project_root, name, cfg, full=full, imports=imports)
+        print(
+            f"Atlas {name}: {result['regions']} region(s) on {result['pages']} page(s), "
+            f"{result['changed']} changed, {result['pages_written']} page(s) written"
+            + (f", .import {json.dumps(result['imports'])}" if result["imports"] else "")
+        )
+        results.append(result)
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Pack promoted icons into texture atlases")
+    parser.add_argument("--project-root", default=str(DEFAULT_PROJECT_ROOT))
+    parser.add_argument(
+        "--atlas", action="append", help="Atlas name from atlases.json (repeatable)"
+    )
+    parser.add_argument(
+        "--full", action="store_true", help="Discard the previous layout and repack"
+    )
+    parser.add_argument(
+        "--no-import", action="store_true", help="Do not write Godot .import files for the pages"
+    )
+    args = parser.parse_args()
+
+    results = pack_atlases(
+        Path(args.project_root).resolve(), args.atlas, full=args.full, imports=not args.no_import
+    )
+    print("=== ATLAS_RESULT ===")
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,27 +1,71 @@
 #!/usr/bin/env python3
-"""Post-process Grok Imagine outputs for game assets: resize, chroma-key, promote."""
+"""Post-process Grok Imagine outputs for game assets: resize, chroma-key, promote.
+
+When asset_worker.py is serving, the CLI runs inside the worker (warm
+imports, type configs and rembg sessions); pass --no-worker to run here.
+"""
 
 from __future__ import annotations
 
 import argparse
+import glob
+import hashlib
 import json
+import os
 import re
 import shutil
 import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from datetime import datetime, timezone
 from pathlib import Path
 
+if __name__ == "__main__":
+    # Hand the job to a running asset_worker.py before importing anything heavy.
+    from asset_worker import forward_to_worker
+
+    _exit_code = forward_to_worker("process_asset", sys.argv[1:])
+    if _exit_code is not None:
+        sys.exit(_exit_code)
+
+from godot_import import write_imports
+from manifest_store import ManifestStore, public_entry
+from optimize_png import optimize_file
+from pack_atlas import atlases_for_type, pack_atlases
 from PIL import Image
+from remove_background import DEFAULT_MODEL as DEFAULT_REMBG_MODEL
+from remove_background import available_memory_bytes, peak_rss_bytes, reset_peak_rss
+
+try:
+    import numpy as np
+except ImportError:  # optional: chroma_key falls back to the per-pixel loop
+    np = None
 
 SCRIPT_DIR = Path(__file__).resolve().parent
 SKILL_DIR = SCRIPT_DIR.parent
 DEFAULT_PROJECT_ROOT = SKILL_DIR.parent.parent.parent  # .grok/skills/imagine-asset -> repo
+# Bump when render_asset() output changes so cached staging files are not reused.
+CACHE_VERSION = 1
+# --stream: decode at no less than this multiple of the output size.
+STREAM_REDUCING_GAP = 3
+
+_type_configs: tuple[int, dict] | None = None  # (mtime_ns, parsed asset-types.json)
 
 
-def load_type_config(project_root: Path, asset_type: str) -> dict:
+def load_type_configs() -> dict:
+    """Parsed asset-types.json, re-read only when the file changes."""
+    global _type_configs
     config_path = SKILL_DIR / "asset-types.json"
-    with open(config_path, encoding="utf-8") as f:
-        types = json.load(f)
+    mtime = config_path.stat().st_mtime_ns
+    if _type_configs is None or _type_configs[0] != mtime:
+        with open(config_path, encoding="utf-8") as f:
+            _type_configs = (mtime, json.load(f))
+    return _type_configs[1]
+
+
+def load_type_config(project_root: Path, asset_type: str, types: dict | None = None) -> dict:
+    if types is None:
+        types = load_type_configs()
     if asset_type not in types:
         raise SystemExit(f"Unknown type '{asset_type}'. Valid: {', '.join(types)}")
     return types[asset_type]
@@ -35,9 +79,11 @@ def parse_chroma(hex_str: str) -> tuple[int, int, int]:
 
 
 def sample_corner_chroma(img: Image.Image) -> tuple[int, int, int]:
-    """Average corner samples — Imagine often uses a flat non-pure chroma plate."""
-    rgb = img.convert("RGB")
-    w, h = rgb.size
+    """Average corner samples — Imagine often uses a flat non-pure chroma plate.
+
+    Each sample is converted on its own, so a large plate is never copied.
+    """
+    w, h = img.size
     points = [
         (0, 0),
         (w - 1, 0),
@@ -49,8 +95,8 @@ def sample_corner_chroma(img: Image.Image) -> tuple[int, int, int]:
         (w // 2, h - 1),
     ]
     rs, gs, bs = 0, 0, 0
-    for p in points:
-        r, g, b = rgb.getpixel(p)
+    for x, y in points:
+        r, g, b = img.crop((x, y, x + 1, y + 1)).convert("RGB").getpixel((0, 0))
         rs += r
         gs += g
         bs += b
@@ -64,7 +110,23 @@ def chroma_key(
     tolerance: int = 48,
     soft: int = 24,
 ) -> Image.Image:
-    """Remove near-key colors to alpha. Soft edge over soft range beyond tolerance."""
+    """Remove near-key colors to alpha. Soft edge over soft range beyond tolerance.
+
+    Uses the whole-array NumPy path when NumPy is installed; output is
+    pixel-identical to chroma_key_reference().
+    """
+    if np is None:
+        return chroma_key_reference(img, key, tolerance=tolerance, soft=soft)
+    return chroma_key_array(img, key, tolerance=tolerance, soft=soft)
+
+
+def chroma_key_reference(
+    img: Image.Image,
+    key: tuple[int, int, int],
+    tolerance: int = 48,
+    soft: int = 24,
+) -> Image.Image:
+    """Per-pixel chroma key. Slow; kept as the semantic reference."""
     rgba = img.convert("RGBA")
     pixels = rgba.load()
     w, h = rgba.size
@@ -84,105 +146,805 @@ def chroma_key(
     return rgba
 
 
-def next_staging_path(staging_dir: Path, prefix: str, asset_id: str) -> Path:
+def _distance_table(tolerance: float, soft: int) -> "np.ndarray":
+    """Distance for every squared distance that can land inside tolerance + soft.
+
+    Squared RGB distances are integers in [0, 3 * 255**2], so the distances
+    that matter are computed once with the same ``** 0.5`` the reference uses.
+    That keeps the band thresholds and the alpha ramp bit-for-bit identical.
+    """
+    reach = tolerance + max(soft, 0)
+    if reach < 0:
+        return np.empty(0, dtype=np.float64)
+    limit = min(int(reach * reach) + 1, 3 * 255 * 255 + 1)
+    return np.array([d2**0.5 for d2 in range(limit)], dtype=np.float64)
+
+
+def chroma_key_array(
+    img: Image.Image,
+    key: tuple[int, int, int],
+    tolerance: int = 48,
+    soft: int = 24,
+) -> Image.Image:
+    """Whole-image chroma key: distance mask and soft alpha ramp as array ops."""
+    rgba = img.convert("RGBA")
+    arr = np.array(rgba, dtype=np.uint8)
+    rgb = arr[..., :3].astype(np.int32)
+    rgb -= np.array(key, dtype=np.int32)
+    d2 = np.einsum("ijk,ijk->ij", rgb, rgb)
+
+    table = _distance_table(tolerance, soft)
+    near = d2 < table.size
+    if not near.any():
+        return rgba
+    dist = table[d2[near]]
+    alpha = arr[..., 3][near]
+
+    new_a = alpha.copy()
+    inside = dist <= tolerance
+    new_a[inside] = 0
+    if soft > 0:
+        edge = ~inside & (dist < tolerance + soft)
+        t = (dist[edge] - tolerance) / soft
+        new_a[edge] = (alpha[edge] * t).astype(np.uint8)
+    arr[..., 3][near] = new_a
+    return Image.fromarray(arr)
+
+
+def open_for_size(source: Path, out_size: tuple[int, int]) -> Image.Image:
+    """Open ``source`` for a streaming render, decoded no larger than it needs to be.
+
+    JPEGs are decoded straight at 1/2, 1/4 or 1/8 scale (``draft``). Other
+    formats are decoded once and box-reduced by an integer factor
+    (``reduce``), so the full-resolution copy is dropped before the LANCZOS
+    pass. Either way the result stays at least STREAM_REDUCING_GAP times
+    ``out_size``, where the final LANCZOS resize is indistinguishable from
+    one over the full plate.
+    """
+    img = Image.open(source)
+    target = (out_size[0] * STREAM_REDUCING_GAP, out_size[1] * STREAM_REDUCING_GAP)
+    img.draft(None, target)
+    factor = min(img.width // target[0], img.height // target[1])
+    if factor < 2:
+        return img
+    if img.mode not in ("L", "LA", "RGB", "RGBA"):
+        img = img.convert("RGBA")
+    return img.reduce(factor)
+
+
+def next_staging_path(
+    staging_dir: Path, prefix: str, asset_id: str, reserved: set | None = None
+) -> Path:
+    """First free prefix_id_NNN.png; paths in ``reserved`` count as taken and are added."""
     staging_dir.mkdir(parents=True, exist_ok=True)
     n = 1
     while True:
         path = staging_dir / f"{prefix}_{asset_id}_{n:03d}.png"
-        if not path.exists():
+        if not path.exists() and (reserved is None or path not in reserved):
+            if reserved is not None:
+                reserved.add(path)
             return path
         n += 1
 
 
-def load_manifest(manifest_path: Path) -> list:
-    if not manifest_path.exists():
-        return []
-    with open(manifest_path, encoding="utf-8") as f:
-        data = json.load(f)
-    if not isinstance(data, list):
+def resolve_output_size(type_cfg: dict, size_override: int | None) -> tuple[int, int]:
+    size_cfg = type_cfg.get("size", [256, 256])
+    if size_override:
+        return size_override, size_override
+    if isinstance(size_cfg, list) and len(size_cfg) >= 2:
+        return int(size_cfg[0]), int(size_cfg[1])
+    out = int(size_cfg[0] if isinstance(size_cfg, list) else size_cfg)
+    return out, out
+
+
+def resolve_variant_sizes(
+    type_cfg: dict, out_size: tuple[int, int], size_override: int | None
+) -> list[tuple[int, int]]:
+    """Smaller sizes from the type's ``variants`` list, largest first.
+
+    A --size override produces a single output, so it disables variants.
+    """
+    if size_override:
         return []
-    return data
+    sizes = []
+    for size in type_cfg.get("variants", []):
+        w, h = (int(size[0]), int(size[1])) if isinstance(size, list) else (int(size), int(size))
+        if w > out_size[0] or h > out_size[1]:
+            raise SystemExit(
+                f"Variant {w}x{h} is larger than the {out_size[0]}x{out_size[1]} primary size"
+            )
+        if (w, h) != tuple(out_size) and (w, h) not in sizes:
+            sizes.append((w, h))
+    return sorted(sizes, key=lambda wh: wh[0] * wh[1], reverse=True)
 
 
-def save_manifest(manifest_path: Path, entries: list) -> None:
-    manifest_path.parent.mkdir(parents=True, exist_ok=True)
-    with open(manifest_path, "w", encoding="utf-8") as f:
-        json.dump(entries, f, indent=2)
-        f.write("\n")
+def variant_path(out_path: Path, size: tuple[int, int]) -> Path:
+    """item_sword_001.png -> item_sword_001_128x128.png"""
+    return out_path.with_name(f"{out_path.stem}_{size[0]}x{size[1]}{out_path.suffix}")
 
 
-def process_source(args: argparse.Namespace, project_root: Path) -> Path:
-    type_cfg = load_type_config(project_root, args.type)
-    size_cfg = type_cfg.get("size", [256, 256])
-    if args.size:
-        out_w = out_h = args.size
-    elif isinstance(size_cfg, list) and len(size_cfg) >= 2:
-        out_w, out_h = int(size_cfg[0]), int(size_cfg[1])
-    else:
-        out_w = out_h = int(size_cfg[0] if isinstance(size_cfg, list) else size_cfg)
+def should_skip_chroma(type_cfg: dict, no_chroma: bool) -> bool:
+    return bool(no_chroma or type_cfg.get("no_chroma") or type_cfg.get("chroma_key") is None)
 
-    tolerance = args.tolerance
-    skip_chroma = (
-        getattr(args, "no_chroma", False)
-        or type_cfg.get("no_chroma")
-        or type_cfg.get("chroma_key") is None
-    )
 
-    source = Path(args.source)
+def resolve_source(project_root: Path, source: str | Path) -> Path:
+    source = Path(source)
     if not source.is_absolute():
         source = (project_root / source).resolve()
-    if not source.exists():
-        raise SystemExit(f"Source image not found: {source}")
+    return source
 
-    img = Image.open(source)
+
+def project_relative(project_root: Path, path: Path) -> str:
+    return str(path.relative_to(project_root)).replace("\\", "/")
+
+
+def render_asset(
+    source: Path,
+    out_path: Path,
+    out_size: tuple[int, int],
+    skip_chroma: bool,
+    chroma_hex: str | None,
+    auto_chroma: bool,
+    tolerance: int,
+    variant_sizes: list | tuple = (),
+    remover=None,
+    stream: bool = False,
+) -> tuple[tuple[int, int, int] | None, list, list]:
+    """Resize + key ``source`` into ``out_path``. Returns (chroma used, flags, variants).
+
+    With a remove_background.BackgroundRemover, its rembg cut-out (taken at
+    source resolution, before resizing) replaces the chroma key.
+
+    Variants are downscaled from the keyed primary image, so decode and keying
+    happen once per source; each is written next to ``out_path`` (see
+    variant_path) and returned as (size, path).
+
+    ``stream`` is a decode-downscale mode for very large plates: the source
+    is opened through open_for_size(), so corners, rembg and the resize all
+    see the reduced image. Keying runs after the resize either way, on an
+    image of ``out_size``.
+    """
+    img = open_for_size(source, out_size) if stream else Image.open(source)
     chroma = None
     flags = ["imagine"]
     if skip_chroma:
-        print("Skipping chroma key (opaque asset)")
-        img = img.convert("RGB").resize((out_w, out_h), Image.Resampling.LANCZOS)
+        img = img.convert("RGB").resize(out_size, Image.Resampling.LANCZOS)
         img = img.convert("RGBA")
         flags.append("opaque")
+    elif remover is not None:
+        img = remover.remove(img.convert("RGB"), label=source.name)
+        img = img.convert("RGBA").resize(out_size, Image.Resampling.LANCZOS)
+        flags.extend(["transparent", "rembg"])
     else:
-        if args.auto_chroma or args.chroma is None:
+        if auto_chroma or chroma_hex is None:
             chroma = sample_corner_chroma(img)
-            print(f"Auto chroma key RGB: {chroma}")
         else:
-            chroma = parse_chroma(args.chroma)
-        img = img.resize((out_w, out_h), Image.Resampling.LANCZOS)
+            chroma = parse_chroma(chroma_hex)
+        img = img.resize(out_size, Image.Resampling.LANCZOS)
         img = chroma_key(img, chroma, tolerance=tolerance)
         flags.append("transparent")
-
-    subdir = type_cfg["output_subdir"]
-    prefix = type_cfg.get("filename_prefix", args.type)
-    staging_dir = project_root / "assets" / "generated" / subdir
-    out_path = next_staging_path(staging_dir, prefix, args.id)
     img.save(out_path, "PNG")
+    variants = []
+    for size in variant_sizes:
+        path = variant_path(out_path, size)
+        img.resize(tuple(size), Image.Resampling.LANCZOS).save(path, "PNG")
+        variants.append((tuple(size), path))
+    return chroma, flags, variants
+
+
+def optimize_options(args: argparse.Namespace) -> dict | None:
+    """optimize_png.optimize_file() keyword args for the CLI flags, or None if off."""
+    if not (args.optimize or args.quantize or args.alpha_bleed):
+        return None
+    return {"quantize_colors": args.quantize, "bleed_radius": args.alpha_bleed}
 
-    manifest_path = project_root / "assets" / "generated" / "manifest.json"
-    entries = load_manifest(manifest_path)
+
+def optimize_outputs(out_path: Path, variants: list, options: dict | None) -> dict | None:
+    """Run the PNG optimize stage on a staged file and its variants.
+
+    Returns {path: bytes saved}, or None when the stage is off.
+    """
+    if options is None:
+        return None
+    paths = [out_path] + [path for _, path in variants]
+    return {str(path): optimize_file(path, **options)["bytes_saved"] for path in paths}
+
+
+def seed_godot_imports(project_root: Path, out_path: Path, variants: list, type_cfg: dict) -> dict:
+    """Write Godot .import files for a PNG and its variants (godot_import.py)."""
+    counts = write_imports(project_root, [out_path, *(path for _, path in variants)], type_cfg)
+    print(f"Godot import metadata: {json.dumps(counts)}")
+    return counts
+
+
+def make_manifest_entry(
+    out_path: Path,
+    source: Path,
+    asset_type: str,
+    asset_id: str,
+    description: str,
+    source_tool: str,
+    out_size: tuple[int, int],
+    chroma: tuple[int, int, int] | None,
+    flags: list,
+    cache_key: str | None = None,
+    variants: list | tuple = (),
+    bytes_saved: dict | None = None,
+) -> dict:
     entry = {
         "filename": out_path.name,
         "path": str(out_path),
-        "type": args.type,
-        "id": args.id,
-        "description": args.description or "",
-        "source_tool": args.source_tool or "unknown",
+        "type": asset_type,
+        "id": asset_id,
+        "description": description or "",
+        "source_tool": source_tool or "unknown",
         "source_image": str(source),
         "generated_at": datetime.now(timezone.utc).isoformat(),
-        "dimensions": f"{out_w}x{out_h}",
+        "dimensions": f"{out_size[0]}x{out_size[1]}",
         "chroma_key": ("%02X%02X%02X" % chroma) if chroma else None,
         "flags": flags,
         "file_size_bytes": out_path.stat().st_size,
         "promoted": False,
         "promoted_to": None,
+        "cache_key": cache_key,
+        "variants": [
+            {
+                "filename": path.name,
+                "path": str(path),
+                "dimensions": f"{size[0]}x{size[1]}",
+                "file_size_bytes": path.stat().st_size,
+                "promoted_to": None,
+            }
+            for size, path in variants
+        ],
+    }
+    if bytes_saved is not None:
+        entry["flags"] = [*flags, "optimized"]
+        entry["bytes_saved"] = bytes_saved.get(str(out_path), 0)
+        for record, (_, path) in zip(entry["variants"], variants):
+            record["bytes_saved"] = bytes_saved.get(str(path), 0)
+    return entry
+
+
+def source_digest(source: Path) -> str:
+    h = hashlib.sha256()
+    with open(source, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def processing_cache_key(
+    digest: str,
+    out_size: tuple[int, int],
+    skip_chroma: bool,
+    chroma_hex: str | None,
+    auto_chroma: bool,
+    tolerance: int,
+    variant_sizes: list | tuple = (),
+    optimize: dict | None = None,
+    rembg_model: str | None = None,
+    stream: bool = False,
+) -> str:
+    """Content address of a staged output: source bytes + effective parameters."""
+    if skip_chroma:
+        chroma, tolerance = None, None
+    elif rembg_model:
+        chroma, tolerance = f"rembg:{rembg_model}", None
+    elif auto_chroma or chroma_hex is None:
+        chroma = "auto"
+    else:
+        chroma = "%02X%02X%02X" % parse_chroma(chroma_hex)
+    params = {
+        "version": CACHE_VERSION,
+        "size": list(out_size),
+        "chroma": chroma,
+        "tolerance": tolerance,
     }
-    entries.append(entry)
-    save_manifest(manifest_path, entries)
+    if variant_sizes:
+        params["variants"] = [list(size) for size in variant_sizes]
+    if optimize:
+        params["optimize"] = optimize
+    if stream:
+        params["stream"] = True
+    payload = digest + json.dumps(params, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def lookup_cached_output(candidates: list, asset_type: str, asset_id: str) -> dict | None:
+    """Latest of ``candidates`` whose staged file is still on disk, unchanged in size.
+
+    An entry for the same type/id wins over one staged under another name.
+    """
+    fallback = None
+    for entry in reversed(candidates):
+        if not all(_staged_file_intact(record) for record in [entry, *entry.get("variants", [])]):
+            continue
+        if is_same_asset(entry, asset_type, asset_id):
+            return entry
+        if fallback is None:
+            fallback = entry
+    return fallback
+
+
+def _staged_file_intact(record: dict) -> bool:
+    path = Path(record.get("path", ""))
+    return path.is_file() and path.stat().st_size == record.get("file_size_bytes")
+
+
+def _parse_dimensions(dimensions: str) -> tuple[int, int]:
+    w, h = dimensions.split("x")
+    return int(w), int(h)
+
+
+def cached_bytes_saved(hit: dict, out_path: Path, variants: list) -> dict | None:
+    """bytes_saved of a cache hit, re-keyed to the paths it was copied to."""
+    if "bytes_saved" not in hit:
+        return None
+    saved = {str(out_path): hit["bytes_saved"]}
+    for record, (_, path) in zip(hit.get("variants", []), variants):
+        saved[str(path)] = record.get("bytes_saved", 0)
+    return saved
 
-    print("=== PROCESS_RESULT ===")
-    print(json.dumps(entry, indent=2))
-    print(f"Wrote: {out_path}")
-    return out_path
+
+def reuse_cached_output(
+    hit: dict, out_path: Path
+) -> tuple[tuple[int, int, int] | None, list, list]:
+    """Copy a cached staging file (and variants) to a new id's path, like render_asset."""
+    shutil.copy2(hit["path"], out_path)
+    variants = []
+    for record in hit.get("variants", []):
+        size = _parse_dimensions(record["dimensions"])
+        path = variant_path(out_path, size)
+        shutil.copy2(record["path"], path)
+        variants.append((size, path))
+    chroma = parse_chroma(hit["chroma_key"]) if hit.get("chroma_key") else None
+    flags = [flag for flag in hit.get("flags", []) if flag != "optimized"]
+    return chroma, flags, variants
+
+
+def is_same_asset(entry: dict, asset_type: str, asset_id: str) -> bool:
+    return entry.get("type") == asset_type and entry.get("id") == asset_id
+
+
+def process_source(args: argparse.Namespace, project_root: Path) -> Path:
+    type_cfg = load_type_config(project_root, args.type)
+    out_size = resolve_output_size(type_cfg, args.size)
+    variant_sizes = resolve_variant_sizes(type_cfg, out_size, args.size)
+    skip_chroma = should_skip_chroma(type_cfg, getattr(args, "no_chroma", False))
+    rembg_model = args.rembg_model if args.remove_bg and not skip_chroma else None
+    optimize = optimize_options(args)
+
+    source = resolve_source(project_root, args.source)
+    if not source.exists():
+        raise SystemExit(f"Source image not found: {source}")
+
+    with ManifestStore.for_project(project_root) as store:
+        key = processing_cache_key(
+            source_digest(source),
+            out_size,
+            skip_chroma,
+            args.chroma,
+            args.auto_chroma,
+            args.tolerance,
+            variant_sizes,
+            optimize,
+            rembg_model,
+            args.stream,
+        )
+        hit = None
+        if not args.no_cache:
+            hit = lookup_cached_output(store.with_cache_key(key), args.type, args.id)
+        if hit is not None and is_same_asset(hit, args.type, args.id):
+            print(f"Cache hit: {hit['path']} is up to date")
+            print("=== PROCESS_RESULT ===")
+            print(json.dumps(public_entry(hit), indent=2))
+            return Path(hit["path"])
+
+        subdir = type_cfg["output_subdir"]
+        prefix = type_cfg.get("filename_prefix", args.type)
+        staging_dir = project_root / "assets" / "generated" / subdir
+        out_path = next_staging_path(staging_dir, prefix, args.id)
+
+        if hit is not None:
+            print(f"Cache hit: copying {hit['path']}")
+            chroma, flags, variants = reuse_cached_output(hit, out_path)
+            bytes_saved = cached_bytes_saved(hit, out_path, variants)
+        else:
+            if skip_chroma:
+                print("Skipping chroma key (opaque asset)")
+            remover = make_remover(rembg_model) if rembg_model else None
+            reset_peak_rss()
+            try:
+                chroma, flags, variants = render_asset(
+                    source,
+                    out_path,
+                    out_size,
+                    skip_chroma,
+                    args.chroma,
+                    args.auto_chroma,
+                    args.tolerance,
+                    variant_sizes,
+                    remover,
+                    args.stream,
+                )
+            finally:
+                if remover is not None:
+                    remover.close()
+                    print(f"Background removal: {json.dumps(remover.summary())}")
+            print(f"Peak RSS: {rss_mb(peak_rss_bytes())} MB")
+            if chroma and (args.auto_chroma or args.chroma is None):
+                print(f"Auto chroma key RGB: {chroma}")
+            bytes_saved = optimize_outputs(out_path, variants, optimize)
+        if not args.no_import:
+            seed_godot_imports(project_root, out_path, variants, type_cfg)
+
+        entry = make_manifest_entry(
+            out_path,
+            source,
+            args.type,
+            args.id,
+            args.description,
+            args.source_tool,
+            out_size,
+            chroma,
+            flags,
+            cache_key=key,
+            variants=variants,
+            bytes_saved=bytes_saved,
+        )
+        store.append(entry)
+        if args.export:
+            store.export_if_stale()
+
+        print("=== PROCESS_RESULT ===")
+        print(json.dumps(entry, indent=2))
+        print(f"Wrote: {out_path}")
+        return out_path
+
+
+def make_remover(model: str):
+    """A handle on the shared BackgroundRemover for --remove-bg (one rembg session per process)."""
+    from remove_background import shared_remover
+
+    try:
+        return shared_remover(model)
+    except RuntimeError as e:
+        raise SystemExit(f"--remove-bg: {e}")
+
+
+IMAGE_SUFFIXES = {".png", ".jpg", ".jpeg", ".webp"}
+BATCH_RESULT_KEYS = ("source", "out_path", "ok", "cached", "error", "seconds", "peak_rss_mb")
+
+
+def collect_batch_jobs(args: argparse.Namespace, project_root: Path) -> list[dict]:
+    """Expand --batch (directory, glob or .jsonl job list) into job dicts.
+
+    Directory/glob sources use --type and the file stem as id. JSONL lines may
+    override any of: source, type, id, description, source_tool, chroma,
+    auto_chroma, no_chroma, remove_bg, size, tolerance, stream.
+    """
+    defaults = {
+        "type": args.type,
+        "description": args.description,
+        "source_tool": args.source_tool,
+        "chroma": args.chroma,
+        "auto_chroma": args.auto_chroma,
+        "no_chroma": args.no_chroma,
+        "remove_bg": args.remove_bg,
+        "size": args.size,
+        "tolerance": args.tolerance,
+        "stream": args.stream,
+    }
+    spec = args.batch
+    spec_path = resolve_source(project_root, spec)
+    jobs = []
+    if spec_path.suffix.lower() == ".jsonl" and spec_path.is_file():
+        with open(spec_path, encoding="utf-8") as f:
+            for line_no, line in enumerate(f, 1):
+                line = line.strip()
+                if not line or line.startswith("#"):
+                    continue
+                job = {**defaults, **json.loads(line)}
+                if "source" not in job:
+                    raise SystemExit(f"{spec_path}:{line_no}: job has no 'source'")
+                job.setdefault("id", Path(job["source"]).stem)
+                jobs.append(job)
+        return jobs
+
+    if spec_path.is_dir():
+        sources = sorted(p for p in spec_path.iterdir() if p.suffix.lower() in IMAGE_SUFFIXES)
+    else:
+        pattern = spec if Path(spec).is_absolute() else str(project_root / spec)
+        sources = sorted(
+            Path(p)
+            for p in glob.glob(pattern, recursive=True)
+            if Path(p).suffix.lower() in IMAGE_SUFFIXES
+        )
+    for source in sources:
+        jobs.append({**defaults, "source": str(source), "id": source.stem})
+    return jobs
+
+
+def run_batch_job(job: dict, remover=None, measure_peak: bool = True) -> dict:
+    """Process-pool worker: render one planned job, never raise.
+
+    rembg jobs run on threads instead and get the shared ``remover``; the
+    threads share one process, so they pass ``measure_peak=False`` and
+    report the process peak rather than their own.
+    """
+    if measure_peak:
+        reset_peak_rss()
+    start = time.perf_counter()
+    result = {"index": job["index"], "source": job["source"], "out_path": job["out_path"]}
+    try:
+        chroma, flags, variants = render_asset(
+            Path(job["source"]),
+            Path(job["out_path"]),
+            tuple(job["out_size"]),
+            job["skip_chroma"],
+            job["chroma"],
+            job["auto_chroma"],
+            job["tolerance"],
+            job["variant_sizes"],
+            remover if job.get("rembg_model") else None,
+            job["stream"],
+        )
+        result["chroma"] = chroma
+        result["flags"] = flags
+        result["variants"] = variants
+        result["bytes_saved"] = optimize_outputs(Path(job["out_path"]), variants, job["optimize"])
+        result["ok"] = True
+    except Exception as e:  # reported per job; the rest of the batch continues
+        result["ok"] = False
+        result["error"] = f"{type(e).__name__}: {e}"
+    result["seconds"] = time.perf_counter() - start
+    result["peak_rss_mb"] = rss_mb(peak_rss_bytes())
+    return result
+
+
+def rss_mb(nbytes: int | None) -> float | None:
+    return round(nbytes / 1024 / 1024, 1) if nbytes else None
+
+
+def worker_memory(rendered: list) -> dict:
+    """Largest per-job peak RSS and how many pool workers that fits in free memory."""
+    peaks = [r["peak_rss_mb"] for r in rendered if r.get("peak_rss_mb")]
+    if not peaks:
+        return {}
+    memory = {"peak_rss_mb": max(peaks)}
+    available = available_memory_bytes()
+    if available is not None:
+        memory["available_mb"] = rss_mb(available)
+        memory["workers_fit"] = max(1, int(available / 1024 / 1024 // max(peaks)))
+    return memory
+
+
+def process_batch(args: argparse.Namespace, project_root: Path) -> list[Path]:
+    types = load_type_configs()
+    optimize = optimize_options(args)
+    jobs = collect_batch_jobs(args, project_root)
+    if not jobs:
+        raise SystemExit(f"No source images found for batch: {args.batch}")
+
+    with ManifestStore.for_project(project_root) as store:
+        # Staging paths are allocated up front so parallel workers never race
+        # for the same prefix_id_NNN.png. Cache hits are resolved here too, so a
+        # re-run over an unchanged drop never reaches the pool.
+        print(f"Batch: {len(jobs)} job(s)")
+        reserved: set = set()
+        planned = []
+        results = []
+        by_index = {}
+        for index, job in enumerate(jobs):
+            type_cfg = load_type_config(project_root, job["type"], types)
+            source = resolve_source(project_root, job["source"])
+            label = f"  [{index + 1}/{len(jobs)}] {source.name}"
+            if not source.exists():
+                print(f"{label} FAILED (source image not found)")
+                results.append(
+                    {
+                        "index": index,
+                        "source": str(source),
+                        "out_path": None,
+                        "ok": False,
+                        "error": "source image not found",
+                        "seconds": 0.0,
+                    }
+                )
+                continue
+            out_size = resolve_output_size(type_cfg, job["size"])
+            variant_sizes = resolve_variant_sizes(type_cfg, out_size, job["size"])
+            skip_chroma = should_skip_chroma(type_cfg, job["no_chroma"])
+            rembg_model = args.rembg_model if job["remove_bg"] and not skip_chroma else None
+            key = processing_cache_key(
+                source_digest(source),
+                out_size,
+                skip_chroma,
+                job["chroma"],
+                job["auto_chroma"],
+                job["tolerance"],
+                variant_sizes,
+                optimize,
+                rembg_model,
+                job["stream"],
+            )
+            job = {
+                **job,
+                "index": index,
+                "source": str(source),
+                "out_size": out_size,
+                "variant_sizes": variant_sizes,
+                "optimize": optimize,
+                "skip_chroma": skip_chroma,
+                "rembg_model": rembg_model,
+                "cache_key": key,
+            }
+            hit = None
+            if not args.no_cache:
+                hit = lookup_cached_output(store.with_cache_key(key), job["type"], job["id"])
+            if hit is not None and is_same_asset(hit, job["type"], job["id"]):
+                print(f"{label} -> {hit['filename']} cached")
+                results.append(
+                    {
+                        "index": index,
+                        "source": str(source),
+                        "out_path": hit["path"],
+                        "ok": True,
+                        "cached": True,
+                        "reused": True,
+                        "seconds": 0.0,
+                    }
+                )
+                continue
+
+            staging_dir = project_root / "assets" / "generated" / type_cfg["output_subdir"]
+            prefix = type_cfg.get("filename_prefix", job["type"])
+            job["out_path"] = str(next_staging_path(staging_dir, prefix, job["id"], reserved))
+            by_index[index] = job
+            if hit is not None:
+                chroma, flags, variants = reuse_cached_output(hit, Path(job["out_path"]))
+                print(f"{label} -> {Path(job['out_path']).name} cached (copied {hit['filename']})")
+                results.append(
+                    {
+                        "index": index,
+                        "source": str(source),
+                        "out_path": job["out_path"],
+                        "ok": True,
+                        "cached": True,
+                        "chroma": chroma,
+                        "flags": flags,
+                        "variants": variants,
+                        "bytes_saved": cached_bytes_saved(hit, Path(job["out_path"]), variants),
+                        "seconds": 0.0,
+                    }
+                )
+                continue
+            planned.append(job)
+
+        workers = max(1, min(args.workers or os.cpu_count() or 1, len(planned)))
+        # rembg jobs stay in this process: one session serves every job through
+        # its queue, while decode/resize/encode for the others overlap on threads.
+        remover = None
+        if any(job["rembg_model"] for job in planned):
+            remover = make_remover(args.rembg_model)
+        print(f"Workers: {workers}" + (" (threads, shared rembg session)" if remover else ""))
+        wall_start = time.perf_counter()
+        if workers == 1:
+            completed = (run_batch_job(job, remover) for job in planned)
+            pool = None
+        else:
+            if remover is not None:
+                pool = ThreadPoolExecutor(max_workers=workers)
+                futures = [pool.submit(run_batch_job, job, remover, False) for job in planned]
+            else:
+                pool = ProcessPoolExecutor(max_workers=workers)
+                futures = [pool.submit(run_batch_job, job) for job in planned]
+            completed = (future.result() for future in as_completed(futures))
+        rendered = []
+        try:
+            for result in completed:
+                status = "ok" if result["ok"] else f"FAILED ({result['error']})"
+                print(
+                    f"  [{result['index'] + 1}/{len(jobs)}] {Path(result['source']).name}"
+                    f" -> {Path(result['out_path']).name} {result['seconds'] * 1000:.0f}ms"
+                    f" {result['peak_rss_mb']} MB {status}"
+                )
+                rendered.append(result)
+        finally:
+            if pool is not None:
+                pool.shutdown()
+            if remover is not None:
+                remover.close()
+        wall = time.perf_counter() - wall_start
+        results.extend(rendered)
+        results.sort(key=lambda r: r["index"])
+
+        # One manifest write for the whole batch, in job order.
+        written = []
+        new_entries = []
+        for result in results:
+            if not result["ok"]:
+                continue
+            written.append(Path(result["out_path"]))
+            if result.get("reused"):
+                continue
+            job = by_index[result["index"]]
+            new_entries.append(
+                make_manifest_entry(
+                    Path(job["out_path"]),
+                    Path(job["source"]),
+                    job["type"],
+                    job["id"],
+                    job["description"],
+                    job["source_tool"],
+                    job["out_size"],
+                    result["chroma"],
+                    result["flags"],
+                    cache_key=job["cache_key"],
+                    variants=result["variants"],
+                    bytes_saved=result["bytes_saved"],
+                )
+            )
+        store.append_many(new_entries)
+        if not args.no_export:
+            store.export_if_stale()
+        import_counts: dict[str, int] = {}
+        if not args.no_import:
+            for result in results:
+                if result["ok"] and not result.get("reused"):
+                    job = by_index[result["index"]]
+                    counts = write_imports(
+                        project_root,
+                        [Path(job["out_path"]), *(path for _, path in result["variants"])],
+                        types[job["type"]],
+                    )
+                    for status, count in counts.items():
+                        import_counts[status] = import_counts.get(status, 0) + count
+
+        ok = len(written)
+        busy = sum(r["seconds"] for r in rendered)
+        megapixels = (
+            sum(
+                by_index[r["index"]]["out_size"][0] * by_index[r["index"]]["out_size"][1]
+                for r in rendered
+                if r["ok"]
+            )
+            / 1e6
+        )
+        summary = {
+            "jobs": len(jobs),
+            "ok": ok,
+            "cached": sum(1 for r in results if r.get("cached")),
+            "failed": len(jobs) - ok,
+            "workers": workers,
+            "wall_seconds": round(wall, 3),
+            "jobs_per_second": round(len(rendered) / wall, 2) if wall > 0 else None,
+            "output_megapixels_per_second": round(megapixels / wall, 2) if wall > 0 else None,
+            "parallel_efficiency": round(busy / (wall * workers), 2) if wall > 0 else None,
+        }
+        summary.update(worker_memory(rendered))
+        if remover is not None:
+            summary["background_removal"] = remover.summary()
+        if import_counts:
+            summary["godot_imports"] = import_counts
+        if optimize is not None:
+            summary["bytes_saved"] = sum(
+                sum((r.get("bytes_saved") or {}).values()) for r in rendered if r["ok"]
+            )
+        print("=== BATCH_RESULT ===")
+        print(
+            json.dumps(
+                {
+                    "summary": summary,
+                    "results": [{k: r.get(k) for k in BATCH_RESULT_KEYS} for r in results],
+                },
+                indent=2,
+            )
+        )
+        if summary["failed"]:
+            raise SystemExit(f"{summary['failed']} of {len(jobs)} batch job(s) failed")
+        return written
 
 
 def promote(args: argparse.Namespace, project_root: Path) -> Path:
@@ -220,40 +982,57 @@ def promote(args: argparse.Namespace, project_root: Path) -> Path:
         raise SystemExit(f"Promote source not found: {src}")
 
     shutil.copy2(src, dest)
+    promoted_variants = []
+
+    rel_promoted = project_relative(project_root, dest)
+    with ManifestStore.for_project(project_root) as store:
+        # Prefer the entry for the exact staging file, else the latest for this id
+        entry = store.find(args.type, args.id, src.name) or store.find(args.type, args.id)
+        if entry is not None:
+            variants = []
+            for record in entry.get("variants", []):
+                record = dict(record)
+                if entry.get("filename") == src.name and Path(record["path"]).is_file():
+                    # Variants travel with their primary: sword.png -> sword_128x128.png
+                    size = _parse_dimensions(record["dimensions"])
+                    variant_dest = variant_path(dest, size)
+                    shutil.copy2(record["path"], variant_dest)
+                    promoted_variants.append((size, variant_dest))
+                    record["promoted_to"] = project_relative(project_root, variant_dest)
+                variants.append(record)
+            store.update(entry, promoted=True, promoted_to=rel_promoted, variants=variants)
+        if args.export:
+            store.export_if_stale()
+
+    if not args.no_import:
+        seed_godot_imports(project_root, dest, promoted_variants, type_cfg)
 
-    manifest_path = project_root / "assets" / "generated" / "manifest.json"
-    entries = load_manifest(manifest_path)
-    rel_promoted = str(dest.relative_to(project_root)).replace("\\", "/")
-    updated = False
-    for entry in reversed(entries):
-        if entry.get("id") == args.id and entry.get("type") == args.type:
-            if Path(entry.get("path", "")).name == src.name or entry.get("filename") == src.name:
-                entry["promoted"] = True
-                entry["promoted_to"] = rel_promoted
-                updated = True
-                break
-    if not updated:
-        # Mark by matching path end
-        for entry in reversed(entries):
-            if entry.get("id") == args.id and entry.get("type") == args.type:
-                entry["promoted"] = True
-                entry["promoted_to"] = rel_promoted
-                updated = True
-                break
-    save_manifest(manifest_path, entries)
+    atlases = [] if args.no_atlas else atlases_for_type(args.type)
+    if atlases:
+        pack_atlases(project_root, atlases, imports=not args.no_import)
 
     print("=== PROMOTE_RESULT ===")
     print(json.dumps({"from": str(src), "to": str(dest), "promoted_to": rel_promoted}, indent=2))
     return dest
 
 
-def main() -> None:
+def main(argv: list[str] | None = None) -> None:
     parser = argparse.ArgumentParser(description="Process/promote Imagine game assets")
     parser.add_argument("--project-root", default=str(DEFAULT_PROJECT_ROOT))
     parser.add_argument("--type", default="item", help="Asset type from asset-types.json")
-    parser.add_argument("--id", required=True, help="Stable asset id (e.g. sword)")
+    parser.add_argument("--id", help="Stable asset id (e.g. sword)")
     parser.add_argument("--promote", action="store_true", help="Promote staged asset")
     parser.add_argument("--source", help="Source image from image_gen/image_edit")
+    parser.add_argument(
+        "--batch",
+        help="Process a directory, glob or .jsonl job list (id defaults to file stem)",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Batch process-pool size (default: CPU count)",
+    )
     parser.add_argument("--from", dest="from_path", help="Staging file to promote")
     parser.add_argument("--to", help="Promote destination path")
     parser.add_argument("--description", default="")
@@ -269,22 +1048,109 @@ def main() -> None:
         action="store_true",
         help="Skip chroma key (splash/backgrounds)",
     )
+    parser.add_argument(
+        "--remove-bg",
+        action="store_true",
+        help="Cut out the subject with rembg instead of chroma keying (needs rembg)",
+    )
+    parser.add_argument(
+        "--rembg-model",
+        default=DEFAULT_REMBG_MODEL,
+        help=f"rembg model for --remove-bg (default {DEFAULT_REMBG_MODEL})",
+    )
     parser.add_argument("--size", type=int, default=None, help="Force square output size")
+    parser.add_argument(
+        "--pack-atlas",
+        action="store_true",
+        help="Repack every atlas in atlases.json (incremental) and exit",
+    )
+    parser.add_argument(
+        "--no-atlas",
+        action="store_true",
+        help="Do not repack atlases containing the promoted type",
+    )
+    parser.add_argument(
+        "--export",
+        action="store_true",
+        help="Also rewrite manifest.json after a single process/promote run",
+    )
+    parser.add_argument(
+        "--no-export",
+        action="store_true",
+        help="With --batch, update only the manifest store; skip rewriting manifest.json",
+    )
+    parser.add_argument(
+        "--export-manifest",
+        action="store_true",
+        help="Write assets/generated/manifest.json from the manifest store and exit",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Reprocess even if an identical source/parameter set is already staged",
+    )
     parser.add_argument(
         "--tolerance",
         type=int,
         default=55,
         help="Chroma distance tolerance (default 55 for Imagine plates)",
     )
-    args = parser.parse_args()
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Bound memory on very large sources: decode them downscaled before resizing",
+    )
+    parser.add_argument(
+        "--optimize",
+        action="store_true",
+        help="Re-encode staged PNGs (and variants) with optimize_png.py, losslessly",
+    )
+    parser.add_argument(
+        "--quantize",
+        type=int,
+        default=0,
+        metavar="N",
+        help="Lossy: quantize to N colors when within the error budget (implies --optimize)",
+    )
+    parser.add_argument(
+        "--alpha-bleed",
+        type=int,
+        default=0,
+        metavar="PX",
+        help="Bleed edge RGB into transparent pixels before encoding (implies --optimize)",
+    )
+    parser.add_argument(
+        "--no-import",
+        action="store_true",
+        help="Do not write Godot .import files next to the PNGs",
+    )
+    parser.add_argument(
+        "--no-worker",
+        action="store_true",
+        help="Run in this process even if asset_worker.py is serving",
+    )
+    args = parser.parse_args(argv)
 
     project_root = Path(args.project_root).resolve()
 
+    if args.export_manifest:
+        with ManifestStore.for_project(project_root) as store:
+            path = store.export_json()
+            print(f"Exported {len(store)} manifest entries to {path}")
+        return
+    if args.pack_atlas:
+        pack_atlases(project_root, imports=not args.no_import)
+        return
+    if args.batch:
+        process_batch(args, project_root)
+        return
+    if not args.id:
+        raise SystemExit("--id is required unless --batch")
     if args.promote:
         promote(args, project_root)
     else:
         if not args.source:
-            raise SystemExit("--source is required unless --promote")
+            raise SystemExit("--source is required unless --promote or --batch")
         process_source(args, project_root)
 
 
@@ -0,0 +1,358 @@
+#!/usr/bin/env python3
+"""Background removal with one reusable rembg session and a batched work queue.
+
+``rembg.remove(image)`` without a session builds a new ONNX inference
+session on every call, which dominates runtime on CPU-only machines.
+BackgroundRemover builds the session once and runs every image through it.
+Callers submit images from any thread. A single worker drains the queue in
+batches of up to ``batch_size`` and runs them back to back on the shared
+session, which keeps the model warm and keeps memory at one session's
+worth. rembg only infers one image at a time, so a batch is a
+scheduling unit, not a batched tensor.
+
+Per-image latency and the process's peak memory are recorded and printed
+by ``summary()``. rembg (and onnxruntime behind it) is imported on first
+use, not at import time, so scripts that only sometimes remove backgrounds
+start fast. ``shared_remover()`` keeps one remover per model for the life of the
+process; asset_worker.py relies on it to keep sessions warm across jobs.
+Each caller gets its own RemoverHandle on it, with its own latency records,
+so concurrent jobs neither stop the shared queue nor wipe each other's stats.
+
+Used by process_asset.py (``--remove-bg``, an alternative to chroma keying
+for plates that are not flat) and generate_hero_sprites.py.
+
+Usage:
+    python remove_background.py IMAGE [IMAGE ...] --out-dir DIR [--model u2net]
+        [--no-worker]
+
+When asset_worker.py is serving, the CLI runs inside the worker instead.
+"""
+
+from __future__ import annotations
+
+import argparse
+import queue
+import statistics
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from pathlib import Path
+
+if __name__ == "__main__":
+    # Hand the job to a running asset_worker.py before importing anything heavy.
+    from asset_worker import forward_to_worker
+
+    _exit_code = forward_to_worker("remove_background", sys.argv[1:])
+    if _exit_code is not None:
+        sys.exit(_exit_code)
+
+from PIL import Image
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+DEFAULT_MODEL = "u2net"
+DEFAULT_BATCH_SIZE = 4
+# Latency records kept per remover; a long-lived asset_worker.py must not grow without bound.
+MAX_RECORDS = 10_000
+
+_shared_removers: dict[str, BackgroundRemover] = {}
+_shared_lock = threading.Lock()
+
+
+def load_rembg():
+    """Import rembg on demand; None if it is not installed."""
+    try:
+        import rembg
+    except ImportError:
+        return None
+    return rembg
+
+
+def peak_rss_bytes() -> int | None:
+    """Peak resident memory of this process so far, or None if unavailable.
+
+    On Linux this is VmHWM, which reset_peak_rss() can rewind.
+    """
+    try:
+        with open("/proc/self/status", encoding="ascii") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+    if psutil is not None:
+        info = psutil.Process().memory_info()
+        return getattr(info, "peak_wset", None) or info.rss  # peak_wset: Windows only
+    return None
+
+
+def reset_peak_rss() -> bool:
+    """Restart peak_rss_bytes() from the current RSS (Linux only).
+
+    Lets a long-lived process (a pool worker, asset_worker.py) measure the
+    peak of each job instead of the largest job so far. Returns False where
+    the peak cannot be reset.
+    """
+    try:
+        with open("/proc/self/clear_refs", "w", encoding="ascii") as f:
+            f.write("5")
+    except OSError:
+        return False
+    return True
+
+
+def available_memory_bytes() -> int | None:
+    """Memory the system can hand out without swapping, or None if unknown."""
+    try:
+        with open("/proc/meminfo", encoding="ascii") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    if psutil is not None:
+        return psutil.virtual_memory().available
+    return None
+
+
+class BackgroundRemover:
+    """One rembg session shared by every image, fed through a batched queue."""
+
+    def __init__(
+        self,
+        model: str = DEFAULT_MODEL,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        **remove_options,
+    ):
+        self.rembg = load_rembg()
+        if self.rembg is None:
+            raise RuntimeError("rembg is not installed (pip install rembg)")
+        start = time.perf_counter()
+        self.session = self.rembg.new_session(model)
+        self.setup_seconds = time.perf_counter() - start
+        self.model = model
+        self.batch_size = max(1, batch_size)
+        self.remove_options = remove_options
+        self.records: deque = deque(maxlen=MAX_RECORDS)
+        self.batches = 0
+        self._lock = threading.Lock()
+        # Each worker thread drains its own queue, so a close() racing a
+        # submit() can never hand the stop sentinel to the wrong thread.
+        self._queue: queue.Queue | None = None
+        self._worker: threading.Thread | None = None
+
+    def __enter__(self) -> BackgroundRemover:
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def submit(
+        self, image: Image.Image, label: str | None = None, sink: deque | None = None
+    ) -> Future:
+        """Queue ``image``; the future resolves to the RGBA cut-out.
+
+        Once it resolves, ``future.record`` holds that image's latency record,
+        which is also appended to ``sink`` (a RemoverHandle's records) first.
+        """
+        future: Future = Future()
+        with self._lock:
+            if self._worker is None:  # first use, or submitted again after close()
+                self._queue = queue.Queue()
+                self._worker = threading.Thread(target=self._run, args=(self._queue,), daemon=True)
+                self._worker.start()
+            self._queue.put((image, label, future, time.perf_counter(), sink))
+        return future
+
+    def remove(self, image: Image.Image, label: str | None = None) -> Image.Image:
+        return self.submit(image, label).result()
+
+    def map(self, images: list, labels: list | None = None) -> list[Image.Image]:
+        futures = [
+            self.submit(image, labels[i] if labels else None) for i, image in enumerate(images)
+        ]
+        return [future.result() for future in futures]
+
+    def close(self) -> None:
+        """Stop the queue worker once it has finished everything submitted so far.
+
+        A later submit() starts a new worker. Callers sharing the remover
+        through shared_remover() close their RemoverHandle instead.
+        """
+        with self._lock:
+            worker, work = self._worker, self._queue
+            self._worker = self._queue = None
+            if work is not None:
+                work.put(None)
+        if worker is not None:
+            worker.join()
+
+    def _run(self, work: queue.Queue) -> None:
+        while True:
+            item = work.get()
+            if item is None:
+                return
+            batch = [item]
+            while len(batch) < self.batch_size:
+                try:
+                    item = work.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    work.put(None)  # finish this batch, then stop
+                    break
+                batch.append(item)
+            with self._lock:
+                self.batches += 1
+                batch_number = self.batches
+            for image, label, future, queued_at, sink in batch:
+                self._process(image, label, future, queued_at, sink, batch_number)
+
+    def _process(self, image, label, future, queued_at, sink, batch_number) -> None:
+        if not future.set_running_or_notify_cancel():
+            return
+        start = time.perf_counter()
+        try:
+            result = self.rembg.remove(image, session=self.session, **self.remove_options)
+        except Exception as e:  # reported on the caller's future
+            future.set_exception(e)
+            return
+        done = time.perf_counter()
+        future.record = {
+            "label": label,
+            "seconds": done - start,
+            "wait_seconds": start - queued_at,
+            "peak_rss_bytes": peak_rss_bytes(),
+            "batch": batch_number,
+        }
+        self.records.append(future.record)
+        if sink is not None:
+            sink.append(future.record)
+        future.set_result(result)
+
+    def summary(self) -> dict:
+        return summarize_records(self.model, self.records, self.batches, self.setup_seconds)
+
+
+class RemoverHandle:
+    """One caller's view of a shared BackgroundRemover.
+
+    Images go through the shared session and queue, but latency records and
+    the summary cover only this handle's images, and close() leaves the
+    shared remover running for everyone else.
+    """
+
+    def __init__(self, remover: BackgroundRemover, setup_seconds: float = 0.0):
+        self.remover = remover
+        self.model = remover.model
+        self.setup_seconds = setup_seconds  # 0.0 when the session was already warm
+        self.records: deque = deque(maxlen=MAX_RECORDS)
+
+    def __enter__(self) -> RemoverHandle:
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def submit(self, image: Image.Image, label: str | None = None) -> Future:
+        return self.remover.submit(image, label, sink=self.records)
+
+    def remove(self, image: Image.Image, label: str | None = None) -> Image.Image:
+        return self.submit(image, label).result()
+
+    def map(self, images: list, labels: list | None = None) -> list[Image.Image]:
+        futures = [
+            self.submit(image, labels[i] if labels else None) for i, image in enumerate(images)
+        ]
+        return [future.result() for future in futures]
+
+    def close(self) -> None:
+        pass  # the shared remover outlives its callers
+
+    def summary(self) -> dict:
+        batches = len({record["batch"] for record in self.records})
+        return summarize_records(self.model, self.records, batches, self.setup_seconds)
+
+
+def summarize_records(model: str, records: list, batches: int, setup_seconds: float) -> dict:
+    latencies = [r["seconds"] for r in records]
+    peaks = [r["peak_rss_bytes"] for r in records if r["peak_rss_bytes"]]
+    return {
+        "model": model,
+        "images": len(latencies),
+        "batches": batches,
+        "session_setup_seconds": round(setup_seconds, 3),
+        "latency_ms_mean": round(statistics.fmean(latencies) * 1000, 1) if latencies else None,
+        "latency_ms_p50": round(statistics.median(latencies) * 1000, 1) if latencies else None,
+        "latency_ms_max": round(max(latencies) * 1000, 1) if latencies else None,
+        "peak_rss_mb": round(max(peaks) / 1024 / 1024, 1) if peaks else None,
+    }
+
+
+def shared_remover(
+    model: str = DEFAULT_MODEL, batch_size: int = DEFAULT_BATCH_SIZE
+) -> RemoverHandle:
+    """A handle on the process-wide remover for ``model``, built on first use.
+
+    ``batch_size`` applies when the remover is built. Closing the handle
+    does not stop the shared remover, and its summary() covers only the
+    images submitted through it.
+    """
+    with _shared_lock:
+        remover = _shared_removers.get(model)
+        if remover is None:
+            remover = _shared_removers[model] = BackgroundRemover(model, batch_size)
+            return RemoverHandle(remover, remover.setup_seconds)
+    return RemoverHandle(remover)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Remove image backgrounds with rembg")
+    parser.add_argument("images", nargs="+", help="Input images")
+    parser.add_argument("--out-dir", required=True, help="Where to write <stem>.png cut-outs")
+    parser.add_argument("--model", default=DEFAULT_MODEL, help="rembg model (default u2net)")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--no-worker", action="store_true", help="Never use asset_worker.py")
+    args = parser.parse_args(argv)
+
+    out_dir = Path(args.out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    try:
+        remover = shared_remover(args.model, args.batch_size)
+    except RuntimeError as e:
+        raise SystemExit(str(e))
+    with remover:
+        print(f"Session ({args.model}) ready in {remover.setup_seconds:.2f}s")
+        futures = [
+            (Path(path), remover.submit(Image.open(path), Path(path).name)) for path in args.images
+        ]
+        for path, future in futures:
+            out_path = out_dir / f"{path.stem}.png"
+            future.result().save(out_path, "PNG")
+        for record in remover.records:
+            peak = record["peak_rss_bytes"]
+            peak_col = f"{peak / 1024 / 1024:8.1f} MB" if peak else f"{'n/a':>11}"
+            print(f"  {record['seconds'] * 1000:8.1f} ms  peak {peak_col}  {record['label']}")
+        summary = remover.summary()
+    print(
+        f"{summary['images']} image(s) in {summary['batches']} batch(es),"
+        f" p50 {summary['latency_ms_p50']} ms, peak RSS {summary['peak_rss_mb']} MB"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -6,7 +6,8 @@
     Orchestrates the full web export pipeline:
     1. Kills any existing server on the target port
     2. Exports the game via Godot CLI (--headless --export-release)
-    3. Verifies export artifacts exist
+    3. Verifies export artifacts exist, checks rpg.pck against pck_budgets.json
+       (pck_report.py) and precompresses them (.br/.gz)
     4. Starts the Python HTTP server with correct WASM headers
 
 .PARAMETER SkipExport
@@ -18,15 +19,26 @@
 .PARAMETER Port
     Port for the HTTP server (default: 8060).
 
+.PARAMETER IgnoreBudgets
+    Report rpg.pck size budget overruns as a warning instead of failing.
+
+.PARAMETER Watch
+    Start the server in --watch mode: later exports (e.g. -ExportOnly from
+    another shell or the editor) are picked up without a restart and open
+    pages reload once the export is complete.
+
 .EXAMPLE
     .\Export-AndServe.ps1                  # Full rebuild + serve
     .\Export-AndServe.ps1 -SkipExport      # Serve existing build
     .\Export-AndServe.ps1 -ExportOnly      # Export only
+    .\Export-AndServe.ps1 -Watch           # Rebuild + serve with live reload
 #>
 
 param(
     [switch]$SkipExport,
     [switch]$ExportOnly,
+    [switch]$Watch,
+    [switch]$IgnoreBudgets,
     [int]$Port = 8060
 )
 
@@ -107,6 +119,23 @@ if (-not $SkipExport) {
     }
 
     Write-Host "Export complete. Files verified." -ForegroundColor Green
+
+    # Size breakdown, diff against the previous export and budget check
+    python (Join-Path $ProjectRoot "pck_report.py") (Join-Path $exportDir "rpg.pck")
+    if ($LASTEXITCODE -ne 0) {
+        if ($IgnoreBudgets) {
+            Write-Host "WARNING: rpg.pck is over its size budget" -ForegroundColor Yellow
+        } else {
+            Write-Host "ERROR: rpg.pck is over its size budget (see above; -IgnoreBudgets to continue)" -ForegroundColor Red
+            exit 1
+        }
+    }
+
+    # Precompressed .br/.gz siblings let serve_web.py skip sending raw .wasm/.pck
+    python (Join-Path $ProjectRoot "serve_web.py") --precompress --dir $exportDir
+    if ($LASTEXITCODE -ne 0) {
+        Write-Host "WARNING: precompression failed; serving uncompressed files" -ForegroundColor Yellow
+    }
 }
 
 # ---------------------------------------------------------------------------
@@ -134,7 +163,12 @@ if (-not $ExportOnly) {
     Write-Host ""
 
     try {
-        python $serverScript --port $Port --dir $webDir
+        if ($Watch) {
+            python $serverScript --port $Port --dir $webDir --watch
+        }
+        else {
+            python $serverScript --port $Port --dir $webDir
+        }
     }
     catch {
         Write-Host "Server stopped: $_" -ForegroundColor Yellow
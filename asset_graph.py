@@ -0,0 +1,373 @@
+#!/usr/bin/env python3
+"""
+Asset Dependency Graph
+Finds assets nothing references and how much asset weight each scene pulls in.
+
+Every .tscn/.tres (parsed with tscn_parser.SceneIndex), .gd, .gdshader and
+project.godot in the project is scanned for res:// and uid:// references;
+.import and .uid sidecars map uids back to paths. Script paths built at
+runtime ("res://scenes/ui/%s.tscn", "res://assets/locations/" + id) count
+as references to every file they could match. Hidden files and
+directories (.godot/, .git/, ...) and directories with a .gdignore are
+skipped, like Godot does.
+
+An asset (a file under --assets, default assets/) is dead when it cannot be
+reached from a root: project.godot (which names the main scene, autoloads,
+icon and theme) and every script declaring a class_name, since Godot
+resolves those by name. Scripts under archive/ are not roots, so old code
+kept there does not keep assets alive. Cycles of resources that only reference each other
+are dead too. Entries in
+assets/generated/manifest.json annotate the report: staging copies whose
+promoted_to file exists are flagged as superseded.
+
+Per-file scan results are cached in .godot/asset_graph_cache.json by
+mtime and size, so a re-scan only re-reads files that changed; --no-cache
+rebuilds it.
+
+Usage:
+    python asset_graph.py [--assets DIR ...] [--top N] [--json] [--no-cache]
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+import time
+from fnmatch import fnmatchcase
+from pathlib import Path
+
+from tscn_parser import SceneIndex
+
+PROJECT_ROOT = Path(__file__).resolve().parent
+CACHE_PATH = Path(".godot") / "asset_graph_cache.json"
+CACHE_VERSION = 2
+PROJECT_FILE = "project.godot"
+MANIFEST_PATH = Path("assets") / "generated" / "manifest.json"
+
+# class_name scripts under these directories are not reachability roots
+ROOT_SKIP_DIRS = {"archive"}
+
+SCENE_SUFFIXES = {".tscn", ".tres"}
+TEXT_SUFFIXES = {".gd", ".gdshader", ".gdshaderinc", ".godot"}
+ASSET_SUFFIXES = {
+    ".png", ".jpg", ".jpeg", ".webp", ".svg", ".bmp", ".tga", ".exr", ".hdr",
+    ".ttf", ".otf", ".woff", ".woff2", ".fnt",
+    ".wav", ".ogg", ".mp3", ".ogv",
+    ".gdshader", ".gdshaderinc", ".tres", ".res", ".tscn", ".scn",
+    ".glb", ".gltf", ".obj",
+}  # fmt: skip
+REF_RE = re.compile(r'"\*?((?:res|uid)://[^"]*)"')
+FORMAT_RE = re.compile(r"%[-+0-9.]*[sdif]")
+IMPORT_UID_RE = re.compile(r'^uid="(uid://[^"]+)"', re.M)
+IMPORT_DEST_RE = re.compile(r"^dest_files=\[(.*)\]", re.M)
+CLASS_NAME_RE = re.compile(r"^class_name\s", re.M)
+
+
+def scan_refs(text):
+    """(references, dynamic patterns) from the quoted res:// / uid:// strings in ``text``."""
+    refs, patterns = [], []
+    for ref in REF_RE.findall(text):
+        if ref.startswith("uid://"):
+            if len(ref) > len("uid://"):
+                refs.append(ref)
+        elif FORMAT_RE.search(ref) or ref.endswith("/"):
+            pattern = FORMAT_RE.sub("*", ref) + ("*" if ref.endswith("/") else "")
+            # A bare "res://" (path joining, file dialogs) would match everything.
+            if "/" in pattern[len("res://") :].split("*", 1)[0]:
+                patterns.append(pattern)
+        elif ref != "res://":
+            refs.append(ref)
+    return refs, patterns
+
+
+def scan_file(path):
+    """Scan one file: {"refs", "patterns", "uid", "dest", "class_name"} (the keys that apply)."""
+    suffix = path.suffix
+    if suffix in SCENE_SUFFIXES:
+        index = SceneIndex.load(path)
+        refs = []
+        for section in index.ext_resources.values():
+            refs.append(section.get("path") or section.get("uid"))
+        body = "".join(s.render() for s in index.sections if s.kind != "ext_resource")
+        inline, patterns = scan_refs(body)
+        result = {"refs": [r for r in refs if r] + inline, "patterns": patterns}
+        uid = index.header.get("uid") if index.header else None
+        if uid:
+            result["uid"] = uid
+        return result
+    text = path.read_text(encoding="utf-8", errors="replace")
+    if suffix == ".import":
+        result = {}
+        match = IMPORT_UID_RE.search(text)
+        if match:
+            result["uid"] = match.group(1)
+        match = IMPORT_DEST_RE.search(text)
+        if match:
+            result["dest"] = REF_RE.findall(match.group(1))
+        return result
+    if suffix == ".uid":
+        return {"uid": text.strip()}
+    refs, patterns = scan_refs(text)
+    result = {"refs": refs, "patterns": patterns}
+    if suffix == ".gd" and CLASS_NAME_RE.search(text):
+        result["class_name"] = True
+    return result
+
+
+def should_scan(name):
+    suffix = os.path.splitext(name)[1]
+    return suffix in SCENE_SUFFIXES or suffix in TEXT_SUFFIXES or suffix in (".import", ".uid")
+
+
+class AssetGraph:
+    """Reference graph over the project's files, keyed by project-relative posix path."""
+
+    def __init__(self, root=PROJECT_ROOT, asset_dirs=("assets",)):
+        self.root = Path(root)
+        self.asset_dirs = [d.strip("/") + "/" for d in asset_dirs]
+        self.sizes = {}
+        self.scans = {}
+        self.edges = {}  # file -> set of files it references
+        self.stats = {"files": 0, "parsed": 0, "cached": 0, "seconds": 0.0}
+
+    # -- scanning ------------------------------------------------------------
+
+    def walk(self):
+        """(rel path, stat) for every file Godot would see."""
+        for dirpath, dirnames, filenames in os.walk(self.root):
+            if ".gdignore" in filenames and Path(dirpath) != self.root:
+                dirnames[:] = []
+                continue
+            dirnames[:] = sorted(d for d in dirnames if not d.startswith("."))
+            for name in filenames:
+                if name.startswith("."):
+                    continue
+                path = Path(dirpath) / name
+                yield path.relative_to(self.root).as_posix(), path.stat()
+
+    def scan(self, use_cache=True):
+        """Scan the project, reusing cached results for unchanged files.
+
+        ``use_cache=False`` re-scans everything and rewrites the cache.
+        """
+        start = time.perf_counter()
+        cache_file = self.root / CACHE_PATH
+        cached = {}
+        if use_cache and cache_file.exists():
+            try:
+                data = json.loads(cache_file.read_text(encoding="utf-8"))
+                if data.get("version") == CACHE_VERSION:
+                    cached = data.get("files", {})
+            except ValueError:
+                cached = {}
+
+        files = {}
+        for rel, stat in self.walk():
+            self.sizes[rel] = stat.st_size
+            if not should_scan(rel):
+                continue
+            key = [stat.st_mtime_ns, stat.st_size]
+            hit = cached.get(rel)
+            if hit is not None and hit.get("key") == key:
+                self.stats["cached"] += 1
+            else:
+                try:
+                    hit = {"key": key, **scan_file(self.root / rel)}
+                except (OSError, ValueError, AttributeError) as e:
+                    print(f"WARNING: could not scan {rel}: {e}", file=sys.stderr)
+                    hit = {"key": key}
+                self.stats["parsed"] += 1
+            files[rel] = hit
+        self.scans = files
+        self.stats["files"] = len(self.sizes)
+
+        if self.stats["parsed"] or len(files) != len(cached):
+            cache_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = cache_file.with_name(f".{cache_file.name}.{os.getpid()}.tmp")
+            tmp_path.write_text(
+                json.dumps({"version": CACHE_VERSION, "files": files}), encoding="utf-8"
+            )
+            os.replace(tmp_path, cache_file)
+        self._link()
+        self.stats["seconds"] = round(time.perf_counter() - start, 3)
+        return self
+
+    def _link(self):
+        uids = {}
+        for rel, scan in self.scans.items():
+            uid = scan.get("uid")
+            if not uid:
+                continue
+            if rel.endswith(".import") or rel.endswith(".uid"):
+                uids[uid] = rel.rsplit(".", 1)[0]
+            else:
+                uids[uid] = rel
+
+        self.edges = {}
+        for rel, scan in self.scans.items():
+            targets = set()
+            for ref in scan.get("refs", []):
+                target = uids.get(ref) if ref.startswith("uid://") else ref[len("res://") :]
+                if target and target != rel:
+                    targets.add(target.split("::", 1)[0])
+            for pattern in scan.get("patterns", []):
+                pattern = pattern[len("res://") :]
+                targets.update(
+                    other for other in self.sizes if other != rel and fnmatchcase(other, pattern)
+                )
+            if targets:
+                self.edges[rel] = targets
+
+    # -- queries -------------------------------------------------------------
+
+    def is_asset(self, rel):
+        return any(rel.startswith(d) for d in self.asset_dirs) and (
+            os.path.splitext(rel)[1].lower() in ASSET_SUFFIXES
+        )
+
+    def assets(self):
+        return sorted(rel for rel in self.sizes if self.is_asset(rel))
+
+    def cost(self, rel):
+        """Bytes an asset adds to an export: its imported files if present, else the source."""
+        imported = []
+        for dest in self.scans.get(rel + ".import", {}).get("dest", []):
+            path = self.root / dest[len("res://") :]
+            if path.is_file():  # .godot/imported is only there after an editor import
+                imported.append(path.stat().st_size)
+        return sum(imported) if imported else self.sizes.get(rel, 0)
+
+    def roots(self):
+        """Files Godot loads without a reference: project.godot and class_name scripts."""
+        roots = [PROJECT_FILE] if PROJECT_FILE in self.sizes else []
+        roots.extend(
+            sorted(
+                rel
+                for rel, scan in self.scans.items()
+                if scan.get("class_name") and not ROOT_SKIP_DIRS.intersection(rel.split("/")[:-1])
+            )
+        )
+        return roots
+
+    def reachable(self, starts):
+        """Every file reachable from ``starts`` through scenes, resources and scripts."""
+        seen, stack = set(starts), list(starts)
+        while stack:
+            for target in self.edges.get(stack.pop(), ()):
+                if target not in seen:
+                    seen.add(target)
+                    stack.append(target)
+        return seen
+
+    def dead_assets(self):
+        """Assets no root reaches, including cycles that only reference each other."""
+        live = self.reachable(self.roots())
+        return [rel for rel in self.assets() if rel not in live]
+
+    def transitive_assets(self, rel):
+        """Every asset reachable from ``rel`` through scenes, resources and scripts."""
+        return {
+            target
+            for target in self.reachable([rel]) - {rel}
+            if self.is_asset(target) and target in self.sizes
+        }
+
+    def scene_weights(self):
+        """[(scene, asset count, asset bytes)], heaviest first."""
+        weights = []
+        for rel in self.sizes:
+            if rel.endswith(".tscn") and not self.is_asset(rel):
+                assets = self.transitive_assets(rel)
+                weights.append((rel, len(assets), sum(self.cost(a) for a in assets)))
+        return sorted(weights, key=lambda w: (-w[2], w[0]))
+
+
+def manifest_notes(root):
+    """{asset rel path: note} from the generated-asset manifest, if there is one."""
+    path = Path(root) / MANIFEST_PATH
+    if not path.exists():
+        return {}
+    with open(path, encoding="utf-8") as f:
+        entries = json.load(f)
+    root = Path(root).resolve()
+
+    def rel(value):
+        candidate = Path(value)
+        if not candidate.is_absolute():
+            candidate = root / candidate
+        try:
+            return candidate.resolve().relative_to(root).as_posix()
+        except ValueError:
+            return None
+
+    notes = {}
+    for entry in entries if isinstance(entries, list) else []:
+        label = f"{entry.get('type')}/{entry.get('id')}"
+        for record in [entry, *entry.get("variants", [])]:
+            staged = rel(record.get("path", ""))
+            promoted = record.get("promoted_to")
+            if staged:
+                if promoted and (root / promoted).exists():
+                    notes[staged] = f"staging copy of {label}, superseded by {promoted}"
+                else:
+                    notes[staged] = f"staging copy of {label}, not promoted"
+            if promoted:
+                notes.setdefault(rel(promoted), f"promoted {label}")
+    return notes
+
+
+def format_bytes(n):
+    for unit in ("B", "KB", "MB"):
+        if n < 1024 or unit == "MB":
+            return f"{n:.0f} {unit}" if unit == "B" else f"{n:.1f} {unit}"
+        n /= 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Find dead assets and per-scene asset weight")
+    parser.add_argument(
+        "--assets", action="append", help="Asset directory (repeatable, default: assets)"
+    )
+    parser.add_argument("--top", type=int, default=15, help="Scenes to list by asset weight")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    parser.add_argument(
+        "--no-cache", action="store_true", help="Re-scan every file and rebuild the cache"
+    )
+    parser.add_argument("--root", default=str(PROJECT_ROOT))
+    args = parser.parse_args()
+
+    graph = AssetGraph(args.root, args.assets or ["assets"]).scan(use_cache=not args.no_cache)
+    notes = manifest_notes(args.root)
+    dead = [(rel, graph.cost(rel), notes.get(rel, "")) for rel in graph.dead_assets()]
+    dead.sort(key=lambda d: (-d[1], d[0]))
+    weights = graph.scene_weights()
+
+    if args.json:
+        report = {
+            "scan": graph.stats,
+            "dead_assets": [{"path": p, "bytes": b, "note": n} for p, b, n in dead],
+            "dead_bytes": sum(b for _, b, _ in dead),
+            "scenes": [{"path": p, "assets": c, "bytes": b} for p, c, b in weights],
+        }
+        print(json.dumps(report, indent=2))
+        return 0
+
+    stats = graph.stats
+    print(
+        f"Scanned {stats['files']} files in {stats['seconds']:.2f}s"
+        f" ({stats['parsed']} parsed, {stats['cached']} from cache)"
+    )
+    total = len(graph.assets())
+    dead_bytes = sum(b for _, b, _ in dead)
+    print(f"\nUnreachable assets: {len(dead)} of {total}, {format_bytes(dead_bytes)}")
+    for path, size, note in dead:
+        print(f"  {format_bytes(size):>9}  {path}" + (f"  ({note})" if note else ""))
+    print("\nHeaviest scenes (transitive asset weight):")
+    for path, count, size in weights[: args.top]:
+        print(f"  {format_bytes(size):>9}  {count:>3} asset(s)  {path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,16 +1,45 @@
 #!/usr/bin/env python3
-"""Generate heroic character sprites facing right for combat."""
+"""Generate heroic character sprites facing right for combat.
 
+Generation requests run concurrently (--concurrency, default 3) under an
+optional --rate-limit in requests per minute. Each finished image moves
+straight on to background removal while the others are still generating;
+removal uses one rembg session for the whole run (remove_background.py) and
+reports per-image latency and peak memory. If asset_worker.py is serving,
+removal runs on its already-loaded session instead (--no-worker to opt out).
+Responses are cached on disk, keyed by model, prompt and config, so
+unchanged prompts are never generated twice (--no-cache to regenerate).
+Each saved sprite gets its Godot ``.import`` file with the "character"
+settings from asset-types.json (godot_import.py; --no-import to skip).
+
+The image provider is pluggable: "gemini" (Imagen 3 via google-genai, the
+default), "local" (an offline stand-in that draws a placeholder, for
+testing the pipeline without network or API key) or "module:factory" for
+any object with ``model`` and ``generate(prompt, config) -> bytes``.
+"""
+
+import argparse
+import hashlib
+import importlib
+import io
+import json
 import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
-from google import genai
-from google.genai import types
-from PIL import Image
-import io
-from rembg import remove
+from PIL import Image, ImageDraw
+
+sys.path.insert(0, str(Path(__file__).resolve().parent / ".grok" / "skills" / "imagine-asset" / "scripts"))
+from asset_worker import connect_remover
+from godot_import import load_type_config, write_import
+from optimize_png import optimize_file
+from remove_background import BackgroundRemover
 
-# Configure API
-client = genai.Client(api_key=os.environ.get("GOOGLE_API_KEY"))
+PROJECT_ROOT = Path(__file__).resolve().parent
+DEFAULT_CACHE_DIR = PROJECT_ROOT / ".godot" / "generation_cache"  # .godot is never imported
+IMAGE_CONFIG = {"number_of_images": 1, "aspect_ratio": "1:1"}
 
 # Hero class definitions with heroic descriptions
 HEROES = {
@@ -19,77 +48,252 @@ HEROES = {
     "rogue": "A heroic, agile rogue hero with dual daggers, leather armor, facing right, dark fantasy RPG game sprite, detailed illustration style, heroic and swift, ready stance, side profile, cunning expression",
 }
 
-def generate_hero_sprite(name: str, prompt: str, output_path: Path):
-    """Generate a single hero sprite."""
-    print(f"\n{'='*60}")
-    print(f"Generating: {name}")
-    print(f"Prompt: {prompt}")
-    print(f"{'='*60}")
 
-    try:
-        # Generate image using Imagen 3
-        config = types.GenerateImagesConfig(
-            number_of_images=1,
-            aspect_ratio="1:1",
-        )
+class GeminiImageProvider:
+    """Imagen 3 through google-genai (needs GOOGLE_API_KEY)."""
+
+    model = "imagen-3.0-generate-002"
+
+    def __init__(self):
+        from google import genai
+        from google.genai import types
+
+        self.types = types
+        self.client = genai.Client(api_key=os.environ.get("GOOGLE_API_KEY"))
 
-        result = client.models.generate_images(
-            model="imagen-3.0-generate-002",
+    def generate(self, prompt: str, config: dict) -> bytes:
+        result = self.client.models.generate_images(
+            model=self.model,
             prompt=prompt,
-            config=config,
+            config=self.types.GenerateImagesConfig(**config),
         )
-
         if not result.generated_images:
-            print(f"❌ No images generated for {name}")
-            return False
+            raise RuntimeError("no images generated")
+        return result.generated_images[0].image.image_bytes
+
+
+class LocalImageProvider:
+    """Offline stand-in: a deterministic placeholder figure per prompt, after ``latency`` seconds."""
+
+    model = "local-placeholder-1"
+
+    def __init__(self, latency: float = 0.0, size: int = 1024):
+        self.latency = latency
+        self.size = size
+
+    def generate(self, prompt: str, config: dict) -> bytes:
+        time.sleep(self.latency)
+        seed = hashlib.sha256(prompt.encode("utf-8")).digest()
+        s = self.size
+        image = Image.new("RGB", (s, s), (40, 40, 48))
+        draw = ImageDraw.Draw(image)
+        body = (seed[0], seed[1], seed[2])
+        draw.ellipse((s * 0.40, s * 0.12, s * 0.60, s * 0.32), fill=(230, 190, 160))
+        draw.rectangle((s * 0.36, s * 0.32, s * 0.64, s * 0.70), fill=body)
+        draw.rectangle((s * 0.38, s * 0.70, s * 0.47, s * 0.92), fill=body)
+        draw.rectangle((s * 0.53, s * 0.70, s * 0.62, s * 0.92), fill=body)
+        draw.polygon([(s * 0.64, s * 0.40), (s * 0.90, s * 0.34), (s * 0.64, s * 0.48)], fill=(200, 200, 210))
+        out = io.BytesIO()
+        image.save(out, "PNG")
+        return out.getvalue()
+
+
+def load_provider(spec: str, local_latency: float = 0.0):
+    """Provider for ``gemini``, ``local`` or ``module:factory``."""
+    if spec == "gemini":
+        return GeminiImageProvider()
+    if spec == "local":
+        return LocalImageProvider(latency=local_latency)
+    module_name, _, attr = spec.partition(":")
+    if not attr:
+        raise ValueError(f"Unknown provider {spec!r} (use gemini, local or module:factory)")
+    return getattr(importlib.import_module(module_name), attr)()
+
 
-        # Get the image
-        image_bytes = result.generated_images[0].image.image_bytes
-        print(f"✓ Generated image: {len(image_bytes)} bytes")
+def cache_key(model: str, prompt: str, config: dict) -> str:
+    payload = json.dumps({"model": model, "prompt": prompt, "config": config}, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
 
-        # Remove background
-        print("  Removing background...")
-        image = Image.open(io.BytesIO(image_bytes))
-        output_image = remove(image)
 
-        # Save
-        output_path.parent.mkdir(parents=True, exist_ok=True)
-        output_image.save(output_path, "PNG")
-        print(f"✓ Saved to: {output_path}")
+class ResponseCache:
+    """Generated image bytes on disk, one file per (model, prompt, config)."""
 
-        return True
+    def __init__(self, directory: Path):
+        self.directory = Path(directory)
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}.img"
+
+    def get(self, key: str):
+        path = self._path(key)
+        return path.read_bytes() if path.is_file() else None
+
+    def put(self, key: str, data: bytes) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self._path(key)
+        tmp_path = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp_path.write_bytes(data)
+        os.replace(tmp_path, path)
+
+
+class RateLimiter:
+    """Spaces calls at least 60/per_minute seconds apart across threads (0 = unlimited)."""
+
+    def __init__(self, per_minute: float = 0.0):
+        self.interval = 60.0 / per_minute if per_minute > 0 else 0.0
+        self.next_slot = 0.0
+        self.lock = threading.Lock()
+
+    def wait(self) -> None:
+        if not self.interval:
+            return
+        with self.lock:
+            now = time.monotonic()
+            slot = max(now, self.next_slot)
+            self.next_slot = slot + self.interval
+        time.sleep(max(0.0, slot - now))
+
+
+def fetch_image(name: str, prompt: str, provider, cache, limiter: RateLimiter) -> dict:
+    """Generate (or load from cache) the raw image for one hero."""
+    key = cache_key(provider.model, prompt, IMAGE_CONFIG)
+    data = cache.get(key) if cache else None
+    if data is not None:
+        return {"name": name, "image_bytes": data, "cached": True, "generate_seconds": 0.0}
+    limiter.wait()
+    start = time.perf_counter()
+    data = provider.generate(prompt, dict(IMAGE_CONFIG))
+    seconds = time.perf_counter() - start
+    if cache:
+        cache.put(key, data)
+    return {"name": name, "image_bytes": data, "cached": False, "generate_seconds": seconds}
+
+
+def finish_sprite(fetched: dict, output_path: Path, optimize: bool = False, remover: BackgroundRemover | None = None, import_cfg: dict | None = None) -> dict:
+    """Background removal (if ``remover``), save, optional optimize and Godot .import (if ``import_cfg``) for a fetched image."""
+    start = time.perf_counter()
+    image = Image.open(io.BytesIO(fetched["image_bytes"]))
+    if remover is not None:
+        image = remover.remove(image, label=fetched["name"])
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    image.save(output_path, "PNG")
+    result = {"path": str(output_path), "process_seconds": time.perf_counter() - start}
+    if optimize:
+        # rembg leaves colored fringes under alpha=0; bleed them before encoding
+        result["bytes_saved"] = optimize_file(output_path, bleed_radius=2)["bytes_saved"]
+    if import_cfg is not None:
+        result["import"] = write_import(PROJECT_ROOT, output_path, import_cfg)
+    return result
+
+
+def generate_all(heroes: dict, output_dir: Path, provider, cache=None, concurrency: int = 3, rate_limit: float = 0.0, optimize: bool = False, remover: BackgroundRemover | None = None, import_cfg: dict | None = None) -> dict:
+    """Generate many sprites: requests run on ``concurrency`` threads and each
+    result goes to background removal as soon as it arrives.
+
+    Returns {name: result dict or {"error": ...}}.
+    """
+    limiter = RateLimiter(rate_limit)
+    results = {}
+    # The remover runs rembg on its own single worker (onnxruntime is already
+    # multi-threaded); these threads only decode, save and optimize around it.
+    with ThreadPoolExecutor(max(1, concurrency)) as fetch_pool, ThreadPoolExecutor(max(1, concurrency)) as process_pool:
+        fetches = {fetch_pool.submit(fetch_image, name, prompt, provider, cache, limiter): name for name, prompt in heroes.items()}
+        processing = {}
+        for future in as_completed(fetches):
+            name = fetches[future]
+            try:
+                fetched = future.result()
+            except Exception as e:
+                results[name] = {"error": f"{type(e).__name__}: {e}"}
+                print(f"❌ Failed to generate {name}: {e}")
+                continue
+            note = "cached" if fetched["cached"] else f"{fetched['generate_seconds']:.1f}s"
+            print(f"✓ {name}: {len(fetched['image_bytes'])} bytes ({note})")
+            results[name] = {"cached": fetched["cached"], "generate_seconds": fetched["generate_seconds"]}
+            processing[process_pool.submit(finish_sprite, fetched, output_dir / f"{name}.png", optimize, remover, import_cfg)] = name
+        for future in as_completed(processing):
+            name = processing[future]
+            try:
+                results[name].update(future.result())
+                print(f"✓ Saved to: {results[name]['path']} ({results[name]['process_seconds']:.1f}s)")
+            except Exception as e:
+                results[name] = {"error": f"{type(e).__name__}: {e}"}
+                print(f"❌ Failed to process {name}: {e}")
+    return results
 
-    except Exception as e:
-        print(f"❌ Failed to generate {name}: {e}")
-        return False
 
 def main():
     """Generate all hero sprites."""
-    project_root = Path(__file__).parent
-    assets_dir = project_root / "assets"
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--optimize", action="store_true", help="Re-encode sprites with optimize_png")
+    parser.add_argument("--provider", default="gemini", help="gemini, local or module:factory")
+    parser.add_argument("--local-latency", type=float, default=0.0, help="Simulated seconds per request for --provider local")
+    parser.add_argument("--concurrency", type=int, default=3, help="Generation requests in flight")
+    parser.add_argument("--rate-limit", type=float, default=0.0, help="Max requests per minute (0 = unlimited)")
+    parser.add_argument("--cache-dir", default=str(DEFAULT_CACHE_DIR), help="Response cache directory")
+    parser.add_argument("--no-cache", action="store_true", help="Always call the provider")
+    parser.add_argument("--keep-background", action="store_true", help="Skip rembg background removal")
+    parser.add_argument("--rembg-model", default="u2net", help="rembg model for background removal")
+    parser.add_argument("--no-worker", action="store_true", help="Load rembg here even if asset_worker.py is serving")
+    parser.add_argument("--no-import", action="store_true", help="Do not write Godot .import files")
+    parser.add_argument("--output-dir", default=str(PROJECT_ROOT / "assets"))
+    args = parser.parse_args()
+
+    provider = load_provider(args.provider, args.local_latency)
+    cache = None if args.no_cache else ResponseCache(Path(args.cache_dir))
 
     print("="*60)
     print("Hero Sprite Generation")
     print("Generating heroic sprites facing right")
+    print(f"Provider: {provider.model}, concurrency {args.concurrency}" + (f", {args.rate_limit:g}/min" if args.rate_limit else ""))
     print("="*60)
 
-    success_count = 0
-    failed = []
-
-    for name, prompt in HEROES.items():
-        output_path = assets_dir / f"{name}.png"
-        if generate_hero_sprite(name, prompt, output_path):
-            success_count += 1
+    # One rembg session for the whole run, built before any request goes out,
+    # unless a running asset worker already has one loaded.
+    remover = None
+    if not args.keep_background:
+        remover = None if args.no_worker else connect_remover(args.rembg_model)
+        if remover is not None:
+            print("Background removal: using the running asset worker")
         else:
-            failed.append(name)
+            try:
+                remover = BackgroundRemover(args.rembg_model)
+            except RuntimeError as e:
+                raise SystemExit(f"❌ {e}; or pass --keep-background")
+    start = time.perf_counter()
+    try:
+        results = generate_all(
+            HEROES,
+            Path(args.output_dir),
+            provider,
+            cache=cache,
+            concurrency=args.concurrency,
+            rate_limit=args.rate_limit,
+            optimize=args.optimize,
+            remover=remover,
+            import_cfg=None if args.no_import else load_type_config("character"),
+        )
+    finally:
+        if remover is not None:
+            remover.close()
+    wall = time.perf_counter() - start
+
+    failed = [name for name, result in results.items() if "error" in result]
+    cached = sum(1 for result in results.values() if result.get("cached"))
 
     print("\n" + "="*60)
     print("SUMMARY")
     print("="*60)
-    print(f"✓ Successfully generated: {success_count}/{len(HEROES)}")
+    print(f"✓ Successfully generated: {len(HEROES) - len(failed)}/{len(HEROES)} ({cached} from cache) in {wall:.1f}s")
     if failed:
         print(f"❌ Failed: {', '.join(failed)}")
+    if remover is not None:
+        stats = remover.summary()
+        print(f"Background removal: session {stats['session_setup_seconds']}s, p50 {stats['latency_ms_p50']} ms, max {stats['latency_ms_max']} ms, peak RSS {stats['peak_rss_mb']} MB")
+        for record in remover.records:
+            print(f"  {record['label']}: {record['seconds'] * 1000:.0f} ms")
     print("="*60)
+    return 1 if failed else 0
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
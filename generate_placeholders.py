@@ -1,6 +1,68 @@
-from PIL import Image, ImageDraw
+"""Generate placeholder UI art (9-slice frames, item and class icons) from a spec.
 
-def create_9_slice_frame(path, size, border_width, color, bg_color):
+The outputs are listed in placeholders.json: a path, a ``kind`` (frame,
+sword, class_icon) and its size/color parameters, with shared ``defaults``.
+``sword`` and ``class_icon`` outputs are the VECTOR_ICONS of the same name
+(``icon`` for class_icon), rendered like the icon sets below.
+
+``icon_sets`` emit whole vector icon sets (icons x sizes x theme colors)
+in one invocation. Each icon is drawn once as a coverage mask at
+``supersample`` times the set's largest size, downsampled once per size
+and then tinted per color, so small sizes are anti-aliased and no size
+needs its own drawing code. See VECTOR_ICONS. The default spec has none;
+a set is added to the spec like this:
+
+    "icon_sets": [
+      {
+        "icons": ["warrior", "mage", "rogue", "hero", "sword"],
+        "sizes": [32, 64],
+        "colors": {"gold": "#C4A87A", "muted": "#7D8A86"},
+        "supersample": 4,
+        "path": "ui/icons/placeholder/{icon}_{color}_{size}.png"
+      }
+    ]
+
+Runs are incremental:
+
+- an output is only rendered when its spec entry, the generator version
+  or --optimize changed, or the file was modified since the last run
+  (state is kept in .godot/placeholder_state.json next to the spec);
+- rendering runs in parallel (--workers), and a rendered PNG whose bytes
+  equal the file on disk is not written, so its mtime stays put and Godot
+  does not reimport it on startup;
+- an existing file the generator has no record of (e.g. real art that
+  replaced a placeholder) is left alone unless --force is given.
+
+Every rendered output also gets its Godot ``.import`` file (godot_import.py)
+with the settings of its ``import_type`` from asset-types.json (default
+"ui"), so Godot imports it once with the right settings (--no-import to
+skip).
+"""
+
+import argparse
+import hashlib
+import io
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from PIL import Image, ImageColor, ImageDraw
+
+sys.path.insert(0, str(Path(__file__).resolve().parent / ".grok" / "skills" / "imagine-asset" / "scripts"))
+from godot_import import load_type_config, write_import
+from optimize_png import encode_candidates
+
+PROJECT_ROOT = Path(__file__).resolve().parent
+DEFAULT_SPEC = PROJECT_ROOT / "placeholders.json"
+STATE_PATH = Path(".godot") / "placeholder_state.json"  # relative to the spec's directory
+# Bump when any render_* function changes its pixels.
+GENERATOR_VERSION = 3
+SUPERSAMPLE = 4
+
+def render_9_slice_frame(size, border_width, color, bg_color):
     """Creates a 9-slice compatible frame."""
     img = Image.new("RGBA", (size, size), (0, 0, 0, 0))
     draw = ImageDraw.Draw(img)
@@ -11,74 +73,280 @@ def create_9_slice_frame(path, size, border_width, color, bg_color):
     # Draw border
     draw.rectangle([(0, 0), (size - 1, size - 1)], outline=color, width=border_width)
 
-    img.save(path)
-    print(f"Generated {path}")
+    return img
 
-def create_sword_icon(path, size, color):
-    """Creates a simple sword icon."""
-    img = Image.new("RGBA", (size, size), (0, 0, 0, 0))
-    draw = ImageDraw.Draw(img)
+# Vector icons on a 64x64 design grid: (shape, points or box, stroke width, ...).
+DESIGN_GRID = 64
+VECTOR_ICONS = {
+    "sword": [
+        ("polygon", [(32, 5), (36, 12), (35.5, 44), (28.5, 44), (28, 12)]),
+        ("line", [(21, 46), (43, 46)], 5),
+        ("line", [(32, 48), (32, 56)], 5),
+        ("ellipse", (28, 54, 36, 62)),
+    ],
+    "mage": [
+        ("line", [(32, 60), (32, 18)], 4),
+        ("ellipse", (24, 4, 40, 20)),
+        ("arc", (19, 1, 45, 27), 200, 340, 3),
+        ("line", [(26, 24), (38, 24)], 3),
+    ],
+    "rogue": [
+        ("polygon", [(32, 8), (35, 14), (34.5, 36), (29.5, 36), (29, 14)]),
+        ("line", [(24, 38), (40, 38)], 4),
+        ("line", [(32, 40), (32, 53)], 4),
+        ("ellipse", (28.5, 52, 35.5, 59)),
+    ],
+    "hero": [
+        ("polygon_outline", [(12, 10), (52, 10), (52, 32), (32, 57), (12, 32)], 4),
+        ("line", [(14, 27), (50, 27)], 3),
+        ("line", [(32, 12), (32, 54)], 3),
+    ],
+}
+VECTOR_ICONS["warrior"] = VECTOR_ICONS["sword"]
 
-    # Hilt
-    draw.line([(size // 2, size - 5), (size // 2, size - 15)], fill=color, width=3)
-    draw.line([(size // 2 - 5, size - 15), (size // 2 + 5, size - 15)], fill=color, width=3)
+def render_icon_mask(icon, master):
+    """Coverage mask (mode L) of a vector icon drawn at ``master`` px."""
+    scale = master / DESIGN_GRID
+    mask = Image.new("L", (master, master), 0)
+    draw = ImageDraw.Draw(mask)
+    for shape in VECTOR_ICONS[icon]:
+        kind, geometry = shape[0], shape[1]
+        if kind in ("line", "polygon", "polygon_outline"):
+            points = [(x * scale, y * scale) for x, y in geometry]
+        else:
+            box = [v * scale for v in geometry]
+        if kind == "line":
+            width = max(1, round(shape[2] * scale))
+            draw.line(points, fill=255, width=width, joint="curve")
+            for x, y in (points[0], points[-1]):  # round caps
+                draw.ellipse((x - width / 2, y - width / 2, x + width / 2, y + width / 2), fill=255)
+        elif kind == "polygon":
+            draw.polygon(points, fill=255)
+        elif kind == "polygon_outline":
+            draw.polygon(points, outline=255, width=max(1, round(shape[2] * scale)))
+        elif kind == "ellipse":
+            draw.ellipse(box, fill=255)
+        elif kind == "arc":
+            draw.arc(box, shape[2], shape[3], fill=255, width=max(1, round(shape[4] * scale)))
+    return mask
 
-    # Blade
-    draw.line([(size // 2, size - 16), (size // 2, 5)], fill=color, width=3)
-    draw.point((size // 2, 4), fill=color)
+def tint(mask, color):
+    """Solid ``color`` with ``mask`` as alpha."""
+    rgb = ImageColor.getrgb(color)[:3]
+    img = Image.new("RGBA", mask.size, rgb + (0,))
+    img.putalpha(mask)
+    return img
 
+def render_vector_icon_set(icon, master, sizes, colors):
+    """{(size, color): RGBA image}: one master render, one downsample per size."""
+    mask = render_icon_mask(icon, master)
+    images = {}
+    for size in sorted(set(sizes)):
+        small = mask if size == master else mask.resize((size, size), Image.Resampling.LANCZOS, reducing_gap=3.0)
+        for color in colors:
+            images[(size, color)] = tint(small, color)
+    return images
 
-    img.save(path)
-    print(f"Generated {path}")
+KINDS = {
+    "frame": lambda e: render_9_slice_frame(e["size"], e["border_width"], e["color"], e["bg_color"]),
+    "vector_icon": lambda e: render_vector_icon_set(e["icon"], e["master"], [e["size"]], [e["color"]])[(e["size"], e["color"])],
+}
 
-def create_class_icon(path, size, color, icon_type):
-    """Creates a simple class icon based on type."""
-    img = Image.new("RGBA", (size, size), (0, 0, 0, 0))
-    draw = ImageDraw.Draw(img)
+def expand_icon_set(icon_set):
+    """Spec entries for every icon x size x color of an ``icon_sets`` item.
 
-    if icon_type == "warrior":
-        # Sword icon for warrior
-        draw.line([(size // 2, size - 5), (size // 2, size - 15)], fill=color, width=3)
-        draw.line([(size // 2 - 5, size - 15), (size // 2 + 5, size - 15)], fill=color, width=3)
-        draw.line([(size // 2, size - 16), (size // 2, 5)], fill=color, width=3)
-        draw.point((size // 2, 4), fill=color)
-
-    elif icon_type == "mage":
-        # Staff icon for mage
-        draw.line([(size // 2, size - 5), (size // 2, 5)], fill=color, width=3)
-        draw.ellipse([(size // 2 - 3, 5), (size // 2 + 3, 11)], fill=color)
-        draw.line([(size // 2 - 2, 8), (size // 2 + 2, 8)], fill=color, width=2)
-
-    elif icon_type == "rogue":
-        # Dagger icon for rogue
-        draw.line([(size // 2, size - 5), (size // 2, 10)], fill=color, width=2)
-        draw.line([(size // 2 - 3, 10), (size // 2 + 3, 10)], fill=color, width=2)
-        draw.line([(size // 2, 10), (size // 2, 5)], fill=color, width=2)
-
-    elif icon_type == "hero":
-        # Shield icon for hero
-        draw.arc([(10, 10), (size - 10, size - 10)], 0, 180, fill=color, width=3)
-        draw.line([(10, size // 2), (size - 10, size // 2)], fill=color, width=3)
-
-    img.save(path)
-    print(f"Generated {path}")
+    ``colors`` maps a theme name to a color; ``path`` is formatted with
+    {icon}, {size} and {color} (the theme name).
+    """
+    sizes = icon_set["sizes"]
+    master = max(sizes) * icon_set.get("supersample", SUPERSAMPLE)
+    entries = []
+    for icon in icon_set["icons"]:
+        if icon not in VECTOR_ICONS:
+            raise SystemExit(f"icon_sets: unknown vector icon {icon!r}")
+        for size in sizes:
+            for theme, color in icon_set["colors"].items():
+                entries.append({
+                    "path": icon_set["path"].format(icon=icon, size=size, color=theme),
+                    "kind": "vector_icon",
+                    "icon": icon,
+                    "size": size,
+                    "color": color,
+                    "master": master,
+                })
+    return entries
 
-if __name__ == "__main__":
-    assets_dir = "assets/"
-    main_color = "#C4A87A"  # Gold
-    bg_color = "#101919"    # Dark Blue/Green
+def as_vector_icon(entry):
+    """A ``sword``/``class_icon`` output as its supersampled vector_icon entry."""
+    icon = "sword" if entry["kind"] == "sword" else entry.get("icon")
+    if icon not in VECTOR_ICONS:
+        raise SystemExit(f"{entry.get('path')}: unknown vector icon {icon!r}")
+    master = entry["size"] * entry.get("supersample", SUPERSAMPLE)
+    return {**entry, "kind": "vector_icon", "icon": icon, "master": master}
 
-    # Main Frame
-    create_9_slice_frame(f"{assets_dir}frame_main.png", 64, 4, main_color, bg_color)
+def load_spec(path):
+    """Spec entries with defaults applied, each with its resolved ``output`` path."""
+    with open(path, encoding="utf-8") as f:
+        spec = json.load(f)
+    output_dir = Path(path).resolve().parent / spec.get("output_dir", "assets")
+    entries = []
+    items = list(spec.get("outputs", []))
+    for icon_set in spec.get("icon_sets", []):
+        items.extend(expand_icon_set(icon_set))
+    for item in items:
+        entry = {**spec.get("defaults", {}), **item}
+        if entry.get("kind") in ("sword", "class_icon"):
+            entry = as_vector_icon(entry)
+        if entry.get("kind") not in KINDS:
+            raise SystemExit(f"{path}: {entry.get('path')}: unknown kind {entry.get('kind')!r}")
+        entry["output"] = str(output_dir / entry["path"])
+        entries.append(entry)
+    return entries
 
-    # Slot Frame
-    create_9_slice_frame(f"{assets_dir}frame_slot.png", 32, 2, main_color, bg_color)
+def spec_hash(entry, optimize):
+    params = {k: v for k, v in entry.items() if k != "output"}
+    if entry["kind"] == "vector_icon":
+        params["shapes"] = VECTOR_ICONS[entry["icon"]]  # editing an icon re-renders it
+    payload = json.dumps({"generator": GENERATOR_VERSION, "optimize": optimize, **params}, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
 
-    # Sword Icon
-    create_sword_icon(f"{assets_dir}icon_sword.png", 32, main_color)
+def encode_png(img, optimize=False):
+    """PNG bytes for ``img``; with ``optimize`` the smallest optimize_png encoding."""
+    if optimize:
+        return min((data for _, data in encode_candidates(img)), key=len)
+    out = io.BytesIO()
+    img.save(out, "PNG")
+    return out.getvalue()
+
+def _render_job(job):
+    """Render one group of entries; returns [(png bytes, seconds)] in group order.
+
+    A group is either a single entry or every pending vector_icon entry
+    that shares an icon and master size, which are rendered together.
+    """
+    entries, optimize = job
+    start = time.perf_counter()
+    if entries[0]["kind"] == "vector_icon":
+        first = entries[0]
+        images = render_vector_icon_set(first["icon"], first["master"], [e["size"] for e in entries], [e["color"] for e in entries])
+        images = [images[(e["size"], e["color"])] for e in entries]
+    else:
+        images = [KINDS[entries[0]["kind"]](entries[0])]
+    data = [encode_png(img, optimize) for img in images]
+    seconds = (time.perf_counter() - start) / len(entries)
+    return [(d, seconds) for d in data]
+
+def group_entries(entries):
+    """[[entry index, ...]] render groups (see _render_job), in first-seen order."""
+    groups = {}
+    for i, entry in enumerate(entries):
+        key = ("vector_icon", entry["icon"], entry["master"]) if entry["kind"] == "vector_icon" else i
+        groups.setdefault(key, []).append(i)
+    return list(groups.values())
+
+def render_all(entries, optimize=False, workers=None):
+    """Render entries on a process pool; returns [(png bytes, seconds)] in input order."""
+    groups = group_entries(entries)
+    jobs = [([entries[i] for i in group], optimize) for group in groups]
+    workers = max(1, min(workers or os.cpu_count() or 1, len(jobs) or 1))
+    if workers == 1:
+        rendered = [_render_job(job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            rendered = list(pool.map(_render_job, jobs))
+    results = [None] * len(entries)
+    for group, outputs in zip(groups, rendered):
+        for i, output in zip(group, outputs):
+            results[i] = output
+    return results
+
+def load_state(root):
+    try:
+        with open(root / STATE_PATH, encoding="utf-8") as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return state.get("outputs", {})
+
+def save_state(root, outputs):
+    state_path = root / STATE_PATH
+    state_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = state_path.with_name(f".{state_path.name}.{os.getpid()}.tmp")
+    tmp_path.write_text(json.dumps({"outputs": outputs}, indent=2, sort_keys=True), encoding="utf-8")
+    os.replace(tmp_path, state_path)
+
+def file_stamp(path):
+    stat = path.stat()
+    return [stat.st_mtime_ns, stat.st_size]
+
+def write_if_changed(path, data):
+    """Write ``data`` atomically unless the file already holds exactly these bytes."""
+    if path.is_file() and path.stat().st_size == len(data) and path.read_bytes() == data:
+        return False
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    tmp_path.write_bytes(data)
+    os.replace(tmp_path, path)
+    return True
+
+def generate(entries, root=PROJECT_ROOT, optimize=False, workers=None, force=False, imports=True):
+    """Bring every spec output up to date. Returns {status: [paths relative to root]}.
+
+    ``report["imports"]`` counts the godot_import.write_import() results for
+    the rendered outputs; up-to-date outputs are not touched at all.
+    """
+    state = load_state(root)
+    report = {"written": [], "unchanged": [], "up_to_date": [], "skipped": [], "imports": {}}
+    import_types = {}
+    pending = []
+    for entry in entries:
+        path = Path(entry["output"])
+        key = os.path.relpath(path, root).replace("\\", "/")
+        record = state.get(key)
+        digest = spec_hash(entry, optimize)
+        if not force and path.is_file():
+            if record is None:
+                report["skipped"].append(key)
+                continue
+            if record["spec"] == digest and record["stamp"] == file_stamp(path):
+                report["up_to_date"].append(key)
+                continue
+        pending.append((entry, path, key, digest))
+
+    for (entry, path, key, digest), (data, seconds) in zip(pending, render_all([p[0] for p in pending], optimize, workers)):
+        changed = write_if_changed(path, data)
+        report["written" if changed else "unchanged"].append(key)
+        if imports:
+            import_type = entry.get("import_type", "ui")
+            if import_type not in import_types:
+                import_types[import_type] = load_type_config(import_type)
+            status = write_import(root, path, import_types[import_type])
+            report["imports"][status] = report["imports"].get(status, 0) + 1
+        state[key] = {"spec": digest, "stamp": file_stamp(path)}
+        print(f"{'Generated' if changed else 'Unchanged'} {key} ({seconds * 1000:.1f} ms{', optimized' if optimize else ''})")
+
+    if pending:
+        save_state(root, state)
+    return report
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate placeholder UI art")
+    parser.add_argument("--spec", default=str(DEFAULT_SPEC), help="Placeholder spec (default placeholders.json)")
+    parser.add_argument("--optimize", action="store_true", help="Losslessly re-encode outputs with optimize_png")
+    parser.add_argument("--workers", type=int, default=None, help="Process pool size")
+    parser.add_argument("--force", action="store_true", help="Re-render everything and overwrite files this generator did not write")
+    parser.add_argument("--no-import", action="store_true", help="Do not write Godot .import files")
+    args = parser.parse_args()
 
-    # Class Icons
-    create_class_icon(f"{assets_dir}ui/icons/warrior.png", 64, main_color, "warrior")
-    create_class_icon(f"{assets_dir}ui/icons/mage.png", 64, main_color, "mage")
-    create_class_icon(f"{assets_dir}ui/icons/rogue.png", 64, main_color, "rogue")
-    create_class_icon(f"{assets_dir}ui/icons/hero.png", 64, main_color, "hero")
+    start = time.perf_counter()
+    root = Path(args.spec).resolve().parent
+    report = generate(load_spec(args.spec), root, optimize=args.optimize, workers=args.workers, force=args.force, imports=not args.no_import)
+    for key in report["skipped"]:
+        print(f"Skipped {key} (not written by this generator; --force to overwrite)")
+    print(
+        f"{len(report['written'])} written, {len(report['unchanged'])} unchanged,"
+        f" {len(report['up_to_date'])} up to date, {len(report['skipped'])} skipped"
+        f" in {time.perf_counter() - start:.2f}s"
+    )
+    if report["imports"]:
+        print(f"Godot import metadata: {json.dumps(report['imports'])}")
@@ -2,100 +2,93 @@
 """
 UIButton Migration Script
 Replaces regular Button nodes with UIButton component instances in Godot scene files.
+
+A fixed rule for migrate_scenes.py: each scene is read once into a
+tscn_parser.SceneIndex, edited in memory and written back atomically, with
+files processed on a process pool. The new ext_resource id is allocated
+across every existing ext_resource (numeric or Godot 4 string ids).
+
+A scene that already references ui_button.tscn counts as migrated and is
+left alone; the plain Buttons it still has are intentional.
+
+Usage:
+    python migrate_buttons.py [--check]
+
+--check writes nothing and exits 1 if any scene would change (for CI).
 """
 
-import os
-import re
+import argparse
 import glob
+import sys
+
+from migrate_scenes import Rule, migrate_files
+
+UI_BUTTON_PATH = "res://scenes/components/ui_button.tscn"
+UI_BUTTON_UID = "uid://banlt66gdvndq"
+UI_BUTTON_RULE = Rule(
+    {
+        "name": "ui-button",
+        "match": {"type": "Button"},
+        "instance": {"path": UI_BUTTON_PATH, "uid": UI_BUTTON_UID},
+        "skip_migrated": True,
+    }
+)
 
 
 def migrate_scene_file(scene_path):
-    """Migrate a single scene file to use UIButton components."""
-    with open(scene_path, "r") as f:
-        content = f.read()
-
-    # Check if already migrated
-    if "ui_button.tscn" in content:
-        print(f"Already migrated: {scene_path}")
-        return False
-
-    # Find all Button nodes
-    button_pattern = r'\[node name="([^"]+)" type="Button" parent="([^"]+)"\]'
-    buttons = re.findall(button_pattern, content)
-
-    if not buttons:
-        print(f"No buttons found: {scene_path}")
-        return False
-
-    # Add external resource reference
-    ext_resource_pattern = r'(\[ext_resource type="Script" path="[^"]+" id="(\d+)"\])'
-    ext_resources = re.findall(ext_resource_pattern, content)
-
-    # Find the highest ID number
-    max_id = 0
-    for _, id_str in ext_resources:
-        max_id = max(max_id, int(id_str))
-
-    new_id = max_id + 1
-
-    if ext_resources:
-        # Insert after the last ext_resource
-        last_ext_resource = ext_resources[-1][0]
-        new_ext_resource = f'\n[ext_resource type="PackedScene" uid="uid://banlt66gdvndq" path="res://scenes/components/ui_button.tscn" id="{new_id}"]'
-        content = content.replace(
-            last_ext_resource, last_ext_resource + new_ext_resource
-        )
-    else:
-        # No ext_resources found, add at the beginning
-        header_end = content.find("\n\n[node name=")
-        if header_end == -1:
-            print(f"Could not find header end in {scene_path}")
-            return False
-
-        new_ext_resource = f'[ext_resource type="PackedScene" uid="uid://banlt66gdvndq" path="res://scenes/components/ui_button.tscn" id="{new_id}"]\n\n'
-        content = content[:header_end] + new_ext_resource + content[header_end:]
-
-    # Replace Button nodes with UIButton instances
-    for button_name, parent in buttons:
-        old_pattern = rf'\[node name="{button_name}" type="Button" parent="{parent}"\]'
-        new_pattern = rf'[node name="{button_name}" parent="{parent}" instance=ExtResource("{new_id}")]'
-        content = re.sub(old_pattern, new_pattern, content)
-
-    # Write back
-    with open(scene_path, "w") as f:
-        f.write(content)
-
-    print(f"Migrated {len(buttons)} buttons in: {scene_path}")
-    return True
+    """Migrate a single scene file to use UIButton components.
+
+    Returns the number of buttons replaced (0 if the file was left alone).
+    """
+    (result,) = migrate_files([scene_path], [UI_BUTTON_RULE], workers=1)
+    return report(result)
+
+
+def report(result, verb="Migrated"):
+    if result.get("error"):
+        print(f"Could not migrate {result['path']}: {result['error']}")
+        return 0
+    if UI_BUTTON_RULE.name in result["skipped"]:
+        print(f"Already migrated: {result['path']}")
+        return 0
+    count = result["changes"].get(UI_BUTTON_RULE.name, 0)
+    if not count:
+        print(f"No buttons found: {result['path']}")
+        return 0
+    print(f"{verb} {count} buttons in: {result['path']}")
+    return count
 
 
 def main():
     """Main migration function."""
+    parser = argparse.ArgumentParser(description="Replace Button nodes with UIButton instances")
+    parser.add_argument(
+        "--check", action="store_true", help="Write nothing; exit 1 if any scene would change"
+    )
+    args = parser.parse_args()
+
     # Find all scene files in scenes/ui/
     scene_files = glob.glob("scenes/ui/*.tscn")
 
     migrated_count = 0
     total_buttons = 0
 
-    for scene_file in scene_files:
-        # Skip already migrated files
-        with open(scene_file, "r") as f:
-            if "ui_button.tscn" in f.read():
-                continue
-
-        # Count buttons before migration
-        with open(scene_file, "r") as f:
-            content = f.read()
-            buttons_before = len(re.findall(r'type="Button"', content))
-
-        if migrate_scene_file(scene_file):
+    results = migrate_files(scene_files, [UI_BUTTON_RULE], dry_run=args.check)
+    for result in results:
+        count = report(result, "Would migrate" if args.check else "Migrated")
+        if count:
             migrated_count += 1
-            total_buttons += buttons_before
+            total_buttons += count
+
+    if args.check:
+        print(f"\n{migrated_count} file(s) would change ({total_buttons} buttons)")
+        return 1 if migrated_count else 0
 
-    print(f"\nMigration complete!")
+    print("\nMigration complete!")
     print(f"Files migrated: {migrated_count}")
     print(f"Total buttons replaced: {total_buttons}")
+    return 0
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
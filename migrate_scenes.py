@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+"""
+Scene Migration Engine
+Applies declarative node rules to Godot scene files across the whole project.
+
+Rules live in a JSON file (a list, or {"rules": [...]}). Each rule matches
+nodes and then applies any of its actions, in this order:
+
+    {
+      "name": "buttons-to-ui-button",
+      "files": ["scenes/ui/*.tscn"],
+      "match": {"type": "Button", "name": "*Button", "properties": {"flat": "true"}},
+      "instance": {"path": "res://scenes/components/ui_button.tscn",
+                   "uid": "uid://banlt66gdvndq"},
+      "set": {"focus_mode": "2"},
+      "strip": ["theme_override_styles/*"],
+      "skip_migrated": true
+    }
+
+- ``files``: globs on the project-relative path (default: every scene).
+- ``match``: ``type``, ``name``, ``parent`` and ``instance`` (the instanced
+  scene's res:// path) are fnmatch patterns; ``properties`` maps a body
+  property to a pattern on its raw value ("*" = present at all). Every
+  given key must match. Root nodes are never turned into instances.
+- ``instance``: replace the node's type with an instance of a PackedScene,
+  reusing the scene's ext_resource if the file already has one.
+- ``set``: body properties to write, as raw Godot values ('"Text"', "2").
+- ``strip``: body properties to remove (fnmatch patterns).
+- ``skip_migrated``: leave a scene alone if it already has an ext_resource
+  for ``instance.path``; nodes that still match there were kept on purpose.
+
+Files are processed on a process pool; each is read once, edited in memory
+via tscn_parser.SceneIndex and written back atomically (temp file + rename).
+--dry-run prints a unified diff instead of writing. Every file reports its
+own timing.
+
+Usage:
+    python migrate_scenes.py RULES.json [PATH ...] [--dry-run] [--workers N]
+
+PATH defaults to the project root; directories are searched for *.tscn.
+"""
+
+import argparse
+import difflib
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from fnmatch import fnmatchcase
+from pathlib import Path
+
+from tscn_parser import SceneIndex
+
+PROJECT_ROOT = Path(__file__).resolve().parent
+SKIP_DIRS = {".godot", ".git", "archive"}
+
+
+class Rule:
+    """One migration rule built from its JSON spec."""
+
+    def __init__(self, spec):
+        self.spec = spec
+        self.name = spec.get("name", "rule")
+        self.files = spec.get("files") or ["*.tscn"]
+        self.match = spec.get("match", {})
+        self.instance = spec.get("instance")
+        self.set = spec.get("set", {})
+        self.strip = spec.get("strip", [])
+        self.skip_migrated = bool(spec.get("skip_migrated"))
+        if not (self.instance or self.set or self.strip):
+            raise ValueError(f"Rule {self.name!r} has no instance, set or strip action")
+        if self.instance and "path" not in self.instance:
+            raise ValueError(f"Rule {self.name!r}: instance needs a res:// path")
+        if self.skip_migrated and not self.instance:
+            raise ValueError(f"Rule {self.name!r}: skip_migrated needs an instance action")
+
+    def applies_to(self, rel_path):
+        return any(fnmatchcase(rel_path, pattern) for pattern in self.files)
+
+    def migrated(self, index):
+        """True if ``skip_migrated`` is set and the scene already uses the instance."""
+        return self.skip_migrated and index.ext_resource_by_path(self.instance["path"]) is not None
+
+    def matches(self, index, node):
+        for key in ("type", "name", "parent"):
+            pattern = self.match.get(key)
+            if pattern is not None and not fnmatchcase(getattr(node, key) or "", pattern):
+                return False
+        pattern = self.match.get("instance")
+        if pattern is not None:
+            ext = index.ext_resources.get(node.instance) if node.instance else None
+            if ext is None or not fnmatchcase(ext.get("path", ""), pattern):
+                return False
+        wanted = self.match.get("properties")
+        if wanted:
+            properties = node.section.properties()
+            for key, value in wanted.items():
+                if key not in properties or not fnmatchcase(properties[key], value):
+                    return False
+        return True
+
+    def apply(self, index, node):
+        """Apply the actions to ``node``; returns the number of edits made."""
+        edits = 0
+        if self.instance and node.parent is not None:
+            ext = index.ext_resource_by_path(self.instance["path"])
+            if ext is None:
+                ext_id = index.add_ext_resource(
+                    self.instance.get("type", "PackedScene"),
+                    self.instance["path"],
+                    uid=self.instance.get("uid"),
+                )
+            else:
+                ext_id = ext.id
+            if node.instance != ext_id:
+                index.instance_node(node, ext_id)
+                edits += 1
+        if self.strip:
+            for key, _, _ in node.section.property_spans()[::-1]:
+                if any(fnmatchcase(key, pattern) for pattern in self.strip):
+                    node.section.remove_property(key)
+                    edits += 1
+        properties = node.section.properties() if self.set else {}
+        for key, value in self.set.items():
+            if properties.get(key) != value:
+                node.section.set_property(key, value)
+                edits += 1
+        return edits
+
+
+def load_rules(path):
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    specs = data.get("rules", []) if isinstance(data, dict) else data
+    return [Rule(spec) for spec in specs]
+
+
+def migrate_index(index, rules, rel_path):
+    """Run ``rules`` over every node of a loaded scene; returns {rule name: nodes changed}."""
+    changed = {}
+    active = [rule for rule in rules if rule.applies_to(rel_path) and not rule.migrated(index)]
+    for node in list(index.nodes.values()):
+        for rule in active:
+            if rule.matches(index, node) and rule.apply(index, node):
+                changed[rule.name] = changed.get(rule.name, 0) + 1
+    return changed
+
+
+def write_atomic(path, text):
+    """Write via a temp file + rename so Godot never sees a half-written scene."""
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    with open(tmp_path, "w", encoding="utf-8", newline="") as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+
+def migrate_file(path, rules, root=PROJECT_ROOT, dry_run=False):
+    """Migrate one scene file.
+
+    Returns a result dict (changes, skipped rule names, seconds, diff or error).
+    """
+    start = time.perf_counter()
+    path = Path(path)
+    try:
+        rel_path = path.resolve().relative_to(Path(root).resolve()).as_posix()
+    except ValueError:
+        rel_path = path.as_posix()
+    result = {"path": rel_path, "changes": {}, "skipped": [], "diff": ""}
+    try:
+        index = SceneIndex.load(path)
+        original = index.render()
+        result["skipped"] = [
+            rule.name for rule in rules if rule.applies_to(rel_path) and rule.migrated(index)
+        ]
+        result["changes"] = migrate_index(index, rules, rel_path)
+        if result["changes"]:
+            text = index.render()
+            if dry_run:
+                result["diff"] = "".join(
+                    difflib.unified_diff(
+                        original.splitlines(keepends=True),
+                        text.splitlines(keepends=True),
+                        f"a/{rel_path}",
+                        f"b/{rel_path}",
+                    )
+                )
+            else:
+                write_atomic(path, text)
+    except Exception as e:  # reported per file; the rest of the run continues
+        result["error"] = f"{type(e).__name__}: {e}"
+    result["seconds"] = round(time.perf_counter() - start, 4)
+    return result
+
+
+def _migrate_job(job):
+    path, specs, root, dry_run = job
+    return migrate_file(path, [Rule(spec) for spec in specs], root, dry_run)
+
+
+def collect_scenes(paths, root=PROJECT_ROOT):
+    found = []
+    for path in paths or [root]:
+        path = Path(path)
+        if path.is_dir():
+            found.extend(
+                p for p in sorted(path.rglob("*.tscn")) if not SKIP_DIRS.intersection(p.parts)
+            )
+        elif path.suffix == ".tscn" and path.is_file():
+            found.append(path)
+    return found
+
+
+def migrate_files(paths, rules, workers=None, root=PROJECT_ROOT, dry_run=False):
+    """Migrate many scenes on a process pool. Results come back in input order."""
+    jobs = [(str(p), [rule.spec for rule in rules], str(root), dry_run) for p in paths]
+    workers = max(1, min(workers or os.cpu_count() or 1, len(jobs) or 1))
+    if workers == 1:
+        return [_migrate_job(job) for job in jobs]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(_migrate_job, jobs, chunksize=4))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Apply node migration rules to Godot scenes")
+    parser.add_argument("rules", help="JSON rule file")
+    parser.add_argument("paths", nargs="*", help="Scene files or directories (default: project)")
+    parser.add_argument("--dry-run", action="store_true", help="Print unified diffs, write nothing")
+    parser.add_argument("--workers", type=int, default=None, help="Process pool size")
+    parser.add_argument("--root", default=str(PROJECT_ROOT), help="Project root for rule globs")
+    args = parser.parse_args()
+
+    rules = load_rules(args.rules)
+    scenes = collect_scenes(args.paths, args.root)
+    start = time.perf_counter()
+    results = migrate_files(scenes, rules, args.workers, args.root, args.dry_run)
+    wall = time.perf_counter() - start
+
+    totals = {}
+    failed = 0
+    for result in results:
+        if result.get("error"):
+            failed += 1
+            print(f"ERROR {result['path']}: {result['error']}", file=sys.stderr)
+            continue
+        for name, count in result["changes"].items():
+            totals[name] = totals.get(name, 0) + count
+        if args.dry_run and result["diff"]:
+            sys.stdout.write(result["diff"])
+        if result["changes"]:
+            summary = ", ".join(f"{name} x{count}" for name, count in result["changes"].items())
+            print(f"{result['seconds'] * 1000:8.1f} ms  {result['path']}  ({summary})")
+
+    changed = sum(1 for result in results if result["changes"])
+    verb = "would change" if args.dry_run else "changed"
+    print(f"\n{len(results)} scene(s) scanned in {wall:.2f}s, {changed} {verb}, {failed} failed")
+    for name, count in totals.items():
+        print(f"  {name}: {count} node(s)")
+    if results:
+        slowest = max(results, key=lambda result: result["seconds"])
+        print(f"  slowest: {slowest['path']} ({slowest['seconds'] * 1000:.1f} ms)")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,463 @@
+#!/usr/bin/env python3
+"""
+PCK Size Report
+What a Godot .pck is made of, where each byte came from, and what changed.
+
+Reads the pack's directory (Godot 3 and 4 pack formats, standalone or
+embedded at the end of an executable) and never the file data, so a
+multi-hundred-MB pack costs a few hundred KB of reads and memory for its
+directory only.
+
+Every entry is mapped back to its res:// source:
+
+- .godot/imported/<name>-<md5>.ctex and .godot/exported/.../export-<md5>-*
+  carry the md5 of the source's res:// path, resolved against the files
+  in the project;
+- <file>.import / <file>.remap sidecars count toward <file>;
+- project.binary and the rest of .godot/ count as "engine".
+
+Totals are reported per source directory, per kind (texture, audio, scene,
+script, ...) and per asset type from assets/generated/manifest.json.
+
+Each run is saved to .godot/pck_report/<pack>.json. The next run prints a
+diff against it: added, removed and changed entries, and per-directory
+deltas. Size budgets come from pck_budgets.json (total, largest file, per
+directory/kind/asset type, growth since the baseline). Any budget over
+its limit makes the exit status 1.
+
+Usage:
+    python pck_report.py [webexport/rpg.pck] [--budgets FILE] [--baseline FILE]
+        [--depth N] [--top N] [--json] [--no-save]
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import struct
+import sys
+import time
+from pathlib import Path
+
+from asset_graph import MANIFEST_PATH, AssetGraph, format_bytes
+
+PROJECT_ROOT = Path(__file__).resolve().parent
+DEFAULT_PACK = Path("webexport") / "rpg.pck"
+DEFAULT_BUDGETS = "pck_budgets.json"
+BASELINE_DIR = Path(".godot") / "pck_report"
+
+PACK_MAGIC = 0x43504447  # "GDPC"
+PACK_DIR_ENCRYPTED = 1
+PACK_REL_FILEBASE = 2
+PACK_FILE_ENCRYPTED = 1
+PACK_FILE_REMOVAL = 2
+
+SOURCE_HASH_RE = re.compile(r"-([0-9a-f]{32})(?=[.-])")
+SIDECAR_SUFFIXES = (".import", ".remap")
+KINDS = {
+    "texture": {".png", ".jpg", ".jpeg", ".webp", ".svg", ".bmp", ".tga", ".exr", ".hdr"},
+    "audio": {".wav", ".ogg", ".mp3"},
+    "video": {".ogv"},
+    "font": {".ttf", ".otf", ".woff", ".woff2", ".fnt"},
+    "scene": {".tscn", ".scn"},
+    "resource": {".tres", ".res"},
+    "script": {".gd", ".gdc", ".cs"},
+    "shader": {".gdshader", ".gdshaderinc"},
+    "model": {".glb", ".gltf", ".obj"},
+    "data": {".json", ".cfg", ".csv", ".txt", ".translation"},
+}
+SIZE_RE = re.compile(r"^\s*([\d.]+)\s*([KMG]?B?)\s*$", re.I)
+SIZE_UNITS = {"": 1, "B": 1, "K": 1024, "KB": 1024, "M": 1024**2, "MB": 1024**2, "G": 1024**3, "GB": 1024**3}  # fmt: skip
+
+
+# -- pack directory ----------------------------------------------------------
+
+
+class PackReader:
+    """Streams the directory of a .pck; ``header`` is filled in on open."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.header = {}
+
+    def entries(self):
+        """Yield {"path", "offset", "size", "md5", "flags"} per directory entry."""
+        with open(self.path, "rb", buffering=1 << 16) as f:
+            start = self._find_pack(f)
+            count = self._read_header(f, start)
+            for _ in range(count):
+                (length,) = struct.unpack("<I", self._read(f, 4))
+                path = self._read(f, length).rstrip(b"\0").decode("utf-8")
+                offset, size = struct.unpack("<QQ", self._read(f, 16))
+                md5 = self._read(f, 16).hex()
+                flags = 0
+                if self.header["format_version"] >= 2:
+                    (flags,) = struct.unpack("<I", self._read(f, 4))
+                if not path.startswith(("res://", "user://")):
+                    path = "res://" + path  # format 3 stores paths without the prefix
+                yield {
+                    "path": path,
+                    "offset": self.header["file_base"] + offset,
+                    "size": size,
+                    "md5": md5,
+                    "flags": flags,
+                }
+
+    @staticmethod
+    def _read(f, n):
+        data = f.read(n)
+        if len(data) != n:
+            raise SystemExit("Truncated pack directory")
+        return data
+
+    def _find_pack(self, f):
+        """Offset of the pack header: 0, or inside an executable with an embedded pack."""
+        if struct.unpack("<I", f.read(4) or b"\0\0\0\0")[0] == PACK_MAGIC:
+            return 0
+        # Embedded: ... pck ... <u64 pck size> "GDPC"
+        f.seek(-12, os.SEEK_END)
+        size, magic = struct.unpack("<QI", f.read(12))
+        if magic != PACK_MAGIC:
+            raise SystemExit(f"{self.path} is not a Godot pack")
+        start = f.seek(0, os.SEEK_END) - 12 - size
+        f.seek(start)
+        if struct.unpack("<I", f.read(4))[0] != PACK_MAGIC:
+            raise SystemExit(f"{self.path}: embedded pack header not found")
+        return start
+
+    def _read_header(self, f, start):
+        version, major, minor, patch = struct.unpack("<4I", self._read(f, 16))
+        if version > 3:
+            raise SystemExit(f"Unsupported pack format version {version}")
+        flags, file_base, dir_offset = 0, 0, None
+        if version >= 2:
+            flags, file_base = struct.unpack("<IQ", self._read(f, 12))
+        if version >= 3:
+            (dir_offset,) = struct.unpack("<Q", self._read(f, 8))
+        self._read(f, 16 * 4)  # reserved
+        if flags & PACK_DIR_ENCRYPTED:
+            raise SystemExit(f"{self.path}: the pack directory is encrypted")
+        if version != 2 or flags & PACK_REL_FILEBASE:
+            file_base += start  # offsets relative to the pack, not the file
+        if dir_offset is not None:
+            f.seek(start + dir_offset)
+        (count,) = struct.unpack("<I", self._read(f, 4))
+        self.header = {
+            "format_version": version,
+            "godot_version": f"{major}.{minor}.{patch}",
+            "flags": flags,
+            "file_base": file_base,
+            "entries": count,
+            "embedded_at": start or None,
+        }
+        return count
+
+
+# -- mapping entries to sources ------------------------------------------------
+
+
+def source_hashes(root):
+    """{md5 of "res://<path>": "res://<path>"} for every file Godot sees."""
+    hashes = {}
+    for rel, _ in AssetGraph(root).walk():
+        res = "res://" + rel
+        hashes[hashlib.md5(res.encode("utf-8")).hexdigest()] = res
+    return hashes
+
+
+def manifest_types(root):
+    """{"res://<path>": asset type} for staged and promoted manifest files."""
+    path = Path(root) / MANIFEST_PATH
+    if not path.exists():
+        return {}
+    with open(path, encoding="utf-8") as f:
+        entries = json.load(f)
+    root = Path(root).resolve()
+    types = {}
+    for entry in entries if isinstance(entries, list) else []:
+        for record in [entry, *entry.get("variants", [])]:
+            for value in (record.get("path"), record.get("promoted_to")):
+                if not value:
+                    continue
+                candidate = Path(value) if Path(value).is_absolute() else root / value
+                try:
+                    rel = candidate.resolve().relative_to(root).as_posix()
+                except ValueError:
+                    continue
+                types["res://" + rel] = entry.get("type")
+    return types
+
+
+def kind_of(source):
+    suffix = os.path.splitext(source)[1].lower()
+    for kind, suffixes in KINDS.items():
+        if suffix in suffixes:
+            return kind
+    return "other"
+
+
+def map_entry(path, hashes):
+    """(source res:// path, kind) for a pack entry."""
+    if path.startswith("res://.godot/imported/") or path.startswith("res://.godot/exported/"):
+        match = SOURCE_HASH_RE.search(path.rsplit("/", 1)[-1])
+        source = hashes.get(match.group(1)) if match else None
+        if source is None:
+            return path, "unmapped"
+        return source, kind_of(source)
+    if path.startswith("res://.godot/") or path == "res://project.binary":
+        return path, "engine"
+    if path.endswith(SIDECAR_SUFFIXES):
+        source = os.path.splitext(path)[0]
+        return source, kind_of(source)
+    return path, kind_of(path)
+
+
+def source_dir(source, depth):
+    parts = source[len("res://") :].split("/")[:-1]
+    return "/".join(parts[:depth]) or "."
+
+
+# -- report --------------------------------------------------------------------
+
+
+def build_report(pack_path, root=PROJECT_ROOT):
+    start = time.perf_counter()
+    reader = PackReader(pack_path)
+    hashes = source_hashes(root)
+    types = manifest_types(root)
+    files = {}
+    for entry in reader.entries():
+        if entry["flags"] & PACK_FILE_REMOVAL:
+            continue  # patch packs: marks a file as deleted
+        source, kind = map_entry(entry["path"], hashes)
+        files[entry["path"]] = {
+            "size": entry["size"],
+            "md5": entry["md5"],
+            "source": source,
+            "kind": kind,
+            "asset_type": types.get(source),
+            "encrypted": bool(entry["flags"] & PACK_FILE_ENCRYPTED),
+        }
+    pack_size = Path(pack_path).stat().st_size
+    return {
+        "pack": str(pack_path),
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        **reader.header,
+        "pack_bytes": pack_size,
+        "content_bytes": sum(f["size"] for f in files.values()),
+        "parse_seconds": round(time.perf_counter() - start, 3),
+        "files": files,
+    }
+
+
+def totals(report, key):
+    """{group: bytes} with ``key(file record)`` naming the group."""
+    out = {}
+    for record in report["files"].values():
+        group = key(record)
+        if group is not None:
+            out[group] = out.get(group, 0) + record["size"]
+    return dict(sorted(out.items(), key=lambda item: (-item[1], item[0])))
+
+
+def diff_reports(old, new):
+    added, removed, changed = [], [], []
+    for path, record in new["files"].items():
+        previous = old["files"].get(path)
+        if previous is None:
+            added.append((path, record["size"]))
+        elif previous["md5"] != record["md5"]:
+            changed.append((path, record["size"] - previous["size"]))
+    for path, record in old["files"].items():
+        if path not in new["files"]:
+            removed.append((path, -record["size"]))
+    return {
+        "baseline_created": old.get("created"),
+        "bytes": new["content_bytes"] - old["content_bytes"],
+        "added": sorted(added, key=lambda c: -abs(c[1])),
+        "removed": sorted(removed, key=lambda c: -abs(c[1])),
+        "changed": sorted(changed, key=lambda c: -abs(c[1])),
+    }
+
+
+# -- budgets -------------------------------------------------------------------
+
+
+def parse_size(value):
+    if isinstance(value, (int, float)):
+        return int(value)
+    match = SIZE_RE.match(str(value))
+    if not match or match.group(2).upper() not in SIZE_UNITS:
+        raise SystemExit(f"Bad size in budgets: {value!r}")
+    return int(float(match.group(1)) * SIZE_UNITS[match.group(2).upper()])
+
+
+def check_budgets(report, budgets, diff=None):
+    """[(ok, label, actual bytes, limit bytes)] for every budget in ``budgets``."""
+    results = []
+
+    def check(label, actual, limit):
+        limit = parse_size(limit)
+        results.append((actual <= limit, label, actual, limit))
+
+    if "total" in budgets:
+        check("total", report["content_bytes"], budgets["total"])
+    if "max_file" in budgets and report["files"]:
+        record = max(report["files"].values(), key=lambda f: f["size"])
+        check(f"largest file {record['source']}", record["size"], budgets["max_file"])
+    for directory, limit in budgets.get("directories", {}).items():
+        prefix = "res://" + directory.strip("/") + "/"
+        actual = sum(f["size"] for f in report["files"].values() if f["source"].startswith(prefix))
+        check(f"directory {directory}", actual, limit)
+    by_kind = totals(report, lambda f: f["kind"])
+    for kind, limit in budgets.get("kinds", {}).items():
+        check(f"kind {kind}", by_kind.get(kind, 0), limit)
+    by_type = totals(report, lambda f: f["asset_type"])
+    for asset_type, limit in budgets.get("asset_types", {}).items():
+        check(f"asset type {asset_type}", by_type.get(asset_type, 0), limit)
+    if "growth" in budgets and diff is not None:
+        check("growth since baseline", diff["bytes"], budgets["growth"])
+    return results
+
+
+# -- output --------------------------------------------------------------------
+
+
+def signed_bytes(n):
+    return ("+" if n >= 0 else "-") + format_bytes(abs(n))
+
+
+def print_report(report, diff, budget_results, depth, top):
+    content = report["content_bytes"]
+    print(
+        f"{report['pack']}: Godot {report['godot_version']}, pack format"
+        f" {report['format_version']}, {len(report['files'])} entries,"
+        f" {format_bytes(content)} of content in {format_bytes(report['pack_bytes'])}"
+        f" (directory read in {report['parse_seconds']:.2f}s)"
+    )
+
+    def table(title, groups, deltas=None):
+        print(f"\n{title}:")
+        for name, size in list(groups.items())[:top]:
+            share = size / content * 100 if content else 0
+            delta = deltas.get(name, 0) if deltas else 0
+            change = f"  ({signed_bytes(delta)})" if delta else ""
+            print(f"  {format_bytes(size):>9} {share:5.1f}%  {name}{change}")
+
+    def by_dir(r):
+        return totals(r, lambda f: source_dir(f["source"], depth))
+
+    dir_deltas = None
+    if diff is not None:
+        old_dirs, new_dirs = by_dir(diff["old"]), by_dir(report)
+        dir_deltas = {d: new_dirs.get(d, 0) - old_dirs.get(d, 0) for d in {*old_dirs, *new_dirs}}
+    table(f"By directory (depth {depth})", by_dir(report), dir_deltas)
+    table("By kind", totals(report, lambda f: f["kind"]))
+    by_type = totals(report, lambda f: f["asset_type"])
+    if by_type:
+        table("By asset type (manifest)", by_type)
+
+    largest = sorted(report["files"].values(), key=lambda f: -f["size"])[:top]
+    print("\nLargest entries:")
+    for record in largest:
+        print(f"  {format_bytes(record['size']):>9}  {record['source']}")
+
+    if diff is not None:
+        print(
+            f"\nSince {diff['baseline_created']}: {signed_bytes(diff['bytes'])},"
+            f" {len(diff['added'])} added, {len(diff['removed'])} removed,"
+            f" {len(diff['changed'])} changed"
+        )
+        changes = [
+            (path, delta, label)
+            for label in ("added", "removed", "changed")
+            for path, delta in diff[label]
+        ]
+        for path, delta, label in sorted(changes, key=lambda c: -abs(c[1]))[:top]:
+            source = (report["files"].get(path) or diff["old"]["files"][path])["source"]
+            print(f"  {signed_bytes(delta):>10}  {label:<7}  {source}")
+
+    if budget_results:
+        print("\nBudgets:")
+        for ok, label, actual, limit in budget_results:
+            status = "ok  " if ok else "OVER"
+            shown = signed_bytes(actual) if label.startswith("growth") else format_bytes(actual)
+            print(f"  {status}  {shown:>10} / {format_bytes(limit):<9}  {label}")
+
+
+def load_json(path):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_report(report, path):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    tmp_path.write_text(json.dumps(report, indent=1, sort_keys=True), encoding="utf-8")
+    os.replace(tmp_path, path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Size report and budgets for a Godot .pck")
+    parser.add_argument("pack", nargs="?", default=str(DEFAULT_PACK), help="Pack to analyze")
+    parser.add_argument("--root", default=str(PROJECT_ROOT), help="Godot project root")
+    parser.add_argument(
+        "--budgets", default=None, help=f"Budget file (default: {DEFAULT_BUDGETS} if present)"
+    )
+    parser.add_argument(
+        "--baseline", default=None, help="Report to diff against (default: the previous run)"
+    )
+    parser.add_argument("--no-save", action="store_true", help="Do not save this run as baseline")
+    parser.add_argument("--depth", type=int, default=2, help="Directory depth for totals")
+    parser.add_argument("--top", type=int, default=15, help="Rows per table")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args()
+
+    root = Path(args.root)
+    pack = Path(args.pack)
+    if not pack.is_absolute() and not pack.exists():
+        pack = root / pack
+    if not pack.exists():
+        raise SystemExit(f"Pack not found: {pack} (export the project first)")
+
+    report = build_report(pack, root)
+    saved_path = root / BASELINE_DIR / f"{pack.name}.json"
+    baseline_path = Path(args.baseline) if args.baseline else saved_path
+    diff = None
+    if baseline_path.exists():
+        old = load_json(baseline_path)
+        diff = {**diff_reports(old, report), "old": old}
+
+    budgets_path = Path(args.budgets) if args.budgets else root / DEFAULT_BUDGETS
+    budgets = load_json(budgets_path) if args.budgets or budgets_path.exists() else {}
+    budget_results = check_budgets(report, budgets, diff)
+    over = [r for r in budget_results if not r[0]]
+
+    if args.json:
+        out = {k: v for k, v in report.items() if k != "files"}
+        out["directories"] = totals(report, lambda f: source_dir(f["source"], args.depth))
+        out["kinds"] = totals(report, lambda f: f["kind"])
+        out["asset_types"] = totals(report, lambda f: f["asset_type"])
+        out["files"] = report["files"]
+        if diff is not None:
+            out["diff"] = {k: v for k, v in diff.items() if k != "old"}
+        out["budgets"] = [
+            {"ok": ok, "budget": label, "bytes": actual, "limit": limit}
+            for ok, label, actual, limit in budget_results
+        ]
+        print(json.dumps(out, indent=2))
+    else:
+        print_report(report, diff, budget_results, args.depth, args.top)
+
+    if not args.no_save:
+        save_report(report, saved_path)
+    if over:
+        if not args.json:
+            print(f"\n{len(over)} budget(s) exceeded")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
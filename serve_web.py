@@ -4,17 +4,82 @@ Serves files from the webexport/ directory with the Cross-Origin headers
 required by SharedArrayBuffer (COOP/COEP) and correct MIME types for
 .wasm and .pck files (Windows registry can override Python's defaults).
 
+Requests are handled concurrently on a bounded number of threads, so a
+multi-MB rpg.wasm transfer to one tab no longer stalls the .pck, the JS glue
+or a second client. --workers 1 restores the old one-at-a-time server.
+
+Compressible files (.wasm, .pck, .js, ...) are sent with Content-Encoding
+br or gzip when the browser accepts it and an up-to-date rpg.wasm.br /
+rpg.wasm.gz sibling exists; --precompress writes those siblings once after
+an export. With --compress-cache MB, files without a sibling are compressed
+on first request and kept in memory until their mtime changes.
+
+Every file carries a strong ETag (a content hash, computed once per file
+version) and If-None-Match / If-Modified-Since get 304 Not Modified, so a
+reload after a GDScript-only re-export transfers only rpg.pck. With
+--long-cache, content-hashed names (and --immutable globs) are sent with a
+one-year immutable max-age; .html always revalidates.
+
+Range requests (single, and multi-range as multipart/byteranges) get 206
+Partial Content, so large downloads can resume or be fetched in parallel
+chunks. File bodies go out via os.sendfile where available, else an mmap
+view, else plain reads (--transfer forces one).
+
+Each request's time to headers, time to last byte, bytes sent, encoding,
+body source (file, precompressed sibling, memory cache) and status (304s
+included) is counted per file type; GET /__metrics returns the counters
+and latency histograms as JSON, and --metrics-log appends every request
+to a JSONL file for comparing load cost across exports.
+
+With --watch the server stays up across exports: it polls the directory,
+keeps small and medium files in an mtime-invalidated in-memory LRU, holds
+requests for rpg.html/.wasm/.pck while an export is being written, and
+tells open pages to reload (server-sent events on /__reload, script
+injected into .html) once all three files are complete and consistent.
+Reload streams are handed to the watcher thread once their headers are
+sent, so open tabs never hold a worker; --reload-clients caps how many
+are kept (503 past that).
+
 Usage:
-    python serve_web.py [--port PORT] [--dir DIR]
+    python serve_web.py [--port PORT] [--dir DIR] [--workers N] [--compress-cache MB]
+                        [--long-cache [--immutable GLOB ...]] [--transfer MODE]
+                        [--metrics-log PATH]
+                        [--watch [--hot-cache MB] [--reload-clients N]]
+    python serve_web.py --precompress [--dir DIR]
 
 Prints SERVER_READY http://localhost:<port>/rpg.html when bound and listening.
 """
 
 import argparse
+import datetime
+import email.utils
+import gzip
+import hashlib
+import io
+import json
+import mmap
 import os
+import re
+import secrets
 import sys
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from fnmatch import fnmatch
 from functools import partial
+from http import HTTPStatus
 from http.server import HTTPServer, SimpleHTTPRequestHandler
+from socketserver import ThreadingMixIn
+from urllib.parse import urlsplit
+
+try:
+    import brotli
+except ImportError:  # gzip only; existing .br siblings are still served
+    brotli = None
+
+DEFAULT_WORKERS = 16
 
 
 MIME_OVERRIDES = {
@@ -26,16 +91,613 @@ MIME_OVERRIDES = {
     ".svg": "image/svg+xml",
 }
 
+COMPRESSIBLE_SUFFIXES = {".wasm", ".pck", ".js", ".html", ".svg", ".json", ".css", ".txt"}
+
+# Content-Encoding -> precompressed sibling suffix, in server preference order.
+ENCODING_SUFFIXES = {"br": ".br", "gzip": ".gz"}
+
+# More ranges than this in one request are answered with the whole file.
+MAX_RANGES = 32
+TRANSFER_CHUNK = 1024 * 1024
+TRANSFER_MODES = ("auto", "sendfile", "mmap", "copy")
+
+METRICS_PATH = "/__metrics"
+RELOAD_PATH = "/__reload"
+
+# --watch: the files that make up one export, and the magic bytes a complete
+# rpg.wasm / rpg.pck start with.
+EXPORT_FILES = {"rpg.html": b"", "rpg.wasm": b"\0asm", "rpg.pck": b"GDPC"}
+EXPORT_WINDOW_SECONDS = 300  # the three files of one export are written together
+WATCH_INTERVAL_SECONDS = 0.5
+SETTLE_SECONDS = 1.0  # no changes for this long before an export counts as done
+STABLE_WAIT_SECONDS = 60  # how long boot-file requests wait for an export to finish
+SSE_KEEPALIVE_SECONDS = 15
+SSE_SEND_TIMEOUT_SECONDS = 5  # a reload client that stops reading is dropped
+MAX_RELOAD_CLIENTS = 64
+HOT_CACHE_MAX_FILE = 8 * 1024 * 1024
+RELOAD_SCRIPT = (
+    b'<script>new EventSource("/__reload").addEventListener("reload",'
+    b" () => location.reload());</script>"
+)
+LATENCY_BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+# Content-hashed file names such as rpg.3fa9b2c1.wasm or icon-0123abcdef.png.
+HASHED_NAME = re.compile(r"[.-][0-9a-fA-F]{8,}\.[^.]+$")
+
+
+def accepted_encodings(header):
+    """Encodings from an Accept-Encoding header that we can serve, best first."""
+    weights = {}
+    for part in header.split(","):
+        name, _, params = part.strip().partition(";")
+        name = name.strip().lower()
+        weight = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                weight = float(params[2:])
+            except ValueError:
+                weight = 0.0
+        weights[name] = weight
+
+    def q(encoding):
+        return weights.get(encoding, weights.get("*", 0.0))
+
+    return sorted((enc for enc in ENCODING_SUFFIXES if q(enc) > 0), key=lambda enc: -q(enc))
+
+
+def parse_byte_ranges(header, length):
+    """Inclusive (start, end) pairs for a Range header against ``length`` bytes.
+
+    Returns None when the header should be ignored (not bytes, malformed, too
+    many ranges) and [] when no range overlaps the body (416).
+    """
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes":
+        return None
+    ranges = []
+    parts = [part.strip() for part in spec.split(",") if part.strip()]
+    if not parts or len(parts) > MAX_RANGES:
+        return None
+    for part in parts:
+        first, sep, last = part.partition("-")
+        first, last = first.strip(), last.strip()
+        if not sep or not (first or last):
+            return None
+        if (first and not first.isdigit()) or (last and not last.isdigit()):
+            return None
+        if not first:  # suffix range: the last N bytes
+            if int(last) == 0:
+                continue
+            start, end = max(0, length - int(last)), length - 1
+        else:
+            start = int(first)
+            end = min(int(last), length - 1) if last else length - 1
+            if last and int(last) < start:
+                return None
+        if start < length:
+            ranges.append((start, end))
+    return ranges
+
+
+def multipart_plan(ranges, length, ctype, boundary):
+    """multipart/byteranges body as (prefix bytes, offset, count) steps."""
+    plan = []
+    for start, end in ranges:
+        head = (
+            f"\r\n--{boundary}\r\nContent-Type: {ctype}\r\n"
+            f"Content-Range: bytes {start}-{end}/{length}\r\n\r\n"
+        )
+        plan.append((head.encode("latin-1"), start, end - start + 1))
+    plan.append((f"\r\n--{boundary}--\r\n".encode("latin-1"), 0, 0))
+    return plan
+
+
+def compressors():
+    """Encodings this Python can produce (br needs the brotli module)."""
+    return ["br", "gzip"] if brotli is not None else ["gzip"]
+
+
+def compress(data, encoding, best=False):
+    """Compress for ``encoding``; ``best`` trades time for size (precompress)."""
+    if encoding == "br":
+        return brotli.compress(data, quality=11 if best else 5)
+    return gzip.compress(data, compresslevel=9 if best else 6, mtime=0)
+
+
+class BytesLRU:
+    """Bounded, thread-safe LRU of byte strings, each tagged with a file version.
+
+    A lookup with a different version (new mtime or size) misses; entries are
+    evicted least recently used first once ``max_bytes`` is exceeded.
+    """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.used = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _lookup(self, key, version):
+        """(True, data) on a hit for ``version``, else (False, None)."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == version:
+                self._entries.move_to_end(key)
+                return True, entry[1]
+        return False, None
+
+    def _store(self, key, version, data):
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None and old[1] is not None:
+                self.used -= len(old[1])
+            self._entries[key] = (version, data)
+            self.used += len(data) if data is not None else 0
+            while self.used > self.max_bytes and self._entries:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self.used -= len(evicted) if evicted is not None else 0
+
+
+class CompressionCache(BytesLRU):
+    """In-memory compressed bodies keyed on path, encoding, mtime and size."""
+
+    def get(self, path, st, encoding):
+        """Compressed bytes of ``path`` (stat ``st``), or None if not worth it."""
+        if encoding not in compressors() or st.st_size > self.max_bytes:
+            return None
+        key = (path, encoding)
+        version = (st.st_mtime_ns, st.st_size)
+        hit, data = self._lookup(key, version)
+        if hit:
+            return data
+        # Compress outside the lock so other files keep being served.
+        with open(path, "rb") as f:
+            data = compress(f.read(), encoding)
+        if len(data) >= st.st_size:
+            data = None
+        self._store(key, version, data)
+        return data
+
+
+class HotFileCache(BytesLRU):
+    """Contents of small and medium files, invalidated by mtime/size (--watch)."""
+
+    def __init__(self, max_bytes, max_file_bytes=HOT_CACHE_MAX_FILE):
+        super().__init__(max_bytes)
+        self.max_file_bytes = max_file_bytes
+
+    def get(self, path, st):
+        """Bytes of ``path`` if it still matches stat ``st``, else None."""
+        if st.st_size > min(self.max_file_bytes, self.max_bytes):
+            return None
+        version = (st.st_mtime_ns, st.st_size)
+        hit, data = self._lookup(path, version)
+        if hit:
+            return data
+        with open(path, "rb") as f:
+            data = f.read()
+            current = os.fstat(f.fileno())
+        if (current.st_mtime_ns, current.st_size) != version or len(data) != st.st_size:
+            return None  # being rewritten; serve from disk and retry next time
+        self._store(path, version, data)
+        return data
+
+
+class ETagCache:
+    """Strong ETags from file contents, hashed once per (path, mtime, size).
+
+    Content rather than mtime, so a re-export that rewrites an identical
+    rpg.wasm still revalidates with 304.
+    """
+
+    def __init__(self):
+        self._tags = {}
+        self._lock = threading.Lock()
+
+    def get(self, path, st):
+        version = (st.st_mtime_ns, st.st_size)
+        with self._lock:
+            entry = self._tags.get(path)
+        if entry is not None and entry[0] == version:
+            return entry[1]
+        digest = hashlib.blake2b(digest_size=16)
+        with open(path, "rb") as f:
+            while chunk := f.read(1024 * 1024):
+                digest.update(chunk)
+        tag = f'"{digest.hexdigest()}"'
+        with self._lock:
+            self._tags[path] = (version, tag)
+        return tag
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram (milliseconds)."""
+
+    def __init__(self):
+        self.counts = [0] * (len(LATENCY_BUCKETS_MS) + 1)  # last bucket is +Inf
+        self.count = 0
+        self.sum_ms = 0.0
+        self.max_ms = 0.0
+
+    def observe(self, ms):
+        self.counts[bisect_left(LATENCY_BUCKETS_MS, ms)] += 1
+        self.count += 1
+        self.sum_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding the ``q`` quantile (None if empty)."""
+        if not self.count:
+            return None
+        seen = 0
+        for bound, n in zip((*LATENCY_BUCKETS_MS, self.max_ms), self.counts):
+            seen += n
+            if seen >= q * self.count:
+                return min(bound, self.max_ms)
+        return self.max_ms
+
+    def as_dict(self):
+        cumulative, buckets = 0, {}
+        for bound, n in zip((*LATENCY_BUCKETS_MS, "+Inf"), self.counts):
+            cumulative += n
+            buckets[str(bound)] = cumulative
+        return {
+            "count": self.count,
+            "sum_ms": round(self.sum_ms, 3),
+            "max_ms": round(self.max_ms, 3),
+            "p50_ms": self.quantile(0.5),
+            "p95_ms": self.quantile(0.95),
+            "buckets_ms": buckets,
+        }
+
+
+class RequestMetrics:
+    """Per-file-type request counters and latency histograms, plus a JSONL log.
+
+    record() takes one dict per request (see GodotWebHandler.finish_metrics);
+    snapshot() is what /__metrics serves.
+    """
+
+    def __init__(self, log_path=None):
+        self.started = time.time()
+        self._types = {}
+        self._lock = threading.Lock()
+        self._log = open(log_path, "a", encoding="utf-8", buffering=1) if log_path else None
+
+    def _stats(self, file_type):
+        stats = self._types.get(file_type)
+        if stats is None:
+            stats = self._types[file_type] = {
+                "requests": 0,
+                "bytes_sent": 0,
+                "status": Counter(),
+                "encoding": Counter(),
+                "body_source": Counter(),
+                "time_to_headers": LatencyHistogram(),
+                "time_to_last_byte": LatencyHistogram(),
+            }
+        return stats
+
+    def record(self, entry):
+        with self._lock:
+            for stats in (self._stats(entry["type"]), self._stats("*")):
+                stats["requests"] += 1
+                stats["bytes_sent"] += entry["bytes_sent"]
+                stats["status"][str(entry["status"])] += 1
+                stats["encoding"][entry["encoding"]] += 1
+                if entry["body_source"]:
+                    stats["body_source"][entry["body_source"]] += 1
+                if entry["time_to_headers_ms"] is not None:
+                    stats["time_to_headers"].observe(entry["time_to_headers_ms"])
+                stats["time_to_last_byte"].observe(entry["time_to_last_byte_ms"])
+            if self._log is not None:
+                self._log.write(json.dumps(entry) + "\n")
+
+    def snapshot(self):
+        with self._lock:
+            types = {}
+            for file_type, stats in sorted(self._types.items()):
+                types[file_type] = {
+                    key: (
+                        value.as_dict()
+                        if isinstance(value, LatencyHistogram)
+                        else dict(value) if isinstance(value, Counter) else value
+                    )
+                    for key, value in stats.items()
+                }
+        return {
+            "uptime_seconds": round(time.time() - self.started, 3),
+            "latency_buckets_ms": list(LATENCY_BUCKETS_MS),
+            "types": types,
+        }
+
+    def close(self):
+        if self._log is not None:
+            self._log.close()
+
+
+class ExportWatcher(threading.Thread):
+    """Polls the export directory and publishes a new generation per export.
+
+    A change starts a settle period; once nothing has changed for
+    SETTLE_SECONDS and rpg.html, rpg.wasm and rpg.pck are all present,
+    non-empty, start with the right magic bytes and were written by the same
+    export, the generation is bumped and a ``reload`` event is pushed to every
+    reload client. ``stable`` is clear while an export is in progress.
+
+    Reload clients are sockets handed over by /__reload requests after their
+    event-stream headers (add_client()); this thread owns them from then on,
+    sends keepalives and drops the ones that fail or stop reading.
+    """
+
+    def __init__(self, serve_dir, max_clients=MAX_RELOAD_CLIENTS):
+        super().__init__(name="export-watcher", daemon=True)
+        self.serve_dir = serve_dir
+        self.max_clients = max_clients
+        self.generation = 0
+        self.stable = threading.Event()
+        self.stopped = threading.Event()
+        self._clients = []
+        self._clients_lock = threading.Lock()
+        self._snapshot = self.scan()
+        self._published = self._snapshot
+        if self.export_consistent():
+            self.stable.set()
+
+    def scan(self):
+        snapshot = {}
+        for root, _, files in os.walk(self.serve_dir):
+            for name in files:
+                path = os.path.join(root, name)
+                try:
+                    st = os.stat(path)
+                except OSError:  # deleted mid-scan
+                    continue
+                snapshot[path] = (st.st_mtime_ns, st.st_size)
+        return snapshot
+
+    def export_consistent(self):
+        """True if the three export files look like one complete export."""
+        mtimes = []
+        for name, magic in EXPORT_FILES.items():
+            path = os.path.join(self.serve_dir, name)
+            try:
+                with open(path, "rb") as f:
+                    head = f.read(len(magic))
+                    st = os.fstat(f.fileno())
+            except OSError:
+                return False
+            if st.st_size == 0 or head != magic:
+                return False
+            mtimes.append(st.st_mtime)
+        return max(mtimes) - min(mtimes) <= EXPORT_WINDOW_SECONDS
+
+    def clients_full(self):
+        with self._clients_lock:
+            return len(self._clients) >= self.max_clients
+
+    def add_client(self, sock):
+        """Take over an event-stream connection. False if at max_clients."""
+        with self._clients_lock:
+            if len(self._clients) >= self.max_clients:
+                return False
+            sock.settimeout(SSE_SEND_TIMEOUT_SECONDS)
+            self._clients.append(sock)
+            return True
+
+    def broadcast(self, payload):
+        """Send ``payload`` to every reload client, closing the ones that fail."""
+        with self._clients_lock:
+            clients = list(self._clients)
+        dead = []
+        for sock in clients:
+            try:
+                sock.sendall(payload)
+            except OSError:  # page closed or reloaded, or not reading
+                dead.append(sock)
+        if dead:
+            with self._clients_lock:
+                self._clients = [sock for sock in self._clients if sock not in dead]
+            for sock in dead:
+                sock.close()
+
+    def run(self):
+        last_change = None
+        last_keepalive = time.monotonic()
+        while not self.stopped.wait(WATCH_INTERVAL_SECONDS):
+            if time.monotonic() - last_keepalive >= SSE_KEEPALIVE_SECONDS:
+                last_keepalive = time.monotonic()
+                self.broadcast(b": keepalive\n\n")
+            snapshot = self.scan()
+            if snapshot != self._snapshot:
+                self._snapshot = snapshot
+                last_change = time.monotonic()
+                self.stable.clear()
+                continue
+            if last_change is None or time.monotonic() - last_change < SETTLE_SECONDS:
+                continue
+            if not self.export_consistent():
+                continue  # e.g. wasm done but pck still missing; keep waiting
+            last_change = None
+            self.stable.set()
+            if snapshot != self._published:
+                self._published = snapshot
+                self.generation += 1
+                self.broadcast(f"event: reload\ndata: {self.generation}\n\n".encode())
+                print(f"Export changed; reload generation {self.generation}")
+                sys.stdout.flush()
+
+    def stop(self):
+        self.stopped.set()
+        with self._clients_lock:
+            clients, self._clients = self._clients, []
+        for sock in clients:
+            sock.close()
+
+
+def precompress(serve_dir, workers=None):
+    """Write .br/.gz siblings for every compressible file under ``serve_dir``.
+
+    Siblings that are already newer than their source are left alone. Returns
+    one (path, encoding, original_bytes, compressed_bytes or None) per sibling
+    considered; None means it was up to date.
+    """
+    sources = []
+    for root, _, files in os.walk(serve_dir):
+        for name in files:
+            if os.path.splitext(name)[1].lower() in COMPRESSIBLE_SUFFIXES:
+                sources.append(os.path.join(root, name))
+
+    def run(job):
+        path, encoding = job
+        sibling = path + ENCODING_SUFFIXES[encoding]
+        st = os.stat(path)
+        if os.path.exists(sibling) and os.stat(sibling).st_mtime >= st.st_mtime:
+            return path, encoding, st.st_size, None
+        with open(path, "rb") as f:
+            data = compress(f.read(), encoding, best=True)
+        tmp = f"{sibling}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, sibling)
+        return path, encoding, st.st_size, len(data)
+
+    jobs = [(path, encoding) for path in sorted(sources) for encoding in compressors()]
+    with ThreadPoolExecutor(workers) as pool:  # zlib and brotli release the GIL
+        return list(pool.map(run, jobs))
+
 
 class GodotWebHandler(SimpleHTTPRequestHandler):
     """HTTP handler that adds COOP/COEP headers and overrides MIME types."""
 
+    def __init__(
+        self,
+        *args,
+        compression_cache=None,
+        etags=None,
+        long_cache=None,
+        transfer="auto",
+        metrics=None,
+        watcher=None,
+        hot_cache=None,
+        **kwargs,
+    ):
+        self.compression_cache = compression_cache
+        self.metrics = metrics
+        self.watcher = watcher
+        self.hot_cache = hot_cache
+        self.etags = etags if etags is not None else ETagCache()
+        self.long_cache = long_cache
+        self.transfer = transfer
+        self.vary_encoding = False
+        self.cache_control = "no-cache"
+        self.body_plan = None
+        self.request_started = None
+        super().__init__(*args, **kwargs)
+
+    def handle_one_request(self):
+        self.request_started = None
+        try:
+            super().handle_one_request()
+        finally:
+            if self.request_started is not None and self.metrics is not None:
+                self.finish_metrics()
+
+    def parse_request(self):
+        # Runs once the request line has arrived; everything after is ours.
+        self.request_started = time.perf_counter()
+        self.headers_sent_at = None
+        self.response_status = None
+        self.response_encoding = "identity"
+        self.body_source = None
+        self.bytes_sent = 0
+        return super().parse_request()
+
+    def send_response(self, code, message=None):
+        self.response_status = int(code)
+        super().send_response(code, message)
+
+    def finish_metrics(self):
+        """Record timing, size and cache outcome of the request just handled."""
+        path = urlsplit(self.path).path if hasattr(self, "path") else ""
+        if path in (METRICS_PATH, RELOAD_PATH):
+            return
+        done = time.perf_counter()
+        started = self.request_started
+        self.metrics.record(
+            {
+                "time": round(time.time(), 3),
+                "method": getattr(self, "command", None),
+                "path": path,
+                "type": os.path.splitext(path)[1].lower() or "(none)",
+                "status": self.response_status,
+                "range": self.headers.get("Range") if hasattr(self, "headers") else None,
+                "encoding": self.response_encoding,
+                "body_source": self.body_source,
+                "bytes_sent": self.bytes_sent,
+                "time_to_headers_ms": (
+                    round((self.headers_sent_at - started) * 1000, 3)
+                    if self.headers_sent_at is not None
+                    else None
+                ),
+                "time_to_last_byte_ms": round((done - started) * 1000, 3),
+            }
+        )
+
+    def do_GET(self):
+        path = urlsplit(self.path).path
+        if self.metrics is not None and path == METRICS_PATH:
+            self.send_metrics()
+            return
+        if self.watcher is not None and path == RELOAD_PATH:
+            self.send_reload_events()
+            return
+        super().do_GET()
+
+    def send_reload_events(self):
+        """Server-sent events: ``reload`` each time the watcher publishes an export.
+
+        Only the headers are sent here; the connection is then handed to the
+        watcher thread, so the request (and its worker) finishes at once.
+        """
+        self.cache_control = "no-store"
+        self.close_connection = True
+        if self.watcher.clients_full():
+            self.send_error(HTTPStatus.SERVICE_UNAVAILABLE, "Too many reload clients")
+            return
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-type", "text/event-stream")
+        self.end_headers()
+        try:
+            self.wfile.write(b"retry: 1000\n\n")
+            self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            return  # page closed or reloaded
+        if self.watcher.add_client(self.connection):
+            self.server.detach(self.connection)
+
+    def send_metrics(self):
+        body = json.dumps(self.metrics.snapshot(), indent=2).encode("utf-8")
+        self.cache_control = "no-store"
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
     def end_headers(self):
+        if self.vary_encoding:
+            self.send_header("Vary", "Accept-Encoding")
         self.send_header("Cross-Origin-Opener-Policy", "same-origin")
         self.send_header("Cross-Origin-Embedder-Policy", "require-corp")
-        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Cache-Control", self.cache_control)
         self.send_header("Access-Control-Allow-Origin", "*")
         super().end_headers()
+        if self.request_started is not None and self.headers_sent_at is None:
+            self.headers_sent_at = time.perf_counter()
 
     def guess_type(self, path):
         _, ext = os.path.splitext(path)
@@ -44,11 +706,366 @@ class GodotWebHandler(SimpleHTTPRequestHandler):
             return MIME_OVERRIDES[ext]
         return super().guess_type(path)
 
+    def cache_control_for(self, path):
+        """Long-lived for hashed/--immutable names in --long-cache mode, else revalidate."""
+        name = os.path.basename(path)
+        if self.long_cache is None or name.endswith(".html"):
+            return "no-cache"
+        if HASHED_NAME.search(name) or any(fnmatch(name, pattern) for pattern in self.long_cache):
+            return IMMUTABLE_CACHE_CONTROL
+        return "no-cache"
+
+    def send_head(self):
+        path = self.translate_path(self.path)
+        self.vary_encoding = False
+        self.cache_control = "no-cache"
+        self.body_plan = None
+        name = os.path.basename(path)
+        if self.watcher is not None and name in EXPORT_FILES:
+            # Don't hand out a half-written export; wait for the watcher to settle
+            # before opening, so a renamed-in file is read from its new inode.
+            self.watcher.stable.wait(STABLE_WAIT_SECONDS)
+        if not os.path.isfile(path):
+            # Directories (redirect, index, listing) and 404s.
+            return super().send_head()
+        try:
+            f = open(path, "rb")
+        except OSError:
+            self.send_error(HTTPStatus.NOT_FOUND, "File not found")
+            return None
+        body = f  # replaced by an encoded sibling or in-memory copy below
+
+        live_html = self.watcher is not None and name.endswith(".html")
+
+        try:
+            st = os.fstat(f.fileno())
+            self.vary_encoding = (
+                os.path.splitext(path)[1].lower() in COMPRESSIBLE_SUFFIXES and not live_html
+            )
+            self.cache_control = self.cache_control_for(path)
+            encoding = None
+            body, length, etag = f, st.st_size, None
+            if self.vary_encoding:
+                for candidate in accepted_encodings(self.headers.get("Accept-Encoding", "")):
+                    encoded = self.open_encoded(path, st, candidate)
+                    if encoded is not None:
+                        encoding = candidate
+                        body, length, etag = encoded
+                        f.close()
+                        self.response_encoding = encoding
+                        break
+            self.body_source = (
+                "memory" if isinstance(body, io.BytesIO) else "sibling" if encoding else "file"
+            )
+            if etag is None:
+                etag = self.etags.get(path, st)
+            if live_html:
+                body, length = self.inject_reload_script(f)
+                etag = etag[:-1] + '-live"'
+                self.body_source = "hot"
+            elif body is f and self.hot_cache is not None:
+                data = self.hot_cache.get(path, st)
+                if data is not None:
+                    f.close()
+                    body = io.BytesIO(data)
+                    self.body_source = "hot"
+
+            if self.not_modified(etag, st.st_mtime):
+                body.close()
+                self.send_response(HTTPStatus.NOT_MODIFIED)
+                self.send_header("ETag", etag)
+                self.end_headers()
+                return None
+
+            ranges = self.requested_ranges(length, etag, st.st_mtime)
+            if ranges == []:
+                body.close()
+                self.send_response(HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE)
+                self.send_header("Content-Range", f"bytes */{length}")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return None
+
+            ctype = self.guess_type(path)
+            if ranges is None:
+                self.send_response(HTTPStatus.OK)
+                self.body_plan = [(b"", 0, length)]
+                content_length = length
+            elif len(ranges) == 1:
+                start, end = ranges[0]
+                self.send_response(HTTPStatus.PARTIAL_CONTENT)
+                self.send_header("Content-Range", f"bytes {start}-{end}/{length}")
+                self.body_plan = [(b"", start, end - start + 1)]
+                content_length = end - start + 1
+            else:
+                boundary = secrets.token_hex(16)
+                self.send_response(HTTPStatus.PARTIAL_CONTENT)
+                self.body_plan = multipart_plan(ranges, length, ctype, boundary)
+                content_length = sum(len(prefix) + count for prefix, _, count in self.body_plan)
+                ctype = f"multipart/byteranges; boundary={boundary}"
+            self.send_header("Content-type", ctype)
+            if encoding is not None:
+                self.send_header("Content-Encoding", encoding)
+            self.send_header("Content-Length", str(content_length))
+            self.send_header("Last-Modified", self.date_time_string(st.st_mtime))
+            self.send_header("ETag", etag)
+            self.send_header("Accept-Ranges", "bytes")
+            self.end_headers()
+            return body
+        except BaseException:
+            f.close()
+            if body is not f:
+                body.close()
+            raise
+
+    @staticmethod
+    def inject_reload_script(f):
+        """Page body with the live-reload EventSource script added (--watch)."""
+        html = f.read()
+        f.close()
+        index = html.rfind(b"</body>")
+        if index < 0:
+            index = len(html)
+        html = html[:index] + RELOAD_SCRIPT + html[index:]
+        return io.BytesIO(html), len(html)
+
+    def requested_ranges(self, length, etag, mtime):
+        """Byte ranges to send: None for the whole body, [] if unsatisfiable."""
+        header = self.headers.get("Range")
+        if header is None or self.command != "GET":
+            return None
+        if_range = self.headers.get("If-Range")
+        if if_range is not None:
+            if_range = if_range.strip()
+            if if_range.startswith(('"', "W/")):
+                if if_range != etag:  # strong comparison; weak tags never match
+                    return None
+            elif if_range != self.date_time_string(mtime):
+                return None
+        return parse_byte_ranges(header, length)
+
+    def copyfile(self, source, outputfile):
+        if self.body_plan is None:  # directory listings from the stock send_head
+            super().copyfile(source, outputfile)
+            self.bytes_sent += source.tell()
+            return
+        for prefix, start, count in self.body_plan:
+            if prefix:
+                outputfile.write(prefix)
+                self.bytes_sent += len(prefix)
+            if count:
+                self.send_body_range(source, start, count, outputfile)
+                self.bytes_sent += count
+
+    def send_body_range(self, source, offset, count, outputfile):
+        """Send ``count`` bytes of ``source`` from ``offset`` with the cheapest method.
+
+        In-memory bodies are written from a buffer view. Files go through
+        os.sendfile (socket.sendfile) where the platform has it, else a
+        read-only mmap, else plain read/write; --transfer forces one.
+        """
+        if isinstance(source, io.BytesIO):
+            with source.getbuffer() as view:
+                outputfile.write(view[offset : offset + count])
+            return
+        if self.transfer in ("auto", "sendfile") and hasattr(os, "sendfile"):
+            self.connection.sendfile(source, offset, count)
+            return
+        if self.transfer in ("auto", "mmap"):
+            try:
+                mapped = mmap.mmap(source.fileno(), 0, access=mmap.ACCESS_READ)
+            except (OSError, ValueError):  # e.g. not mappable, or empty
+                mapped = None
+            if mapped is not None:
+                with mapped, memoryview(mapped) as view:
+                    for pos in range(offset, offset + count, TRANSFER_CHUNK):
+                        outputfile.write(view[pos : min(pos + TRANSFER_CHUNK, offset + count)])
+                return
+        source.seek(offset)
+        remaining = count
+        while remaining:
+            chunk = source.read(min(TRANSFER_CHUNK, remaining))
+            if not chunk:
+                break
+            outputfile.write(chunk)
+            remaining -= len(chunk)
+
+    def not_modified(self, etag, mtime):
+        """True if the request's validators say the client's copy is current.
+
+        If-None-Match wins over If-Modified-Since (RFC 9110 13.2.2).
+        """
+        if_none_match = self.headers.get("If-None-Match")
+        if if_none_match is not None:
+            tags = [tag.strip() for tag in if_none_match.split(",")]
+            return "*" in tags or any(tag.removeprefix("W/") == etag for tag in tags)
+        if_modified_since = self.headers.get("If-Modified-Since")
+        if if_modified_since is None:
+            return False
+        try:
+            since = email.utils.parsedate_to_datetime(if_modified_since)
+        except (TypeError, IndexError, OverflowError, ValueError):
+            return False
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=datetime.timezone.utc)
+        return int(mtime) <= since.timestamp()
+
+    def open_encoded(self, path, st, encoding):
+        """(file, length, ETag) for ``path`` in ``encoding``, or None.
+
+        Prefers a precompressed sibling that is at least as new as the source
+        (an older one is left over from a previous export), then the
+        in-memory compression cache.
+        """
+        sibling = path + ENCODING_SUFFIXES[encoding]
+        try:
+            sibling_st = os.stat(sibling)
+        except OSError:
+            sibling_st = None
+        if sibling_st is not None and sibling_st.st_mtime >= st.st_mtime:
+            return open(sibling, "rb"), sibling_st.st_size, self.etags.get(sibling, sibling_st)
+        if self.compression_cache is not None:
+            data = self.compression_cache.get(path, st, encoding)
+            if data is not None:
+                # Cache output is deterministic per source version and encoding.
+                etag = self.etags.get(path, st)[:-1] + f'-{encoding}"'
+                return io.BytesIO(data), len(data), etag
+        return None
+
+
+class GodotHTTPServer(HTTPServer):
+    """HTTPServer whose handlers can keep their connection past the request.
+
+    A handler that hands its socket to someone else (the reload clients of
+    ExportWatcher) calls detach(); the server then leaves it open.
+    """
+
+    def __init__(self, server_address, handler_class):
+        self._detached = set()
+        self._detached_lock = threading.Lock()
+        super().__init__(server_address, handler_class)
+
+    def detach(self, request):
+        with self._detached_lock:
+            self._detached.add(request)
+
+    def shutdown_request(self, request):
+        with self._detached_lock:
+            if request in self._detached:
+                self._detached.discard(request)
+                return
+        super().shutdown_request(request)
+
+
+class BoundedThreadingHTTPServer(ThreadingMixIn, GodotHTTPServer):
+    """Threading server that runs at most ``max_workers`` requests at once.
+
+    When every worker is busy the accept loop waits for a free slot, and new
+    connections queue in the listen backlog instead of spawning threads
+    without limit.
+    """
+
+    daemon_threads = True
+    request_queue_size = 64
+
+    def __init__(self, server_address, handler_class, max_workers=DEFAULT_WORKERS):
+        self.max_workers = max_workers
+        self._slots = threading.BoundedSemaphore(max_workers)
+        super().__init__(server_address, handler_class)
+
+    def process_request(self, request, client_address):
+        self._slots.acquire()
+        try:
+            super().process_request(request, client_address)
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def process_request_thread(self, request, client_address):
+        try:
+            super().process_request_thread(request, client_address)
+        finally:
+            self._slots.release()
+
+
+def make_server(serve_dir, port, workers=DEFAULT_WORKERS, host="127.0.0.1", **handler_options):
+    """Bind a GodotWebHandler server for ``serve_dir`` (port 0 picks a free port).
+
+    ``handler_options`` are GodotWebHandler keyword arguments; one ETagCache and
+    one RequestMetrics are shared by all requests unless given.
+    """
+    handler_options.setdefault("etags", ETagCache())
+    handler_options.setdefault("metrics", RequestMetrics())
+    handler = partial(GodotWebHandler, directory=serve_dir, **handler_options)
+    if workers <= 1:
+        return GodotHTTPServer((host, port), handler)
+    return BoundedThreadingHTTPServer((host, port), handler, max_workers=workers)
+
 
 def main():
     parser = argparse.ArgumentParser(description="Serve Godot web export")
     parser.add_argument("--port", type=int, default=8060, help="Port to listen on (default: 8060)")
     parser.add_argument("--dir", type=str, default="webexport", help="Directory to serve (default: webexport)")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=DEFAULT_WORKERS,
+        help=f"Max concurrent requests (default: {DEFAULT_WORKERS}; 1 = single-threaded)",
+    )
+    parser.add_argument(
+        "--precompress",
+        action="store_true",
+        help="Write .br/.gz siblings for compressible files in --dir, then exit",
+    )
+    parser.add_argument(
+        "--long-cache",
+        action="store_true",
+        help="Send immutable max-age caching for content-hashed names (.html always revalidates)",
+    )
+    parser.add_argument(
+        "--immutable",
+        action="append",
+        default=[],
+        metavar="GLOB",
+        help="With --long-cache, also treat file names matching GLOB as immutable (repeatable)",
+    )
+    parser.add_argument(
+        "--transfer",
+        choices=TRANSFER_MODES,
+        default="auto",
+        help="How file bodies are sent (default auto: sendfile, else mmap, else copy)",
+    )
+    parser.add_argument(
+        "--metrics-log",
+        metavar="PATH",
+        help="Append one JSON line per request (timings, bytes, encoding, status) to PATH",
+    )
+    parser.add_argument(
+        "--compress-cache",
+        type=int,
+        default=0,
+        metavar="MB",
+        help="Compress files without a sibling on demand, caching up to MB in memory",
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="Watch --dir for new exports, hot-cache files and live-reload open pages",
+    )
+    parser.add_argument(
+        "--hot-cache",
+        type=int,
+        default=128,
+        metavar="MB",
+        help="With --watch, keep files up to 8 MB in an in-memory LRU of this size (default 128)",
+    )
+    parser.add_argument(
+        "--reload-clients",
+        type=int,
+        default=MAX_RELOAD_CLIENTS,
+        metavar="N",
+        help=f"With --watch, max open live-reload streams (default {MAX_RELOAD_CLIENTS})",
+    )
     args = parser.parse_args()
 
     serve_dir = os.path.abspath(args.dir)
@@ -56,17 +1073,52 @@ def main():
         print(f"Error: directory not found: {serve_dir}", file=sys.stderr)
         sys.exit(1)
 
-    handler = partial(GodotWebHandler, directory=serve_dir)
-    server = HTTPServer(("127.0.0.1", args.port), handler)
+    if args.precompress:
+        if brotli is None:
+            print("brotli not installed (pip install brotli); writing .gz only")
+        for path, encoding, size, compressed in precompress(serve_dir):
+            name = os.path.relpath(path, serve_dir) + ENCODING_SUFFIXES[encoding]
+            if compressed is None:
+                print(f"  {name}: up to date")
+            else:
+                print(
+                    f"  {name}: {size:,} -> {compressed:,} bytes ({size / max(compressed, 1):.1f}x)"
+                )
+        return
+
+    cache = CompressionCache(args.compress_cache * 1024 * 1024) if args.compress_cache else None
+    watcher = hot_cache = None
+    if args.watch:
+        watcher = ExportWatcher(serve_dir, args.reload_clients)
+        watcher.start()
+        if args.hot_cache:
+            hot_cache = HotFileCache(args.hot_cache * 1024 * 1024)
+    server = make_server(
+        serve_dir,
+        args.port,
+        args.workers,
+        compression_cache=cache,
+        long_cache=args.immutable if args.long_cache else None,
+        transfer=args.transfer,
+        metrics=RequestMetrics(args.metrics_log),
+        watcher=watcher,
+        hot_cache=hot_cache,
+    )
+    port = server.server_address[1]  # the real port when --port 0
 
-    print(f"Serving {serve_dir} on http://127.0.0.1:{args.port}")
-    print(f"SERVER_READY http://localhost:{args.port}/rpg.html")
+    mode = f"{args.workers} workers" if args.workers > 1 else "single-threaded"
+    if watcher is not None:
+        mode += ", watching for exports"
+    print(f"Serving {serve_dir} on http://127.0.0.1:{port} ({mode})")
+    print(f"SERVER_READY http://localhost:{port}/rpg.html")
     sys.stdout.flush()
 
     try:
         server.serve_forever()
     except KeyboardInterrupt:
         print("\nShutting down.")
+        if watcher is not None:
+            watcher.stop()
         server.shutdown()
 
 
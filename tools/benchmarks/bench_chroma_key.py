@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""Benchmark the per-pixel and array chroma key paths in process_asset.py.
+
+Builds a synthetic Imagine-style plate (flat off-magenta background, a shaded
+subject and an anti-aliased rim) at every size in asset-types.json, keys it
+with both paths, checks the outputs are pixel-identical and prints timings.
+
+Usage:
+    python tools/benchmarks/bench_chroma_key.py [--repeat N] [--tolerance T]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+from PIL import Image, ImageDraw, ImageFilter
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / ".grok/skills/imagine-asset/scripts"))
+
+import process_asset
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+SKILL_DIR = PROJECT_ROOT / ".grok" / "skills" / "imagine-asset"
+PLATE_RGB = (236, 18, 228)  # Imagine rarely paints pure #FF00FF
+
+
+def asset_sizes() -> dict[str, tuple[int, int]]:
+    with open(SKILL_DIR / "asset-types.json", encoding="utf-8") as f:
+        types = json.load(f)
+    sizes = {}
+    for name, cfg in types.items():
+        size = cfg.get("size", [256, 256])
+        sizes[name] = (int(size[0]), int(size[1]))
+    return sizes
+
+
+def make_plate(size: tuple[int, int]) -> Image.Image:
+    """Flat chroma plate with a blurred subject so every alpha branch is hit."""
+    w, h = size
+    img = Image.new("RGB", size, PLATE_RGB)
+    draw = ImageDraw.Draw(img)
+    draw.ellipse([w // 5, h // 6, w * 4 // 5, h * 5 // 6], fill=(96, 72, 40))
+    draw.rectangle([w * 2 // 5, h // 8, w * 3 // 5, h * 7 // 8], fill=(196, 168, 122))
+    return img.filter(ImageFilter.GaussianBlur(radius=max(1, min(w, h) // 96)))
+
+
+def time_call(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark chroma_key implementations")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per path; best is reported")
+    parser.add_argument("--tolerance", type=int, default=55)
+    parser.add_argument("--soft", type=int, default=24)
+    args = parser.parse_args()
+
+    if process_asset.np is None:
+        print("NumPy is not installed; only the reference path is available.", file=sys.stderr)
+        return 1
+
+    print(f"{'type':<10} {'size':>9} {'reference':>11} {'array':>9} {'speedup':>8}  identical")
+    mismatches = 0
+    for name, size in asset_sizes().items():
+        plate = make_plate(size)
+        key = process_asset.sample_corner_chroma(plate)
+
+        def run_ref(plate=plate, key=key):
+            return process_asset.chroma_key_reference(plate, key, args.tolerance, args.soft)
+
+        def run_arr(plate=plate, key=key):
+            return process_asset.chroma_key_array(plate, key, args.tolerance, args.soft)
+
+        identical = run_ref().tobytes() == run_arr().tobytes()
+        mismatches += not identical
+        ref_s = time_call(run_ref, args.repeat)
+        arr_s = time_call(run_arr, args.repeat)
+        print(
+            f"{name:<10} {size[0]:>4}x{size[1]:<4} {ref_s * 1000:>9.1f}ms {arr_s * 1000:>7.1f}ms"
+            f" {ref_s / arr_s:>7.1f}x  {'yes' if identical else 'NO'}"
+        )
+
+    if mismatches:
+        print(f"{mismatches} size(s) produced different pixels", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""Benchmark the supersampled vector icon stage of generate_placeholders.py.
+
+Builds one icon set of every vector icon x --sizes x --colors (several
+hundred icons by default) and times:
+
+- per-output: each icon drawn at its own supersampled size and downsampled,
+  the straightforward way to anti-alias one file at a time
+- batched: render_vector_icon_set(), one master per icon, one downsample
+  per size, tinted per color
+- batched + PNG encode, in process and on the generator's process pool
+
+Both render paths are checked to produce identical pixels.
+
+Usage:
+    python tools/benchmarks/bench_icon_set.py [--sizes 16,24,32,48,64,128]
+        [--colors 12] [--supersample 4] [--workers N]
+"""
+
+from __future__ import annotations
+
+import argparse
+import colorsys
+import os
+import sys
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from generate_placeholders import (  # noqa: E402
+    VECTOR_ICONS,
+    encode_png,
+    expand_icon_set,
+    render_all,
+    render_icon_mask,
+    render_vector_icon_set,
+    tint,
+)
+from PIL import Image  # noqa: E402
+
+
+def theme_colors(count: int) -> dict:
+    colors = {}
+    for i in range(count):
+        r, g, b = colorsys.hls_to_rgb(i / count, 0.6, 0.45)
+        colors[f"c{i}"] = "#%02X%02X%02X" % (int(r * 255), int(g * 255), int(b * 255))
+    return colors
+
+
+def per_output(icons: list, sizes: list, colors: list, supersample: int) -> dict:
+    images = {}
+    for icon in icons:
+        for size in sizes:
+            for color in colors:
+                master = size * supersample
+                mask = render_icon_mask(icon, master).resize(
+                    (size, size), Image.Resampling.LANCZOS, reducing_gap=3.0
+                )
+                images[(icon, size, color)] = tint(mask, color)
+    return images
+
+
+def batched(icons: list, sizes: list, colors: list, master: int) -> dict:
+    images = {}
+    for icon in icons:
+        for (size, color), img in render_vector_icon_set(icon, master, sizes, colors).items():
+            images[(icon, size, color)] = img
+    return images
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the vector icon set stage")
+    parser.add_argument("--sizes", default="16,24,32,48,64,128")
+    parser.add_argument("--colors", type=int, default=12, help="Number of theme colors")
+    parser.add_argument("--supersample", type=int, default=4)
+    parser.add_argument("--workers", type=int, default=None, help="Pool size for the last row")
+    args = parser.parse_args()
+
+    icons = sorted(VECTOR_ICONS)
+    sizes = [int(s) for s in args.sizes.split(",")]
+    colors = list(theme_colors(args.colors).values())
+    master = max(sizes) * args.supersample
+    total = len(icons) * len(sizes) * len(colors)
+    print(
+        f"{len(icons)} icons x {len(sizes)} sizes x {len(colors)} colors = {total} icons,"
+        f" supersample {args.supersample}x (master {master}px)"
+    )
+
+    rows = []
+    # per-output supersamples each size on its own, so compare it against a
+    # batched run at the same per-size factor for the pixel check.
+    reference, seconds = timed(per_output, icons, sizes, colors, args.supersample)
+    rows.append(("per-output render", seconds))
+    _, seconds = timed(batched, icons, sizes, colors, master)
+    rows.append(("batched render", seconds))
+    for size in sizes:
+        same = batched(icons, [size], colors, size * args.supersample)
+        for key, img in same.items():
+            if img.tobytes() != reference[key].tobytes():
+                raise SystemExit(f"pixel mismatch for {key}")
+
+    start = time.perf_counter()
+    encoded = [encode_png(img) for img in batched(icons, sizes, colors, master).values()]
+    rows.append(("batched + PNG encode", time.perf_counter() - start))
+
+    entries = expand_icon_set(
+        {
+            "icons": icons,
+            "sizes": sizes,
+            "colors": theme_colors(args.colors),
+            "supersample": args.supersample,
+            "path": "{icon}_{color}_{size}.png",
+        }
+    )
+    workers = args.workers or os.cpu_count() or 1
+    _, seconds = timed(render_all, entries, False, workers)
+    rows.append((f"render_all, {min(workers, len(icons))} worker(s)", seconds))
+
+    print(f"{'stage':>28} {'total':>9} {'per icon':>10} {'icons/s':>9}")
+    for label, seconds in rows:
+        print(
+            f"{label:>28} {seconds * 1000:>7.1f}ms {seconds / total * 1e6:>8.1f}us"
+            f" {total / seconds:>9.0f}"
+        )
+    print(f"encoded bytes: {sum(len(data) for data in encoded):,}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""Benchmark serve_web.py body transfer: server CPU time and throughput per GB.
+
+Writes one large synthetic rpg.pck, starts serve_web.py once per --transfer
+mode (sendfile, mmap, copy) and downloads it repeatedly, either whole or as
+N parallel Range requests. Server CPU time is read from the server process
+(psutil if installed, else /proc) around the downloads only, so startup and
+the one-off ETag hash are excluded. Every download is checked byte for byte.
+
+Usage:
+    python tools/benchmarks/bench_serve_transfer.py [--size-mb MB] [--gb GB]
+        [--ranges N] [--modes sendfile,mmap,copy]
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import http.client
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from bench_serve_web import start_server
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+BUFFER = 1024 * 1024
+
+
+def server_cpu_seconds(pid: int) -> float | None:
+    """User + system CPU time of ``pid`` so far, or None if unavailable."""
+    if psutil is not None:
+        times = psutil.Process(pid).cpu_times()
+        return times.user + times.system
+    stat = Path(f"/proc/{pid}/stat")
+    if not stat.exists():
+        return None
+    fields = stat.read_text().rsplit(")", 1)[1].split()
+    return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+
+
+def download(port: int, name: str, start: int, end: int | None) -> bytes:
+    """GET ``name`` (bytes start..end inclusive when end is given); returns a digest."""
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=300)
+    headers = {} if end is None else {"Range": f"bytes={start}-{end}"}
+    try:
+        conn.request("GET", f"/{name}", headers=headers)
+        resp = conn.getresponse()
+        expected = 200 if end is None else 206
+        if resp.status != expected:
+            raise SystemExit(f"{name}: HTTP {resp.status}, expected {expected}")
+        digest = hashlib.blake2b(digest_size=16)
+        buf = bytearray(BUFFER)
+        view = memoryview(buf)
+        while n := resp.readinto(buf):
+            digest.update(view[:n])
+        return digest.digest()
+    finally:
+        conn.close()
+
+
+def part_digests(data_path: Path, size: int, ranges: int) -> tuple[list, list]:
+    """(start, end) for each of ``ranges`` parts and the expected digest of each."""
+    step = -(-size // ranges)
+    bounds = [(start, min(start + step, size) - 1) for start in range(0, size, step)]
+    digests = []
+    with open(data_path, "rb") as f:
+        for start, end in bounds:
+            f.seek(start)
+            digests.append(hashlib.blake2b(f.read(end - start + 1), digest_size=16).digest())
+    return bounds, digests
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark serve_web.py transfer modes")
+    parser.add_argument("--size-mb", type=int, default=256, help="Size of the served file")
+    parser.add_argument("--gb", type=float, default=2.0, help="Total to download per mode")
+    parser.add_argument(
+        "--ranges", type=int, default=1, help="Fetch each copy as N parallel Range requests"
+    )
+    parser.add_argument("--modes", default="sendfile,mmap,copy")
+    args = parser.parse_args()
+
+    size = args.size_mb * 1024 * 1024
+    rounds = max(1, round(args.gb * 1024**3 / size))
+    with tempfile.TemporaryDirectory(prefix="bench_serve_transfer_") as tmp:
+        data_path = Path(tmp) / "rpg.pck"
+        with open(data_path, "wb") as f:
+            for _ in range(args.size_mb):
+                f.write(os.urandom(1024 * 1024))
+        if args.ranges > 1:
+            bounds, expected = part_digests(data_path, size, args.ranges)
+        else:
+            bounds = [(0, None)]
+            expected = [hashlib.blake2b(data_path.read_bytes(), digest_size=16).digest()]
+        served_gb = rounds * size / 1024**3
+        print(
+            f"{rounds} x {args.size_mb} MB ({served_gb:.2f} GB) per mode,"
+            f" {len(bounds)} request(s) per copy"
+        )
+        print(f"{'transfer':>9} {'wall':>8} {'GB/s':>7} {'server CPU':>11} {'CPU s/GB':>9}")
+        for mode in args.modes.split(","):
+            proc, port = start_server(Path(tmp), 16, "--transfer", mode)
+            try:
+                download(port, "rpg.pck", 0, 0)  # warm up: ETag hash and page cache
+                cpu_before = server_cpu_seconds(proc.pid)
+                start = time.perf_counter()
+                with ThreadPoolExecutor(len(bounds)) as pool:
+                    for _ in range(rounds):
+                        got = list(
+                            pool.map(lambda b, port=port: download(port, "rpg.pck", *b), bounds)
+                        )
+                        if got != expected:
+                            raise SystemExit(f"{mode}: downloaded bytes differ from the file")
+                wall = time.perf_counter() - start
+                cpu_after = server_cpu_seconds(proc.pid)
+            finally:
+                proc.terminate()
+                proc.wait()
+            if cpu_before is None or cpu_after is None:
+                cpu_col = f"{'n/a':>10} {'n/a':>9}"
+            else:
+                cpu = cpu_after - cpu_before
+                cpu_col = f"{cpu:>10.2f}s {cpu / served_gb:>9.3f}"
+            print(f"{mode:>9} {wall:>7.2f}s {served_gb / wall:>7.2f} {cpu_col}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+"""Load benchmark for serve_web.py: time to first frame with several clients.
+
+Builds a synthetic web export (rpg.html, JS glue, multi-MB rpg.wasm and
+rpg.pck, icons), starts serve_web.py in a subprocess for each worker count
+and lets N simulated browser tabs load it at once. A tab fetches rpg.html,
+then everything else over 6 parallel connections like a browser does; its
+time to first frame is when rpg.html, rpg.js, rpg.wasm and rpg.pck have all
+arrived. Optional slow tabs read at a capped rate (a throttled tab or the
+screenshot tour on a busy machine) to show head-of-line blocking.
+
+The synthetic .wasm and .js compress about as well as Godot's (~4x with
+gzip); the .pck is random, like one full of already-compressed textures.
+Tabs ask for identity bodies by default; ``--encoding gzip`` (or ``br``)
+precompresses the export first and sends that Accept-Encoding, so the
+sibling-serving path is what gets measured.
+
+Every response is also checked for the COOP/COEP headers and MIME overrides.
+
+Usage:
+    python tools/benchmarks/bench_serve_web.py [--clients N] [--slow-clients K]
+        [--slow-rate MBPS] [--workers 1,16] [--wasm-mb MB] [--pck-mb MB]
+        [--encoding identity|gzip|br]
+"""
+
+from __future__ import annotations
+
+import argparse
+import http.client
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from serve_web import MIME_OVERRIDES, compressors, precompress  # noqa: E402
+
+BOOT_FILES = ("rpg.html", "rpg.js", "rpg.wasm", "rpg.pck")
+CONNECTIONS_PER_CLIENT = 6  # browsers open ~6 connections per origin
+CHUNK = 64 * 1024
+REQUIRED_HEADERS = {
+    "Cross-Origin-Opener-Policy": "same-origin",
+    "Cross-Origin-Embedder-Policy": "require-corp",
+}
+
+
+def code_like_bytes(size: int, seed: int = 0) -> bytes:
+    """Bytes that gzip about 4x, like compiled wasm: recurring short phrases plus noise."""
+    rng = random.Random(seed)
+    words = [rng.randbytes(12) for _ in range(1024)]
+    out = bytearray()
+    while len(out) < size:
+        if rng.random() < 0.08:
+            out += rng.randbytes(32)
+        else:
+            out += b"".join(rng.choices(words, k=16))
+    return bytes(out[:size])
+
+
+def make_export(directory: Path, wasm_mb: float, pck_mb: float) -> list[str]:
+    """Write a fake Godot web export; returns the files a tab requests, in order."""
+    sizes = {
+        "rpg.html": 6 * 1024,
+        "rpg.js": 320 * 1024,
+        "rpg.audio.worklet.js": 8 * 1024,
+        "rpg.wasm": int(wasm_mb * 1024 * 1024),
+        "rpg.pck": int(pck_mb * 1024 * 1024),
+        "rpg.png": 24 * 1024,
+        "rpg.icon.png": 6 * 1024,
+        "rpg.apple-touch-icon.png": 12 * 1024,
+    }
+    for name, size in sizes.items():
+        if name.endswith((".wasm", ".js", ".html")):
+            data = code_like_bytes(size)
+        else:  # .pck textures and icons are compressed already
+            data = os.urandom(size)
+        (directory / name).write_bytes(data)
+    return list(sizes)
+
+
+def start_server(serve_dir: Path, workers: int, *extra_args: str) -> tuple[subprocess.Popen, int]:
+    """Run serve_web.py on a free port; returns the process and the port."""
+    proc = subprocess.Popen(
+        [
+            sys.executable,
+            str(PROJECT_ROOT / "serve_web.py"),
+            "--port",
+            "0",
+            "--dir",
+            str(serve_dir),
+            "--workers",
+            str(workers),
+            *extra_args,
+        ],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,  # per-request access log
+        text=True,
+    )
+    for line in proc.stdout:
+        if line.startswith("SERVER_READY"):
+            port = int(line.rsplit(":", 1)[1].split("/", 1)[0])
+            return proc, port
+    proc.wait()
+    raise SystemExit(f"serve_web.py exited before SERVER_READY (code {proc.returncode})")
+
+
+def fetch(port: int, name: str, rate: float, errors: list, encoding: str = "identity") -> int:
+    """GET one file, reading at most ``rate`` bytes/s (0 = unthrottled).
+
+    Returns the bytes received (compressed, if the server used ``encoding``).
+    """
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=300)
+    try:
+        conn.request("GET", f"/{name}", headers={"Accept-Encoding": encoding})
+        resp = conn.getresponse()
+        expected_type = MIME_OVERRIDES.get(os.path.splitext(name)[1])
+        if resp.status != 200:
+            errors.append(f"{name}: HTTP {resp.status}")
+        if expected_type and resp.getheader("Content-Type") != expected_type:
+            errors.append(f"{name}: Content-Type {resp.getheader('Content-Type')}")
+        for header, value in REQUIRED_HEADERS.items():
+            if resp.getheader(header) != value:
+                errors.append(f"{name}: {header} {resp.getheader(header)!r}")
+        received = 0
+        start = time.perf_counter()
+        while chunk := resp.read(CHUNK):
+            received += len(chunk)
+            if rate:
+                ahead = received / rate - (time.perf_counter() - start)
+                if ahead > 0:
+                    time.sleep(ahead)
+        return received
+    finally:
+        conn.close()
+
+
+def run_client(
+    port: int,
+    files: list[str],
+    rate: float,
+    go: threading.Event,
+    errors: list,
+    encoding: str = "identity",
+) -> dict:
+    go.wait()
+    start = time.perf_counter()
+    done = {}
+    received = fetch(port, files[0], rate, errors, encoding)
+    done[files[0]] = time.perf_counter() - start
+
+    def timed(name):
+        size = fetch(port, name, rate, errors, encoding)
+        done[name] = time.perf_counter() - start
+        return size
+
+    with ThreadPoolExecutor(CONNECTIONS_PER_CLIENT) as pool:
+        received += sum(pool.map(timed, files[1:]))
+    return {
+        "first_frame": max(done[name] for name in BOOT_FILES),
+        "complete": max(done.values()),
+        "slow": bool(rate),
+        "bytes": received,
+    }
+
+
+def run_load(
+    port: int,
+    files: list[str],
+    clients: int,
+    slow_clients: int,
+    slow_rate: float,
+    encoding: str = "identity",
+):
+    go = threading.Event()
+    errors: list = []
+    rates = [slow_rate] * slow_clients + [0.0] * (clients - slow_clients)
+    with ThreadPoolExecutor(len(rates)) as pool:
+        futures = [
+            pool.submit(run_client, port, files, rate, go, errors, encoding) for rate in rates
+        ]
+        start = time.perf_counter()
+        go.set()
+        results = [f.result() for f in futures]
+    return results, time.perf_counter() - start, errors
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark serve_web.py under concurrent load")
+    parser.add_argument("--clients", type=int, default=4, help="Simultaneous browser tabs")
+    parser.add_argument(
+        "--slow-clients", type=int, default=1, help="How many of the tabs read at --slow-rate"
+    )
+    parser.add_argument("--slow-rate", type=float, default=8.0, help="Slow tab MB/s per connection")
+    parser.add_argument("--workers", default="1,16", help="Comma-separated serve_web --workers")
+    parser.add_argument("--wasm-mb", type=float, default=36.0)
+    parser.add_argument("--pck-mb", type=float, default=16.0)
+    parser.add_argument(
+        "--encoding",
+        default="identity",
+        choices=["identity", "gzip", "br"],
+        help="Accept-Encoding the tabs send (gzip/br precompress the export first)",
+    )
+    args = parser.parse_args()
+    if args.encoding != "identity" and args.encoding not in compressors():
+        raise SystemExit(f"{args.encoding} is not available here (pip install brotli)")
+
+    slow_clients = min(args.slow_clients, args.clients)
+    slow_rate = args.slow_rate * 1024 * 1024
+    failed = False
+    with tempfile.TemporaryDirectory(prefix="bench_serve_web_") as tmp:
+        serve_dir = Path(tmp)
+        files = make_export(serve_dir, args.wasm_mb, args.pck_mb)
+        if args.encoding != "identity":
+            precompress(str(serve_dir))
+        total_mb = sum((serve_dir / name).stat().st_size for name in files) / 1024 / 1024
+        print(
+            f"{args.clients} tab(s) x {total_mb:.1f} MB ({args.encoding}), {slow_clients} slow"
+            f" at {args.slow_rate:g} MB/s per connection"
+        )
+        print(
+            f"{'workers':>7} {'first frame p50':>16} {'max':>8} {'slow tab':>9}"
+            f" {'wall':>8} {'MB/s':>7}"
+        )
+        for workers in (int(w) for w in args.workers.split(",")):
+            proc, port = start_server(serve_dir, workers)
+            try:
+                results, wall, errors = run_load(
+                    port, files, args.clients, slow_clients, slow_rate, args.encoding
+                )
+            finally:
+                proc.terminate()
+                proc.wait()
+            fast = [r["first_frame"] for r in results if not r["slow"]] or [0.0]
+            slow = [r["first_frame"] for r in results if r["slow"]]
+            slow_col = f"{max(slow):>8.2f}s" if slow else f"{'-':>9}"
+            print(
+                f"{workers:>7} {statistics.median(fast):>15.2f}s {max(fast):>7.2f}s {slow_col}"
+                f" {wall:>7.2f}s {sum(r['bytes'] for r in results) / 1024 / 1024 / wall:>7.1f}"
+            )
+            for error in sorted(set(errors)):
+                print(f"  header/status mismatch: {error}", file=sys.stderr)
+            failed = failed or bool(errors)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
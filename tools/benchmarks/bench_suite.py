@@ -0,0 +1,385 @@
+#!/usr/bin/env python3
+"""Regression suite for the Python tooling: time every hot path, compare to a baseline.
+
+Groups (all inputs are synthetic and built in a temp directory):
+
+- chroma: resize + chroma key of an Imagine-style plate (2x the output
+  size, like a raw generation) for every type in asset-types.json
+- tscn: tscn_parser round trip and the migrate_buttons rule over
+  generated scenes with hundreds of Buttons and their signal connections
+- placeholders: generate_placeholders.py cold render of placeholders.json
+  and the incremental no-op re-run
+- http: several clients loading a web export at once from an in-process
+  GodotWebHandler server, then revalidating it (304s)
+
+Each metric is the best of --repeat runs, in milliseconds. Results are
+compared with the baseline file: --baseline, else $BENCH_BASELINE, else
+tools/benchmarks/baseline.json (gitignored). A metric regresses when it is more than --threshold slower, and
+by more than --min-delta-ms, which keeps sub-millisecond noise out. Any
+regression makes the exit status 1. --save records this run as the new
+baseline. Per-metric thresholds can be kept in the baseline's
+"thresholds" map, keyed by metric-name prefix (e.g. {"http.": 0.5}); --save
+preserves them.
+
+Baselines are only comparable on the same machine; the file records the
+platform, CPU count, Python and whether NumPy was available, and a
+mismatch is reported. For that reason no baseline is committed. In CI,
+point BENCH_BASELINE at a file the runner keeps between jobs (its cache):
+a job on the main branch runs with --save to refresh it, and jobs on
+branches compare against it with --require-baseline, which exits 2 when
+the file is missing instead of passing with nothing to compare.
+
+Usage:
+    python tools/benchmarks/bench_suite.py [--only chroma,tscn,placeholders,http]
+        [--repeat 5] [--baseline FILE] [--save] [--require-baseline]
+        [--threshold 0.25] [--json]
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import http.client
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from PIL import Image
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from bench_chroma_key import asset_sizes, make_plate  # noqa: E402
+from bench_serve_web import make_export  # noqa: E402
+
+import generate_placeholders  # noqa: E402
+import process_asset  # noqa: E402
+import serve_web  # noqa: E402
+from migrate_buttons import UI_BUTTON_RULE  # noqa: E402
+from migrate_scenes import migrate_files  # noqa: E402
+from tscn_parser import SceneIndex  # noqa: E402
+
+DEFAULT_BASELINE = os.environ.get("BENCH_BASELINE") or str(
+    Path(__file__).resolve().parent / "baseline.json"
+)
+GROUPS = ("chroma", "tscn", "placeholders", "http")
+
+
+def best_ms(fn, repeat: int, setup=None) -> float:
+    """Fastest of ``repeat`` calls to ``fn`` in ms; ``setup`` runs untimed before each."""
+    times = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - start) * 1000)
+    return min(times)
+
+
+# -- chroma ----------------------------------------------------------------------
+
+
+def bench_chroma(repeat: int, workdir: Path) -> dict:
+    metrics = {}
+    for name, (w, h) in asset_sizes().items():
+        plate = make_plate((w * 2, h * 2))
+        chroma = process_asset.sample_corner_chroma(plate)
+
+        def run(plate=plate, size=(w, h), chroma=chroma):
+            img = plate.resize(size, Image.Resampling.LANCZOS)
+            process_asset.chroma_key(img, chroma, tolerance=55)
+
+        metrics[f"chroma.{name}_{w}x{h}"] = best_ms(run, repeat)
+    return metrics
+
+
+# -- tscn ------------------------------------------------------------------------
+
+
+def make_scene(buttons: int, seed: int) -> str:
+    """A menu scene with ``buttons`` Buttons in rows, each wired to a handler."""
+    lines = [
+        f'[gd_scene load_steps=2 format=3 uid="uid://bench{seed}"]',
+        "",
+        '[ext_resource type="Script" path="res://scripts/ui/bench_menu.gd" id="1_menu"]',
+        "",
+        '[node name="Menu" type="Control"]',
+        "layout_mode = 3",
+        "anchors_preset = 15",
+        'script = ExtResource("1_menu")',
+        "",
+    ]
+    connections = []
+    rows = max(1, buttons // 20)
+    for row in range(rows):
+        lines += [f'[node name="Row{row}" type="HBoxContainer" parent="."]', "", ""]
+    for i in range(buttons):
+        row = i % rows
+        lines += [
+            f'[node name="Button{i}" type="Button" parent="Row{row}"]',
+            "custom_minimum_size = Vector2(160, 40)",
+            "layout_mode = 2",
+            f'text = "Option {i}"',
+            "",
+        ]
+        connections.append(
+            f'[connection signal="pressed" from="Row{row}/Button{i}" to="."'
+            f' method="_on_option_pressed" binds= [{i}]]'
+        )
+    return "\n".join(lines + connections) + "\n"
+
+
+def bench_tscn(repeat: int, workdir: Path, buttons: int = 300, scenes: int = 8) -> dict:
+    texts = [make_scene(buttons, seed) for seed in range(scenes)]
+    paths = [workdir / f"menu_{i}.tscn" for i in range(scenes)]
+
+    def reset():
+        for path, text in zip(paths, texts):
+            path.write_text(text, encoding="utf-8")
+
+    def migrate():
+        results = migrate_files(paths, [UI_BUTTON_RULE], workers=1, root=workdir)
+        replaced = sum(r["changes"].get(UI_BUTTON_RULE.name, 0) for r in results)
+        if replaced != buttons * scenes:
+            raise SystemExit(f"tscn: migrated {replaced} buttons, expected {buttons * scenes}")
+
+    return {
+        f"tscn.parse_render_{buttons}_buttons": best_ms(
+            lambda: SceneIndex.parse(texts[0].splitlines(keepends=True)).render(), repeat
+        ),
+        f"tscn.migrate_{scenes}x{buttons}_buttons": best_ms(migrate, repeat, setup=reset),
+    }
+
+
+# -- placeholders ------------------------------------------------------------------
+
+
+def bench_placeholders(repeat: int, workdir: Path) -> dict:
+    with open(generate_placeholders.DEFAULT_SPEC, encoding="utf-8") as f:
+        spec = json.load(f)
+    spec["output_dir"] = str(workdir / "assets")
+    spec_path = workdir / "placeholders.json"
+    spec_path.write_text(json.dumps(spec), encoding="utf-8")
+    entries = generate_placeholders.load_spec(spec_path)
+
+    def run(force):
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            generate_placeholders.generate(entries, workdir, workers=1, force=force, imports=False)
+
+    cold = best_ms(lambda: run(True), repeat)
+    noop = best_ms(lambda: run(False), repeat)
+    return {
+        f"placeholders.render_{len(entries)}_outputs": cold,
+        f"placeholders.noop_{len(entries)}_outputs": noop,
+    }
+
+
+# -- http --------------------------------------------------------------------------
+
+
+def fetch_all(port: int, files: list, etags: dict | None, latencies: list) -> None:
+    """One client: every file over one keep-alive connection."""
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+    try:
+        for name in files:
+            headers = {"Accept-Encoding": "identity"}
+            if etags is not None:
+                headers["If-None-Match"] = etags[name]
+            start = time.perf_counter()
+            conn.request("GET", f"/{name}", headers=headers)
+            response = conn.getresponse()
+            response.read()
+            latencies.append((time.perf_counter() - start) * 1000)
+            expected = 304 if etags is not None else 200
+            if response.status != expected:
+                raise SystemExit(f"http: {name} returned {response.status}, expected {expected}")
+    finally:
+        conn.close()
+
+
+def bench_http(repeat: int, workdir: Path, clients: int = 8, workers: int = 16) -> dict:
+    serve_dir = workdir / "webexport"
+    serve_dir.mkdir()
+    files = make_export(serve_dir, wasm_mb=4, pck_mb=4)
+    server = serve_web.make_server(str(serve_dir), 0, workers=workers)
+    port = server.server_address[1]
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stderr(devnull):  # access log
+        thread.start()
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+            etags = {}
+            for name in files:
+                conn.request("HEAD", f"/{name}")
+                response = conn.getresponse()
+                response.read()
+                etags[name] = response.getheader("ETag")
+            conn.close()
+
+            results = {}
+            for label, tags in (("load", None), ("revalidate", etags)):
+                latencies = []
+
+                def load(tags=tags, latencies=latencies):
+                    with ThreadPoolExecutor(clients) as pool:
+                        for future in [
+                            pool.submit(fetch_all, port, files, tags, latencies)
+                            for _ in range(clients)
+                        ]:
+                            future.result()
+
+                results[f"http.{label}_{clients}_clients"] = best_ms(load, repeat)
+                p95 = statistics.quantiles(latencies, n=20)[-1] if len(latencies) > 1 else 0
+                results[f"http.{label}_request_p95"] = p95
+        finally:
+            server.shutdown()
+            server.server_close()
+    return results
+
+
+# -- baseline ----------------------------------------------------------------------
+
+
+def machine() -> dict:
+    return {
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "python": platform.python_version(),
+        "numpy": process_asset.np is not None,
+    }
+
+
+def threshold_for(metric: str, default: float, thresholds: dict) -> float:
+    matches = [prefix for prefix in thresholds if metric.startswith(prefix)]
+    return thresholds[max(matches, key=len)] if matches else default
+
+
+def compare(metrics: dict, baseline: dict, threshold: float, min_delta_ms: float) -> list:
+    """[(metric, baseline ms or None, current ms, change or None, status)]."""
+    rows = []
+    previous = baseline.get("metrics", {})
+    thresholds = baseline.get("thresholds", {})
+    for metric, current in metrics.items():
+        base = previous.get(metric)
+        if base is None:
+            rows.append((metric, None, current, None, "new"))
+            continue
+        change = (current - base) / base if base else 0.0
+        limit = threshold_for(metric, threshold, thresholds)
+        regressed = change > limit and current - base > min_delta_ms
+        rows.append((metric, base, current, change, "REGRESSED" if regressed else "ok"))
+    return rows
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark regression suite for the tooling")
+    parser.add_argument("--only", default=",".join(GROUPS), help="Comma-separated groups")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per metric (best is kept)")
+    parser.add_argument(
+        "--baseline", default=DEFAULT_BASELINE, help="Baseline file (default $BENCH_BASELINE)"
+    )
+    parser.add_argument("--save", action="store_true", help="Record this run as the baseline")
+    parser.add_argument(
+        "--require-baseline", action="store_true", help="Exit 2 if the baseline file is missing"
+    )
+    parser.add_argument(
+        "--threshold", type=float, default=0.25, help="Allowed slowdown (0.25 = 25%%)"
+    )
+    parser.add_argument(
+        "--min-delta-ms", type=float, default=2.0, help="Ignore slowdowns smaller than this"
+    )
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    baseline_path = Path(args.baseline)
+    if args.require_baseline and not args.save and not baseline_path.exists():
+        print(f"No baseline at {baseline_path} (--require-baseline)", file=sys.stderr)
+        return 2
+
+    groups = [g.strip() for g in args.only.split(",") if g.strip()]
+    unknown = set(groups) - set(GROUPS)
+    if unknown:
+        raise SystemExit(
+            f"Unknown group(s): {', '.join(sorted(unknown))}. Valid: {', '.join(GROUPS)}"
+        )
+    benches = {
+        "chroma": bench_chroma,
+        "tscn": bench_tscn,
+        "placeholders": bench_placeholders,
+        "http": bench_http,
+    }
+
+    metrics = {}
+    for group in groups:
+        workdir = Path(tempfile.mkdtemp(prefix=f"bench_{group}_"))
+        try:
+            start = time.perf_counter()
+            metrics.update(benches[group](max(1, args.repeat), workdir))
+            if not args.json:
+                print(f"{group}: {time.perf_counter() - start:.1f}s", file=sys.stderr)
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    baseline = {}
+    if baseline_path.exists():
+        with open(baseline_path, encoding="utf-8") as f:
+            baseline = json.load(f)
+    rows = compare(metrics, baseline, args.threshold, args.min_delta_ms)
+    regressions = [row for row in rows if row[4] == "REGRESSED"]
+    current_machine = machine()
+
+    if args.json:
+        print(
+            json.dumps(
+                {
+                    "machine": current_machine,
+                    "metrics": metrics,
+                    "comparison": [
+                        {"metric": m, "baseline": b, "current": c, "change": ch, "status": s}
+                        for m, b, c, ch, s in rows
+                    ],
+                },
+                indent=2,
+            )
+        )
+    else:
+        if baseline and baseline.get("machine") != current_machine:
+            print(f"warning: baseline was recorded on {baseline.get('machine')}")
+        print(f"{'metric':<40} {'baseline':>10} {'current':>10} {'change':>8}  status")
+        for metric, base, current, change, status in rows:
+            base_col = f"{base:.2f}" if base is not None else "-"
+            change_col = f"{change * 100:+.1f}%" if change is not None else "-"
+            print(f"{metric:<40} {base_col:>10} {current:>10.2f} {change_col:>8}  {status}")
+        if not baseline and not args.save:
+            print(f"No baseline at {baseline_path}; run with --save to record one")
+
+    if args.save:
+        record = {
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "machine": current_machine,
+            "repeat": args.repeat,
+            "metrics": {k: round(v, 3) for k, v in metrics.items()},
+            "thresholds": baseline.get("thresholds", {}),
+        }
+        baseline_path.parent.mkdir(parents=True, exist_ok=True)
+        baseline_path.write_text(json.dumps(record, indent=2) + "\n", encoding="utf-8")
+        if not args.json:
+            print(f"Saved baseline to {baseline_path}")
+    if regressions:
+        if not args.json:
+            print(f"{len(regressions)} metric(s) regressed past the threshold")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
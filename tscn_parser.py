@@ -0,0 +1,433 @@
+#!/usr/bin/env python3
+"""
+Single-pass parser and index for Godot text scenes (.tscn) and resources (.tres).
+
+A file is split into sections, one per ``[header]`` line (gd_scene, ext_resource,
+sub_resource, node, connection, ...), each keeping its exact original text.
+SceneIndex builds lookups over them in the same pass — ext_resources and
+sub_resources by id, nodes by path (with name, type, parent and instance) —
+and render() writes the file back in one join. Untouched sections come back
+byte for byte, so a migration only changes the lines it edits.
+
+Usage:
+    python tscn_parser.py scenes/ui/main_menu.tscn   # print the index summary
+"""
+
+import hashlib
+import re
+import sys
+
+SECTION_KINDS = (
+    "gd_scene",
+    "gd_resource",
+    "ext_resource",
+    "sub_resource",
+    "resource",
+    "node",
+    "connection",
+    "editable",
+)
+HEADER_RE = re.compile(r"\[(%s)(?=[\s\]])" % "|".join(SECTION_KINDS))
+PROPERTY_RE = re.compile(r"^([\w/:.@-]+) = ")
+RESOURCE_REF_RE = re.compile(r'^(ExtResource|SubResource)\(\s*"?([^")]*)"?\s*\)$')
+ID_SUFFIX_CHARS = "abcdefghijklmnopqrstuvwxyz0123456789"
+
+
+def quote(value):
+    """Godot string literal for ``value``."""
+    return '"' + value.replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
+def unquote(raw):
+    """Plain string from a header value (quoted or bare)."""
+    if raw is None:
+        return None
+    if len(raw) >= 2 and raw[0] == raw[-1] == '"':
+        return re.sub(r"\\(.)", r"\1", raw[1:-1])
+    return raw
+
+
+def resource_ref(raw):
+    """('ExtResource' | 'SubResource', id) for ``ExtResource("3")`` etc., else None."""
+    match = RESOURCE_REF_RE.match(raw or "")
+    return (match.group(1), match.group(2)) if match else None
+
+
+def ends_in_string(line, in_string):
+    """Whether a quoted string is still open at the end of ``line``.
+
+    Godot writes multi-line text with literal newlines inside the quotes, so a
+    body line that looks like a header may really be string content.
+    """
+    escaped = False
+    for char in line:
+        if escaped:
+            escaped = False
+        elif char == "\\" and in_string:
+            escaped = True
+        elif char == '"':
+            in_string = not in_string
+    return in_string
+
+
+def scan_value(line, depth, in_string):
+    """(depth, in_string) after ``line``: bracket nesting outside strings, and
+    whether a string is still open. Used to find where a property value ends."""
+    escaped = False
+    for char in line:
+        if escaped:
+            escaped = False
+        elif in_string:
+            if char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char in "([{":
+            depth += 1
+        elif char in ")]}":
+            depth -= 1
+    return depth, in_string
+
+
+def parse_header(line):
+    """(kind, {attr: raw value}) for a header line, in file order."""
+    text = line.strip()
+    match = HEADER_RE.match(text)
+    kind = match.group(1)
+    attrs = {}
+    i, end = match.end(), len(text) - 1  # text[end] is the closing "]"
+    while i < end:
+        while i < end and text[i].isspace():
+            i += 1
+        if i >= end:
+            break
+        eq = text.index("=", i)
+        key = text[i:eq].strip()
+        i = eq + 1
+        while i < end and text[i].isspace():  # e.g. binds= ["Hero"]
+            i += 1
+        start, depth, in_string = i, 0, False
+        while i < end:
+            char = text[i]
+            if in_string:
+                if char == "\\":
+                    i += 1
+                elif char == '"':
+                    in_string = False
+            elif char == '"':
+                in_string = True
+            elif char in "([{":
+                depth += 1
+            elif char in ")]}":
+                depth -= 1
+            elif char.isspace() and depth == 0:
+                break
+            i += 1
+        attrs[key] = text[start:i]
+    return kind, attrs
+
+
+class Section:
+    """One ``[header]`` plus the body lines up to the next header."""
+
+    def __init__(self, kind, attrs, header, body=None, line=0):
+        self.kind = kind
+        self.attrs = attrs
+        self.header = header  # original header line, reused while unmodified
+        self.body = body if body is not None else []
+        self.line = line
+        self.dirty = header is None
+
+    def get(self, key, default=None):
+        """Unquoted header attribute."""
+        raw = self.attrs.get(key)
+        return default if raw is None else unquote(raw)
+
+    @property
+    def id(self):
+        return self.get("id")
+
+    def set_attrs(self, attrs):
+        """Replace the header attributes (raw values, in output order)."""
+        self.attrs = dict(attrs)
+        self.dirty = True
+
+    # -- body properties (``key = value`` lines, values may span lines) --------
+
+    def property_spans(self):
+        """[(key, first body line, end body line)] for each property, in order."""
+        spans = []
+        i = 0
+        while i < len(self.body):
+            match = PROPERTY_RE.match(self.body[i])
+            if not match:
+                i += 1
+                continue
+            start = i
+            depth, in_string = scan_value(self.body[i][match.end() :], 0, False)
+            i += 1
+            while (depth > 0 or in_string) and i < len(self.body):
+                depth, in_string = scan_value(self.body[i], depth, in_string)
+                i += 1
+            spans.append((match.group(1), start, i))
+        return spans
+
+    def properties(self):
+        """{key: raw value} of the body properties; multi-line values keep their newlines."""
+        result = {}
+        for key, start, end in self.property_spans():
+            text = "".join(self.body[start:end])
+            result[key] = text[len(key) + 3 :].rstrip("\r\n")
+        return result
+
+    def set_property(self, key, raw):
+        """Set a body property to the raw Godot value ``raw``, appending it if new."""
+        newline = "\r\n" if self.body and self.body[0].endswith("\r\n") else "\n"
+        line = f"{key} = {raw}{newline}"
+        spans = self.property_spans()
+        for existing, start, end in spans:
+            if existing == key:
+                self.body[start:end] = [line]
+                return
+        position = spans[-1][2] if spans else 0
+        self.body.insert(position, line)
+
+    def remove_property(self, key):
+        """Drop a body property; returns whether it was there."""
+        for existing, start, end in self.property_spans():
+            if existing == key:
+                del self.body[start:end]
+                return True
+        return False
+
+    def render_header(self):
+        if not self.dirty:
+            return self.header
+        parts = [self.kind] + [f"{key}={value}" for key, value in self.attrs.items()]
+        return "[" + " ".join(parts) + "]\n"
+
+    def render(self):
+        return self.render_header() + "".join(self.body)
+
+    def __repr__(self):
+        return f"<Section {self.kind} {self.attrs}>"
+
+
+class Node:
+    """Index view of a ``[node]`` section."""
+
+    def __init__(self, section, path):
+        self.section = section
+        self.path = path
+
+    @property
+    def name(self):
+        return self.section.get("name")
+
+    @property
+    def type(self):
+        return self.section.get("type")
+
+    @property
+    def parent(self):
+        return self.section.get("parent")
+
+    @property
+    def instance(self):
+        """ext_resource id this node instances, or None."""
+        ref = resource_ref(self.section.attrs.get("instance"))
+        return ref[1] if ref and ref[0] == "ExtResource" else None
+
+    def __repr__(self):
+        return f"<Node {self.path} type={self.type} instance={self.instance}>"
+
+
+class SceneIndex:
+    """Sections of one .tscn/.tres plus id and path lookups, built in one pass."""
+
+    def __init__(self, path=None):
+        self.path = path
+        self.preamble = []  # lines before the first header (normally none)
+        self.sections = []
+        self.header = None
+        self.ext_resources = {}
+        self.sub_resources = {}
+        self.nodes = {}  # node path -> Node, in file order
+        self.connections = []
+
+    @classmethod
+    def parse(cls, lines, path=None):
+        """Index an iterable of lines (a file object streams it)."""
+        index = cls(path)
+        current = None
+        in_string = False
+        for number, line in enumerate(lines, 1):
+            if not in_string and line.startswith("[") and HEADER_RE.match(line):
+                kind, attrs = parse_header(line)
+                current = Section(kind, attrs, line, line=number)
+                index._add(current)
+                continue
+            (current.body if current is not None else index.preamble).append(line)
+            in_string = ends_in_string(line, in_string)
+        return index
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "r", encoding="utf-8", newline="") as f:
+            return cls.parse(f, path)
+
+    def _add(self, section, position=None):
+        if position is None:
+            self.sections.append(section)
+        else:
+            self.sections.insert(position, section)
+        if section.kind in ("gd_scene", "gd_resource"):
+            self.header = section
+        elif section.kind == "ext_resource":
+            self.ext_resources[section.id] = section
+        elif section.kind == "sub_resource":
+            self.sub_resources[section.id] = section
+        elif section.kind == "node":
+            parent = section.get("parent")
+            name = section.get("name")
+            if parent is None:
+                path = "."
+            elif parent == ".":
+                path = name
+            else:
+                path = f"{parent}/{name}"
+            self.nodes[path] = Node(section, path)
+        elif section.kind == "connection":
+            self.connections.append(section)
+
+    def render(self):
+        """The whole file as text; unmodified sections are byte-identical."""
+        return "".join(self.preamble) + "".join(section.render() for section in self.sections)
+
+    def save(self, path=None):
+        with open(path or self.path, "w", encoding="utf-8", newline="") as f:
+            f.write(self.render())
+
+    # -- lookups -------------------------------------------------------------
+
+    def ext_resource_by_path(self, res_path):
+        for section in self.ext_resources.values():
+            if section.get("path") == res_path:
+                return section
+        return None
+
+    def nodes_of_type(self, node_type):
+        return [node for node in self.nodes.values() if node.type == node_type]
+
+    def instances_of(self, ext_id):
+        return [node for node in self.nodes.values() if node.instance == ext_id]
+
+    # -- edits ---------------------------------------------------------------
+
+    def allocate_ext_id(self, hint=""):
+        """A new ext_resource id unique across every ext_resource in the file.
+
+        Files whose ids are all numeric ("1", "2") get max + 1; Godot 4 style
+        files ("1_x7k2p") get "<count + 1>_<5 chars>", the suffix derived from
+        ``hint`` so re-running a migration yields the same id.
+        """
+        return self._allocate(self.ext_resources, str(len(self.ext_resources) + 1), hint)
+
+    def allocate_sub_id(self, resource_type, hint=""):
+        """A new sub_resource id in Godot 4's "<Type>_<5 chars>" form."""
+        return self._allocate(self.sub_resources, resource_type, hint, numeric=False)
+
+    def _allocate(self, existing, prefix, hint, numeric=None):
+        if numeric is None:
+            numeric = all(key.isdigit() for key in existing) and (
+                bool(existing) or self._format() < 3
+            )
+        if numeric:
+            return str(max((int(key) for key in existing), default=0) + 1)
+        seed = f"{self.path}:{hint}"
+        attempt = 0
+        while True:
+            digest = hashlib.sha1(f"{seed}:{attempt}".encode("utf-8")).digest()
+            suffix = "".join(ID_SUFFIX_CHARS[b % len(ID_SUFFIX_CHARS)] for b in digest[:5])
+            candidate = f"{prefix}_{suffix}"
+            if candidate not in existing:
+                return candidate
+            attempt += 1
+
+    def _format(self):
+        try:
+            return int(self.header.get("format", "3")) if self.header else 3
+        except ValueError:
+            return 3
+
+    def add_ext_resource(self, resource_type, res_path, uid=None):
+        """Append an ext_resource after the existing ones; returns its id."""
+        ext_id = self.allocate_ext_id(res_path)
+        attrs = {"type": quote(resource_type)}
+        if uid:
+            attrs["uid"] = quote(uid)
+        attrs["path"] = quote(res_path)
+        attrs["id"] = quote(ext_id)
+        section = Section("ext_resource", attrs, None)
+
+        anchor = None
+        for position, existing in enumerate(self.sections):
+            if existing.kind == "ext_resource" or existing is self.header:
+                anchor = position
+        if anchor is None:
+            anchor = -1
+            section.body = ["\n"]
+        elif self.sections[anchor].kind == "ext_resource":
+            # Take over the blank line(s) that separated the ext block from the rest.
+            previous = self.sections[anchor]
+            while previous.body and not previous.body[-1].strip():
+                section.body.insert(0, previous.body.pop())
+        else:
+            section.body = ["\n"]
+        self._add(section, anchor + 1)
+        self._bump_load_steps()
+        return ext_id
+
+    def _bump_load_steps(self):
+        if self.header is not None and "load_steps" in self.header.attrs:
+            steps = len(self.ext_resources) + len(self.sub_resources) + 1
+            attrs = dict(self.header.attrs)
+            attrs["load_steps"] = str(steps)
+            self.header.set_attrs(attrs)
+
+    def instance_node(self, node, ext_id):
+        """Turn ``node`` into an instance of ext_resource ``ext_id``, keeping its body.
+
+        Drops ``type`` and puts ``instance=`` right after ``parent`` (Godot's
+        order); other attributes such as unique_id or groups are kept.
+        """
+        attrs = {}
+        for key, value in node.section.attrs.items():
+            if key in ("type", "instance"):
+                continue
+            attrs[key] = value
+            if key == "parent":
+                attrs["instance"] = f'ExtResource("{ext_id}")'
+        if "instance" not in attrs:
+            attrs["instance"] = f'ExtResource("{ext_id}")'
+        node.section.set_attrs(attrs)
+
+
+def main():
+    for path in sys.argv[1:]:
+        index = SceneIndex.load(path)
+        print(f"{path}:")
+        print(
+            f"  ext_resources: {len(index.ext_resources)}  sub_resources: {len(index.sub_resources)}"
+        )
+        print(f"  nodes: {len(index.nodes)}  connections: {len(index.connections)}")
+        for ext_id, section in index.ext_resources.items():
+            users = index.instances_of(ext_id)
+            note = f" ({len(users)} instance(s))" if users else ""
+            print(f'    ExtResource("{ext_id}") {section.get("type")} {section.get("path")}{note}')
+
+
+if __name__ == "__main__":
+    main()